@@ -4,9 +4,11 @@ Multi-agent system for WBS generation.
 from .base_agent import BaseAgent
 from .analyst_agent import AnalystAgent
 from .planner_agent import PlannerAgent
-from .validator_agent import ValidatorAgent, ValidationResult, ESTIMATION_RULES
+from .validator_agent import ValidatorAgent, ValidationResult, ESTIMATION_RULES, estimation_rules_to_dict
 from .agent_orchestrator import AgentOrchestrator, StabilizationMode
 from .result_stabilizer import ResultStabilizer, EstimationRules, EnsembleGenerator
+from .message_bus import MessageBus, Message, MessageType
+from .content_cache import ContentCache
 
 __all__ = [
     'BaseAgent', 
@@ -19,5 +21,10 @@ __all__ = [
     'ResultStabilizer',
     'EstimationRules',
     'EnsembleGenerator',
-    'ESTIMATION_RULES'
+    'MessageBus',
+    'Message',
+    'MessageType',
+    'ContentCache',
+    'ESTIMATION_RULES',
+    'estimation_rules_to_dict'
 ]
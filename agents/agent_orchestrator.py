@@ -3,20 +3,72 @@ Agent Orchestrator.
 Coordinates communication between multiple agents to generate WBS.
 Includes stabilization features for consistent results.
 """
+import json
 import logging
+import sys
 import time
-from typing import Dict, Any, Optional, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+from itertools import islice
+from typing import Dict, Any, Iterator, NamedTuple, Optional, List, Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from .analyst_agent import AnalystAgent
 from .planner_agent import PlannerAgent
 from .validator_agent import ValidatorAgent, ValidationResult
 from .result_stabilizer import ResultStabilizer, EstimationRules, EnsembleGenerator
-from .base_agent import AgentEventLogger
+from .base_agent import AgentEventLogger, get_orchestrator_pool
+from .message_bus import MessageBus
+from .content_cache import ContentCache, get_analysis_cache, get_wbs_cache
 from progress_tracker import ProgressTracker
 from config import Config
+from wbs_utils import clone_payload
 
 logger = logging.getLogger(__name__)
 
+_BANNER = "=" * 70
+_SECTION_BANNER = "=" * 50
+
+# Small finite vocabularies used in conversation log entries. Interning them
+# lets every entry share one string object per name/action.
+_AGENT_NAMES = {
+    name: sys.intern(name)
+    for name in ("Orchestrator", "Analyst", "Planner", "Validator")
+}
+_ACTIONS = {
+    action: sys.intern(action)
+    for action in (
+        "delegate_to_analyst", "analyst_failed", "analysis_complete", "analyst_fast_path",
+        "clarifications_needed", "delegate_to_planner", "wbs_creation_failed",
+        "wbs_complete", "validation_issues", "coverage_check",
+        "validation_complete", "quality_gate_triggered",
+        "quality_refinement_failed", "quality_refinement_complete",
+        "wbs_normalized", "llm_validation_complete", "ensemble_early_stop",
+        "generation_complete"
+    )
+}
+
+
+
+class LogEntry(NamedTuple):
+    """A single conversation log step.
+    
+    Tuples keep long-lived logs compact; use _asdict() for the JSON shape.
+    """
+    timestamp: float
+    t_ns: int
+    agent: str
+    action: str
+    details: Dict[str, Any]
+
+
+def _get_estimation_rules(rules_path: Optional[str]) -> EstimationRules:
+    """Build estimation rules for an orchestrator from the current rules file.
+    
+    Not cached here: the parsed file is shared through _load_rules_file,
+    which is keyed by path and modification time, so construction is cheap
+    and an edited rules file takes effect for the next orchestrator.
+    """
+    return EstimationRules(rules_path)
+
 
 class StabilizationMode:
     """Stabilization mode constants."""
@@ -67,34 +119,55 @@ class AgentOrchestrator:
     └─────────────────┘
     """
     
+    # Pipeline stage failures: stage -> (agent attribute, log agent, log action,
+    # agent label, default error)
+    _STAGE_FAILURES = {
+        "analysis": ("analyst", "Orchestrator", "analyst_failed", "Analyst Agent", "Analysis failed"),
+        "planning": ("planner", "Planner", "wbs_creation_failed", "Planner Agent", "WBS creation failed"),
+    }
+    
+    # Extra hint for the redundant refinement request
+    SPECULATIVE_FEEDBACK_SUFFIX = " Особое внимание удели суммам часов."
+    
     def __init__(self, stabilization_mode: str = None, 
-                 estimation_rules_path: str = None):
+                 estimation_rules_path: str = None,
+                 enable_speculation: Optional[bool] = None):
         """Initialize the orchestrator with agents.
         
         Args:
             stabilization_mode: Mode for result stabilization
             estimation_rules_path: Path to estimation rules file
+            enable_speculation: Run redundant refinement requests in parallel
+                (defaults to Config.ENABLE_SPECULATIVE_REFINEMENT)
         """
         self.analyst = AnalystAgent()
         self.planner = PlannerAgent()
         self.validator = ValidatorAgent()
-        self.conversation_log: List[Dict[str, Any]] = []
+        self.message_bus = MessageBus()
+        self.message_bus.subscribe(self.analyst.name, self.analyst.analyze_specification)
+        self.message_bus.subscribe(self.planner.name, self.planner.create_wbs)
+        self._reset_conversation_log()
         self.event_logger = AgentEventLogger()
         self._progress: Optional[ProgressTracker] = None
         
         # Load estimation rules
-        self.estimation_rules = EstimationRules(estimation_rules_path)
+        self._estimation_rules_path = estimation_rules_path
+        self.estimation_rules = _get_estimation_rules(estimation_rules_path)
+        self._stabilization_settings: Dict[str, Any] = self.estimation_rules.rules.get("stabilization_settings", {})
         
         # Set stabilization mode
-        settings = self.estimation_rules.rules.get("stabilization_settings", {})
-        self.stabilization_mode = stabilization_mode or settings.get("default_mode", "validate")
+        self.stabilization_mode = stabilization_mode or self._stabilization_settings.get("default_mode", "validate")
         
         # Ensemble settings
-        self.ensemble_iterations = settings.get("ensemble_iterations", 3)
+        self.ensemble_iterations = self._stabilization_settings.get("ensemble_iterations", 3)
+        
+        self.enable_speculation = (
+            Config.ENABLE_SPECULATIVE_REFINEMENT if enable_speculation is None else enable_speculation
+        )
         
         logger.info("🎬 Оркестратор агентов инициализирован")
-        logger.info(f"   Подключенные агенты: {self.analyst.name}, {self.planner.name}, {self.validator.name}")
-        logger.info(f"   Режим стабилизации: {self.stabilization_mode}")
+        logger.info("   Подключенные агенты: %s, %s, %s", self.analyst.name, self.planner.name, self.validator.name)
+        logger.info("   Режим стабилизации: %s", self.stabilization_mode)
     
     def set_progress_tracker(self, tracker: Optional[ProgressTracker]):
         """Attach a progress tracker and propagate to all agents.
@@ -108,6 +181,25 @@ class AgentOrchestrator:
         self.planner.set_progress_tracker(tracker)
         self.validator.set_progress_tracker(tracker)
     
+    def _reset_conversation_log(self):
+        """Clear the conversation log together with its running aggregates."""
+        self.conversation_log: deque = deque(maxlen=Config.CONVERSATION_LOG_MAX_ENTRIES)
+        self._conversation_wire: deque = deque(maxlen=Config.CONVERSATION_LOG_MAX_ENTRIES)
+        self._logged_count = 0
+        # Wall-clock anchor for monotonic entry offsets; the local time of day
+        # is resolved once so summaries need no per-entry timezone lookup
+        self._log_t0_wall = time.time()
+        self._log_t0_ns = time.perf_counter_ns()
+        t0_local = time.localtime(self._log_t0_wall)
+        self._log_t0_day_seconds = (
+            t0_local.tm_hour * 3600 + t0_local.tm_min * 60 + t0_local.tm_sec + self._log_t0_wall % 1
+        )
+        self._action_counts: Dict[str, int] = {}
+        self._agents_involved: set = set()
+        # Rendered summary lines, one tuple per entry still in the log
+        self._summary_lines: deque = deque(maxlen=Config.CONVERSATION_LOG_MAX_ENTRIES)
+        self._summarized_count = 0
+    
     def _log_conversation(self, agent_name: str, action: str, details: Dict[str, Any]):
         """Log a conversation step.
         
@@ -116,29 +208,110 @@ class AgentOrchestrator:
             action: Action performed
             details: Details of the action
         """
-        entry = {
-            "timestamp": time.time(),
-            "agent": agent_name,
-            "action": action,
-            "details": details
-        }
+        agent_name = _AGENT_NAMES.get(agent_name) or sys.intern(agent_name)
+        action = _ACTIONS.get(action) or sys.intern(action)
+        t_ns = time.perf_counter_ns() - self._log_t0_ns
+        entry = LogEntry(
+            self._log_t0_wall + t_ns / 1e9,
+            t_ns,
+            agent_name,
+            action,
+            {} if Config.CONVERSATION_LOG_MINIMAL else details
+        )
         self.conversation_log.append(entry)
-        logger.info(f"[Orchestrator] {agent_name}: {action}")
+        entry_dict = entry._asdict()
+        self._conversation_wire.append(json.dumps(entry_dict, ensure_ascii=False, default=str))
+        self._logged_count += 1
+        self._action_counts[action] = self._action_counts.get(action, 0) + 1
+        self._agents_involved.add(agent_name)
+        logger.info("[Orchestrator] %s: %s", agent_name, action)
         if self._progress:
-            self._progress.record_intermediate("orchestrator_conversation_step", entry)
+            self._progress.record_intermediate("orchestrator_conversation_step", entry_dict)
     
+    def _precompute_validation_context(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Prepare requirement lookups used by the coverage check.
+        
+        Depends only on the analysis, so it can run while the Planner is
+        still drafting the WBS.
+        
+        Args:
+            analysis: Analysis result from Analyst Agent
+            
+        Returns:
+            Validation context with normalized requirements and keywords
+        """
+        requirements: List[Dict[str, Any]] = []
+        for fr in analysis.get("functional_requirements") or ():
+            fr_name = fr.get("name", "").strip()
+            requirements.append({
+                "id": str(fr.get("id", "")).strip(),
+                "name": fr_name,
+                "keywords": [w for w in fr_name.lower().split() if len(w) > 3]
+            })
+        return {"requirements": requirements}
+
+    def _analysis_cache_key(self, document_content: str) -> str:
+        """Build the analysis cache key for a document.
+        
+        The key covers the document, the analyst model and its prompt, so a
+        model or prompt change does not reuse stale analyses.
+        """
+        return ContentCache.key_for_payload({
+            "document": ContentCache.key_for_text(document_content),
+            "model": self.analyst.model,
+            "prompt": ContentCache.key_for_text(self.analyst._get_system_prompt())
+        })
+    
+    def _wbs_cache_key(self, analysis: Dict[str, Any]) -> str:
+        """Build the WBS cache key for an analysis.
+        
+        The key covers the analysis, the planner model and its skeleton
+        prompt, so persisted drafts are not reused after either changes.
+        """
+        return ContentCache.key_for_payload({
+            "model": self.planner.model,
+            "prompt": ContentCache.key_for_text(self.planner._build_skeleton_system_prompt()),
+            "analysis": analysis
+        })
+    
+    def _stage_failure(self, stage: str, stage_result: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+        """Log a failed pipeline stage and build the failure result.
+        
+        Args:
+            stage: Stage key from _STAGE_FAILURES
+            stage_result: Result returned by the failing agent
+            **extra: Additional fields for the failure result
+            
+        Returns:
+            Failure result dictionary
+        """
+        agent_attr, log_agent, action, label, default_error = self._STAGE_FAILURES[stage]
+        error = stage_result.get("error", default_error)
+        self.event_logger.log_agent_error(getattr(self, agent_attr).name, error)
+        self._log_conversation(log_agent, action, {"error": error})
+        return {
+            "success": False,
+            "error": f"{label} failed: {error}",
+            "stage": stage,
+            **extra
+        }
+
     def _check_requirements_coverage(self, analysis: Dict[str, Any],
-                                      wbs: Dict[str, Any]) -> Dict[str, Any]:
+                                      wbs: Dict[str, Any],
+                                      validation_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Check that all functional requirements are covered by explicit traceability.
         
         Args:
             analysis: Analysis result from Analyst Agent
             wbs: WBS result from Planner Agent
+            validation_context: Precomputed context from _precompute_validation_context
             
         Returns:
             Coverage report dictionary
         """
-        fr_list = analysis.get("functional_requirements", [])
+        if validation_context is None:
+            validation_context = self._precompute_validation_context(analysis)
+        fr_list = validation_context["requirements"]
         if not fr_list:
             return {
                 "total": 0,
@@ -153,9 +326,9 @@ class AgentOrchestrator:
         all_wbs_names: List[str] = []
         requirement_map: Dict[str, Dict[str, Any]] = {}
 
-        for phase in wbs.get("wbs", {}).get("phases", []):
+        for phase in (wbs.get("wbs") or {}).get("phases") or ():
             phase_name = str(phase.get("name", "")).strip()
-            for wp in phase.get("work_packages", []):
+            for wp in phase.get("work_packages") or ():
                 wp_id = str(wp.get("id", "")).strip()
                 wp_name = str(wp.get("name", "")).strip()
                 if wp_name:
@@ -163,7 +336,7 @@ class AgentOrchestrator:
 
                 wp_requirement_ids = {
                     str(req_id).strip()
-                    for req_id in wp.get("requirement_ids", []) or []
+                    for req_id in wp.get("requirement_ids") or ()
                     if str(req_id).strip()
                 }
                 for requirement_id in wp_requirement_ids:
@@ -177,7 +350,7 @@ class AgentOrchestrator:
                         "phase": phase_name
                     })
 
-                for task in wp.get("tasks", []):
+                for task in wp.get("tasks") or ():
                     task_id = str(task.get("id", "")).strip()
                     task_name = str(task.get("name", "")).strip()
                     if task_name:
@@ -211,10 +384,9 @@ class AgentOrchestrator:
         coverage_matrix = []
 
         for fr in fr_list:
-            requirement_id = str(fr.get("id", "")).strip()
-            fr_name = fr.get("name", "").strip()
-            fr_name_lower = fr_name.lower()
-            keywords = [w for w in fr_name_lower.split() if len(w) > 3]
+            requirement_id = fr["id"]
+            fr_name = fr["name"]
+            keywords = fr["keywords"]
 
             traceability = requirement_map.get(
                 requirement_id,
@@ -310,32 +482,76 @@ class AgentOrchestrator:
 
         return " ".join(feedback_parts)
     
+    def _speculative_refine_wbs(self, wbs: Dict[str, Any], feedback: str) -> Dict[str, Any]:
+        """Refine the WBS with two redundant requests and keep the first valid result.
+        
+        Both requests run in parallel with slightly different feedback, which
+        hides the long tail of a single slow or failed LLM call. The request
+        that finishes later is not awaited.
+        
+        Args:
+            wbs: Current WBS
+            feedback: Refinement feedback
+            
+        Returns:
+            Refinement result in the planner.refine_wbs format, with the
+            validation attached when a variant passed it
+        """
+        variants = [feedback, feedback + self.SPECULATIVE_FEEDBACK_SUFFIX]
+        executor = get_orchestrator_pool()
+        futures = [executor.submit(self.planner.refine_wbs, wbs, variant) for variant in variants]
+        fallback: Optional[Dict[str, Any]] = None
+        try:
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning("Speculative refinement request failed: %s", e)
+                    result = {"success": False, "error": str(e)}
+                
+                if result.get("success"):
+                    validation = self.planner.validate_wbs(result["wbs"], fail_fast=True)
+                    if validation["valid"]:
+                        return {**result, "validation": validation}
+                if fallback is None or (result.get("success") and not fallback.get("success")):
+                    fallback = result
+        finally:
+            for future in futures:
+                future.cancel()
+        
+        return fallback
+    
     def generate_wbs(self, document_content: str,
                      max_iterations: int = 2,
-                     stabilization_mode: str = None) -> Dict[str, Any]:
+                     stabilization_mode: str = None,
+                     analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate WBS using the multi-agent system.
         
         Args:
             document_content: Content of the technical specification
             max_iterations: Maximum number of refinement iterations
             stabilization_mode: Override default stabilization mode
+            analysis: Previously produced Analyst output; when given, the
+                analysis stage is skipped and planning starts immediately
             
         Returns:
             Final WBS result
         """
         mode = stabilization_mode or self.stabilization_mode
         
-        logger.info("\n" + "="*70)
-        logger.info("🚀 ЗАПУСК МУЛЬТИ-АГЕНТНОЙ СИСТЕМЫ ГЕНЕРАЦИИ WBS")
-        logger.info(f"   Режим стабилизации: {mode}")
-        logger.info("="*70)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", _BANNER)
+            logger.info("🚀 ЗАПУСК МУЛЬТИ-АГЕНТНОЙ СИСТЕМЫ ГЕНЕРАЦИИ WBS")
+            logger.info("   Режим стабилизации: %s", mode)
+            logger.info(_BANNER)
         
         if self._progress:
             self._progress.stage("🚀 Запуск мульти-агентной системы генерации WBS")
             self._progress.info(f"Режим стабилизации: {mode}")
         
-        start_time = time.time()
-        self.conversation_log = []
+        start_time = time.perf_counter()
+        self._reset_conversation_log()
+        self.message_bus.clear()
         
         # Reset agent conversations
         self.analyst.reset_conversation()
@@ -343,13 +559,65 @@ class AgentOrchestrator:
         
         if mode == StabilizationMode.ENSEMBLE or mode == StabilizationMode.ENSEMBLE_VALIDATE:
             # Use ensemble approach
-            return self._generate_with_ensemble(document_content, max_iterations, mode, start_time)
+            return self._generate_with_ensemble(document_content, max_iterations, mode, start_time, analysis)
         else:
             # Single pass
-            return self._generate_single(document_content, max_iterations, mode, start_time)
+            return self._generate_single(document_content, max_iterations, mode, start_time, analysis)
+    
+    def generate_wbs_batch(self, documents: List[str],
+                           max_iterations: int = 2,
+                           stabilization_mode: str = None,
+                           max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Generate WBS for several documents concurrently.
+        
+        Each document runs on its own orchestrator so the analyst, planner and
+        validator stages of different documents interleave on the worker pool
+        instead of waiting behind the slowest document.
+        
+        Args:
+            documents: Technical specification contents
+            max_iterations: Maximum number of refinement iterations
+            stabilization_mode: Override default stabilization mode
+            max_concurrency: Maximum documents processed at once
+                (defaults to Config.LLM_MAX_PARALLEL_REQUESTS)
+            
+        Returns:
+            Results in the same order as documents
+        """
+        if not documents:
+            return []
+        
+        mode = stabilization_mode or self.stabilization_mode
+        workers = min(len(documents), max(1, max_concurrency or Config.LLM_MAX_PARALLEL_REQUESTS))
+        results: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+        
+        def run_document(document_content: str) -> Dict[str, Any]:
+            orchestrator = AgentOrchestrator(
+                stabilization_mode=mode,
+                estimation_rules_path=self._estimation_rules_path,
+                enable_speculation=self.enable_speculation
+            )
+            return orchestrator.generate_wbs(document_content, max_iterations, mode)
+        
+        logger.info("📦 Пакетная генерация WBS: %s документов, параллельно: %s", len(documents), workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_index = {
+                executor.submit(run_document, document_content): index
+                for index, document_content in enumerate(documents)
+            }
+            for future in as_completed(future_to_index):
+                index = future_to_index[future]
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    logger.error("Batch document %s failed: %s", index, e)
+                    results[index] = {"success": False, "error": str(e), "stage": "batch"}
+        
+        return results
     
     def _generate_single(self, document_content: str, max_iterations: int,
-                         mode: str, start_time: float) -> Dict[str, Any]:
+                         mode: str, start_time: float,
+                         analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate WBS in single pass mode."""
         
         # ============================================================
@@ -358,43 +626,65 @@ class AgentOrchestrator:
         if self._progress:
             self._progress.stage("📋 Этап 1/6: Анализ технического задания")
         
-        self.event_logger.log_agent_started(
-            self.analyst.name, 
-            "Анализ технического задания и извлечение требований"
-        )
-        
-        self._log_conversation("Orchestrator", "delegate_to_analyst", {
-            "document_length": len(document_content),
-            "target_agent": self.analyst.name
-        })
-        
-        analysis_result = self.analyst.analyze_specification(document_content)
-        
-        if not analysis_result.get("success"):
-            error = analysis_result.get("error", "Analysis failed")
-            self.event_logger.log_agent_error(self.analyst.name, error)
-            self._log_conversation("Orchestrator", "analyst_failed", {"error": error})
-            return {
-                "success": False,
-                "error": f"Analyst Agent failed: {error}",
-                "stage": "analysis"
-            }
-        
-        analysis = analysis_result["analysis"]
-        analysis_pipeline_metadata = analysis_result.get("metadata", {})
-        
-        # Log analyst completion
-        self.event_logger.log_agent_completed(
-            self.analyst.name,
-            f"Извлечено {len(analysis.get('functional_requirements', []))} функциональных требований, "
-            f"{len(analysis.get('risks', []))} рисков"
-        )
-        
-        self._log_conversation("Analyst", "analysis_complete", {
-            "requirements_count": len(analysis.get("functional_requirements", [])),
-            "risks_count": len(analysis.get("risks", [])),
-            "clarifications_needed": len(analysis.get("clarifications_needed", []))
-        })
+        analysis_source = "provided" if analysis is not None else "analyst"
+        if analysis is None:
+            document_key = self._analysis_cache_key(document_content)
+            analysis = get_analysis_cache().get(document_key)
+            if analysis is not None:
+                analysis_source = "cache"
+        
+        analysis_provided = analysis is not None
+        if analysis_provided:
+            # Fast path: the caller already has a structured analysis, or the
+            # same document was analyzed recently
+            analysis_pipeline_metadata = {"mode": analysis_source}
+            if self._progress:
+                self._progress.info("⏩ Используется готовый анализ, этап анализа пропущен")
+        else:
+            self.event_logger.log_agent_started(
+                self.analyst.name, 
+                "Анализ технического задания и извлечение требований"
+            )
+            
+            self._log_conversation("Orchestrator", "delegate_to_analyst", {
+                "document_length": len(document_content),
+                "target_agent": self.analyst.name
+            })
+            
+            analysis_result = self.message_bus.request("Orchestrator", self.analyst.name, document_content)
+            
+            if not analysis_result.get("success"):
+                return self._stage_failure("analysis", analysis_result)
+            
+            analysis = analysis_result["analysis"]
+            analysis_pipeline_metadata = analysis_result.get("metadata", {})
+            get_analysis_cache().put(document_key, analysis)
+        
+        # Values reused by the logs and the result metadata below
+        analysis_project_info = analysis.get("project_info") or {}
+        functional_requirements_count = len(analysis.get("functional_requirements") or ())
+        non_functional_requirements_count = len(analysis.get("non_functional_requirements") or ())
+        risks_count = len(analysis.get("risks") or ())
+        clarifications = analysis.get("clarifications_needed") or []
+        
+        if analysis_provided:
+            self._log_conversation("Orchestrator", "analyst_fast_path", {
+                "source": analysis_source,
+                "requirements_count": functional_requirements_count
+            })
+        else:
+            # Log analyst completion
+            self.event_logger.log_agent_completed(
+                self.analyst.name,
+                lambda: (f"Извлечено {functional_requirements_count} функциональных требований, "
+                         f"{risks_count} рисков")
+            )
+            
+            self._log_conversation("Analyst", "analysis_complete", {
+                "requirements_count": functional_requirements_count,
+                "risks_count": risks_count,
+                "clarifications_needed": len(clarifications)
+            })
         
         # ============================================================
         # STEP 2: Check if clarifications are needed
@@ -402,12 +692,12 @@ class AgentOrchestrator:
         if self._progress:
             self._progress.stage("🔍 Этап 2/6: Проверка необходимости уточнений")
         
-        clarifications = analysis.get("clarifications_needed", [])
-        if clarifications and len(clarifications) > 0:
-            logger.info(f"\n📝 Требуются уточнения ({len(clarifications)} вопросов):")
-            for i, q in enumerate(clarifications, 1):
-                logger.info(f"   {i}. {q}")
-            logger.info("   Продолжаем с предположениями...")
+        if clarifications:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("\n📝 Требуются уточнения (%s вопросов):", len(clarifications))
+                for i, q in enumerate(clarifications, 1):
+                    logger.info("   %s. %s", i, q)
+                logger.info("   Продолжаем с предположениями...")
             self._log_conversation("Orchestrator", "clarifications_needed", {
                 "questions": clarifications
             })
@@ -421,8 +711,8 @@ class AgentOrchestrator:
         self.event_logger.log_agent_handoff(
             from_agent=self.analyst.name,
             to_agent=self.planner.name,
-            data_description=f"Структурированный анализ: {len(analysis.get('functional_requirements', []))} требований, "
-                           f"тип проекта: {analysis.get('project_info', {}).get('project_type', 'не указан')}"
+            data_description=lambda: (f"Структурированный анализ: {functional_requirements_count} требований, "
+                                      f"тип проекта: {analysis_project_info.get('project_type', 'не указан')}")
         )
         
         self.event_logger.log_agent_started(
@@ -436,29 +726,42 @@ class AgentOrchestrator:
             "analysis_ready": True
         })
         
-        wbs_result = self.planner.create_wbs(analysis)
+        # Draft the WBS and prepare the validation context concurrently so
+        # coverage checks are ready as soon as the Planner returns.
+        stage_results: Dict[str, Any] = {}
+        wbs_key = self._wbs_cache_key(analysis)
+        cached_wbs = get_wbs_cache().get(wbs_key)
+        if cached_wbs is not None:
+            logger.info("♻️ WBS для этого анализа найден в кэше, планирование пропущено")
+            stage_results["wbs"] = {"success": True, "wbs": cached_wbs, "metadata": {"mode": "cache"}}
+            stage_results["validation_context"] = self._precompute_validation_context(analysis)
+        else:
+            executor = get_orchestrator_pool()
+            future_to_stage = {
+                executor.submit(self.message_bus.request, "Orchestrator", self.planner.name, analysis): "wbs",
+                executor.submit(self._precompute_validation_context, analysis): "validation_context"
+            }
+            for future in as_completed(future_to_stage):
+                stage_results[future_to_stage[future]] = future.result()
+            if stage_results["wbs"].get("success"):
+                get_wbs_cache().put(wbs_key, stage_results["wbs"]["wbs"])
+        
+        wbs_result = stage_results["wbs"]
+        validation_context = stage_results["validation_context"]
         
         if not wbs_result.get("success"):
-            error = wbs_result.get("error", "WBS creation failed")
-            self.event_logger.log_agent_error(self.planner.name, error)
-            self._log_conversation("Planner", "wbs_creation_failed", {"error": error})
-            return {
-                "success": False,
-                "error": f"Planner Agent failed: {error}",
-                "stage": "planning",
-                "analysis": analysis
-            }
+            return self._stage_failure("planning", wbs_result, analysis=analysis)
         
         wbs = wbs_result["wbs"]
         planning_pipeline_metadata = wbs_result.get("metadata", {})
         
         # Log planner completion
-        phases_count = len(wbs.get("wbs", {}).get("phases", []))
-        total_hours = wbs.get("project_info", {}).get("total_estimated_hours", 0)
+        phases_count = len((wbs.get("wbs") or {}).get("phases") or ())
+        total_hours = (wbs.get("project_info") or {}).get("total_estimated_hours", 0)
         
         self.event_logger.log_agent_completed(
             self.planner.name,
-            f"Создано {phases_count} фаз, общая оценка: {total_hours} часов"
+            lambda: f"Создано {phases_count} фаз, общая оценка: {total_hours} часов"
         )
         
         self._log_conversation("Planner", "wbs_complete", {
@@ -476,27 +779,30 @@ class AgentOrchestrator:
         
         iteration = 0
         while not validation["valid"] and iteration < max_iterations:
-            logger.info(f"\n🔄 Итерация уточнения {iteration + 1}/{max_iterations}")
-            logger.info(f"   Проблемы: {validation['issues']}")
+            logger.info("\n🔄 Итерация уточнения %s/%s", iteration + 1, max_iterations)
+            logger.info("   Проблемы: %s", validation["issues"])
             
             self._log_conversation("Orchestrator", "validation_issues", {
                 "issues": validation["issues"],
                 "iteration": iteration + 1
             })
             
-            # Request refinement
-            feedback = f"Пожалуйста, исправь следующие проблемы: {', '.join(validation['issues'])}"
-            
             self.event_logger.log_agent_started(
                 self.planner.name,
-                f"Уточнение WBS (итерация {iteration + 1})"
+                lambda: f"Уточнение WBS (итерация {iteration + 1})"
             )
             
-            wbs_result = self.planner.refine_wbs(wbs, feedback)
+            # Refine and re-validate in one planner dispatch
+            refinement = self.planner.validate_and_refine(
+                wbs,
+                validation=validation,
+                refine_func=self._speculative_refine_wbs if self.enable_speculation else None,
+                revalidate=iteration + 1 < max_iterations
+            )
             
-            if wbs_result.get("success"):
-                wbs = wbs_result["wbs"]
-                validation = self.planner.validate_wbs(wbs)
+            if refinement["refined"]:
+                wbs = refinement["wbs"]
+                validation = refinement
                 
                 self.event_logger.log_agent_completed(
                     self.planner.name,
@@ -511,12 +817,13 @@ class AgentOrchestrator:
         if self._progress:
             self._progress.stage("📋 Этап 5/6: Проверка покрытия требований")
         
-        coverage_result = self._check_requirements_coverage(analysis, wbs)
+        coverage_result = self._check_requirements_coverage(analysis, wbs, validation_context)
         quality_refinement_iterations = 0
         if coverage_result["uncovered"]:
-            logger.info(f"\n📋 Непокрытые требования: {len(coverage_result['uncovered'])}")
-            for fr in coverage_result["uncovered"]:
-                logger.info(f"   - {fr}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("\n📋 Непокрытые требования: %s", len(coverage_result["uncovered"]))
+                for fr in coverage_result["uncovered"]:
+                    logger.info("   - %s", fr)
             if self._progress:
                 self._progress.info(
                     f"⚠️ Непокрытые требования: {len(coverage_result['uncovered'])} из {coverage_result['total']}"
@@ -544,10 +851,10 @@ class AgentOrchestrator:
                 wbs_result = self.planner.refine_wbs(wbs, feedback)
                 if wbs_result.get("success"):
                     wbs = wbs_result["wbs"]
-                    coverage_result = self._check_requirements_coverage(analysis, wbs)
+                    coverage_result = self._check_requirements_coverage(analysis, wbs, validation_context)
                     self.event_logger.log_agent_completed(
                         self.planner.name,
-                        f"WBS дополнен задачами для {len(coverage_result['uncovered'])} требований"
+                        lambda: f"WBS дополнен задачами для {len(coverage_result['uncovered'])} требований"
                     )
         else:
             logger.info("✅ Все функциональные требования покрыты в WBS")
@@ -572,7 +879,7 @@ class AgentOrchestrator:
             self._progress.stage("✅ Этап 6/6: Финальная валидация и нормализация")
         
         validation_result = None
-        settings = self.estimation_rules.rules.get("stabilization_settings", {})
+        settings = self._stabilization_settings
         min_confidence_score = Config.get_stabilization_config().get(
             "min_confidence_score",
             settings.get("min_confidence_score", 0.7)
@@ -592,6 +899,9 @@ class AgentOrchestrator:
                 "confidence_score": validation_result.confidence_score
             })
             
+            # Quality-gate refinements sit on the critical path as well, so they
+            # race redundant requests the same way the structural loop does.
+            quality_refine = self._speculative_refine_wbs if self.enable_speculation else self.planner.refine_wbs
             while quality_refinement_iterations < max_iterations:
                 needs_quality_refinement = (
                     bool(coverage_result["uncovered"]) or
@@ -626,10 +936,10 @@ class AgentOrchestrator:
 
                 self.event_logger.log_agent_started(
                     self.planner.name,
-                    f"Качественное уточнение WBS (итерация {quality_refinement_iterations})"
+                    lambda: f"Качественное уточнение WBS (итерация {quality_refinement_iterations})"
                 )
 
-                wbs_result = self.planner.refine_wbs(wbs, feedback)
+                wbs_result = quality_refine(wbs, feedback)
                 if not wbs_result.get("success"):
                     error = wbs_result.get("error", "Quality refinement failed")
                     self.event_logger.log_agent_error(self.planner.name, error)
@@ -640,11 +950,11 @@ class AgentOrchestrator:
                     break
 
                 wbs = wbs_result["wbs"]
-                coverage_result = self._check_requirements_coverage(analysis, wbs)
+                coverage_result = self._check_requirements_coverage(analysis, wbs, validation_context)
                 validation_result = self.validator.validate_wbs(wbs)
                 self.event_logger.log_agent_completed(
                     self.planner.name,
-                    f"Качественное уточнение выполнено (итерация {quality_refinement_iterations})"
+                    lambda: f"Качественное уточнение выполнено (итерация {quality_refinement_iterations})"
                 )
                 self._log_conversation("Planner", "quality_refinement_complete", {
                     "quality_iteration": quality_refinement_iterations,
@@ -662,9 +972,13 @@ class AgentOrchestrator:
 
             # Normalize if auto_normalize is enabled
             if settings.get("auto_normalize", True):
-                wbs = self.validator.normalize_wbs(wbs)
-                coverage_result = self._check_requirements_coverage(analysis, wbs)
-                validation_result = self.validator.validate_wbs(wbs)
+                normalized_wbs = self.validator.normalize_wbs(wbs)
+                # Coverage and validation are pure functions of the WBS, so the
+                # current results still hold when normalization changed nothing
+                if normalized_wbs != wbs:
+                    coverage_result = self._check_requirements_coverage(analysis, normalized_wbs, validation_context)
+                    validation_result = self.validator.validate_wbs(normalized_wbs)
+                wbs = normalized_wbs
                 self._log_conversation("Validator", "wbs_normalized", {
                     "corrections": len(validation_result.corrections),
                     "confidence_score": validation_result.confidence_score
@@ -680,9 +994,9 @@ class AgentOrchestrator:
                         })
                         logger.info("✅ LLM-валидация WBS завершена успешно")
                     else:
-                        logger.warning(f"⚠️ LLM-валидация не удалась: {llm_validation.get('error')}")
+                        logger.warning("⚠️ LLM-валидация не удалась: %s", llm_validation.get("error"))
                 except Exception as e:
-                    logger.warning(f"⚠️ LLM-валидация пропущена из-за ошибки: {e}")
+                    logger.warning("⚠️ LLM-валидация пропущена из-за ошибки: %s", e)
             else:
                 logger.info("ℹ️ LLM-валидация отключена текущим профилем модели")
 
@@ -700,10 +1014,10 @@ class AgentOrchestrator:
             
             self.event_logger.log_agent_completed(
                 self.validator.name,
-                f"Валидация завершена. Confidence: {validation_result.confidence_score:.2f}"
+                lambda: f"Валидация завершена. Confidence: {validation_result.confidence_score:.2f}"
             )
         
-        elapsed_time = time.time() - start_time
+        elapsed_time = time.perf_counter() - start_time
         token_usage = self._progress.get_usage_summary() if self._progress else {
             "totals": {
                 "prompt_tokens": 0,
@@ -717,20 +1031,22 @@ class AgentOrchestrator:
         # ============================================================
         # FINAL: Build result
         # ============================================================
-        logger.info("\n" + "="*70)
-        logger.info("🏁 МУЛЬТИ-АГЕНТНАЯ ГЕНЕРАЦИЯ ЗАВЕРШЕНА")
-        logger.info(f"   Общее время: {elapsed_time:.2f} сек")
-        logger.info(f"   Итерации: {iteration + 1}")
-        logger.info(f"   Quality refinement iterations: {quality_refinement_iterations}")
-        logger.info(f"   Фаз в WBS: {len(wbs.get('wbs', {}).get('phases', []))}")
-        if validation_result:
-            logger.info(f"   Confidence: {validation_result.confidence_score:.2f}")
-        logger.info(f"   Покрытие FR: {coverage_result['covered_count']}/{coverage_result['total']}")
-        logger.info("="*70 + "\n")
+        phases_count = len((wbs.get("wbs") or {}).get("phases") or ())
+        total_hours = (wbs.get("project_info") or {}).get("total_estimated_hours", 0)
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", _BANNER)
+            logger.info("🏁 МУЛЬТИ-АГЕНТНАЯ ГЕНЕРАЦИЯ ЗАВЕРШЕНА")
+            logger.info("   Общее время: %.2f сек", elapsed_time)
+            logger.info("   Итерации: %s", iteration + 1)
+            logger.info("   Quality refinement iterations: %s", quality_refinement_iterations)
+            logger.info("   Фаз в WBS: %s", phases_count)
+            if validation_result:
+                logger.info("   Confidence: %.2f", validation_result.confidence_score)
+            logger.info("   Покрытие FR: %s/%s", coverage_result["covered_count"], coverage_result["total"])
+            logger.info("%s\n", _BANNER)
         
         if self._progress:
-            phases_count = len(wbs.get('wbs', {}).get('phases', []))
-            total_hours = wbs.get('project_info', {}).get('total_estimated_hours', 0)
             self._progress.info(
                 f"🏁 Генерация завершена за {elapsed_time:.1f} сек. "
                 f"Фаз: {phases_count}, оценка: {total_hours} ч."
@@ -746,15 +1062,15 @@ class AgentOrchestrator:
                 "stabilization_mode": mode,
                 "llm_profile": Config.LLM_PROFILE,
                 "analysis_summary": {
-                    "project_name": analysis.get("project_info", {}).get("project_name", ""),
-                    "complexity": analysis.get("project_info", {}).get("complexity_level", ""),
-                    "functional_requirements": len(analysis.get("functional_requirements", [])),
-                    "non_functional_requirements": len(analysis.get("non_functional_requirements", [])),
-                    "risks_identified": len(analysis.get("risks", []))
+                    "project_name": analysis_project_info.get("project_name", ""),
+                    "complexity": analysis_project_info.get("complexity_level", ""),
+                    "functional_requirements": functional_requirements_count,
+                    "non_functional_requirements": non_functional_requirements_count,
+                    "risks_identified": risks_count
                 },
                 "wbs_summary": {
-                    "phases": len(wbs.get('wbs', {}).get('phases', [])),
-                    "total_hours": wbs.get('project_info', {}).get('total_estimated_hours', 0)
+                    "phases": phases_count,
+                    "total_hours": total_hours
                 },
                 "requirements_coverage": {
                     "total": coverage_result["total"],
@@ -768,9 +1084,10 @@ class AgentOrchestrator:
                 "min_confidence_score": min_confidence_score,
                 "analysis_pipeline": analysis_pipeline_metadata,
                 "planning_pipeline": planning_pipeline_metadata,
+                "message_bus": self.message_bus.get_statistics(),
                 "token_usage": token_usage
             },
-            "agent_conversation": self.conversation_log
+            "agent_conversation": self.get_conversation_log()
         }
         
         if validation_result:
@@ -783,8 +1100,9 @@ class AgentOrchestrator:
             "iterations": iteration + 1,
             "mode": mode
         })
+        result["agent_conversation"] = self.get_conversation_log()
         if self._progress:
-            self._progress.write_json_artifact("agent_conversation.json", self.conversation_log)
+            self._progress.write_text_artifact("agent_conversation.json", self.get_conversation_wire())
             self._progress.record_intermediate(
                 "orchestrator_result",
                 {
@@ -796,9 +1114,30 @@ class AgentOrchestrator:
         
         return result
     
+    def _create_iteration_agents(self) -> Tuple[AnalystAgent, PlannerAgent]:
+        """Create a fresh analyst/planner pair for one independent iteration.
+        
+        Agents keep per-instance conversation history, so every concurrently
+        running iteration needs its own instances. Response sharing is off:
+        iterations send identical requests, and a cached or coalesced reply
+        would turn the ensemble into N copies of one sample.
+        
+        Returns:
+            Tuple of (analyst, planner)
+        """
+        analyst = AnalystAgent()
+        planner = PlannerAgent()
+        analyst.share_responses = False
+        planner.share_responses = False
+        if self._progress:
+            analyst.set_progress_tracker(self._progress, stream_events=False)
+            planner.set_progress_tracker(self._progress, stream_events=False)
+        return analyst, planner
+    
     def _run_single_ensemble_iteration(self, document_content: str, 
                                        max_iterations: int, 
-                                       iteration_num: int) -> Dict[str, Any]:
+                                       iteration_num: int,
+                                       analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Run a single ensemble iteration with fresh agents.
         
         Each iteration creates its own agents to be thread-safe.
@@ -807,27 +1146,26 @@ class AgentOrchestrator:
             document_content: Document to analyze
             max_iterations: Max refinement iterations
             iteration_num: Iteration number for logging
+            analysis: Precomputed analysis that skips the Analyst step
             
         Returns:
             Result dictionary
         """
-        logger.info(f"\n{'='*50}")
-        logger.info(f"📊 ENSEMBLE ITERATION {iteration_num}/{self.ensemble_iterations}")
-        logger.info(f"{'='*50}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", _SECTION_BANNER)
+            logger.info("📊 ENSEMBLE ITERATION %s/%s", iteration_num, self.ensemble_iterations)
+            logger.info(_SECTION_BANNER)
         
         # Create fresh agents for thread safety
-        analyst = AnalystAgent()
-        planner = PlannerAgent()
-        if self._progress:
-            analyst.set_progress_tracker(self._progress, stream_events=False)
-            planner.set_progress_tracker(self._progress, stream_events=False)
+        analyst, planner = self._create_iteration_agents()
         
         # Step 1: Analyst
-        analysis_result = analyst.analyze_specification(document_content)
-        if not analysis_result.get("success"):
-            return analysis_result
-        
-        analysis = analysis_result["analysis"]
+        if analysis is None:
+            analysis_result = analyst.analyze_specification(document_content)
+            if not analysis_result.get("success"):
+                return analysis_result
+            
+            analysis = analysis_result["analysis"]
         
         # Step 2: Planner
         wbs_result = planner.create_wbs(analysis)
@@ -840,22 +1178,28 @@ class AgentOrchestrator:
         validation = planner.validate_wbs(wbs)
         iteration = 0
         while not validation["valid"] and iteration < max_iterations:
-            feedback = f"Fix: {', '.join(validation['issues'])}"
-            wbs_result = planner.refine_wbs(wbs, feedback)
-            if wbs_result.get("success"):
-                wbs = wbs_result["wbs"]
-                validation = planner.validate_wbs(wbs)
+            refinement = planner.validate_and_refine(
+                wbs,
+                validation=validation,
+                feedback_template="Fix: {issues}",
+                revalidate=iteration + 1 < max_iterations
+            )
+            if refinement["refined"]:
+                wbs = refinement["wbs"]
+                validation = refinement
             iteration += 1
 
         if self._progress:
+            phases = (wbs.get("wbs") or {}).get("phases") or ()
+            project_info = wbs.get("project_info") or {}
             self._progress.record_intermediate(
                 "ensemble_iteration_completed",
                 {
                     "iteration_num": iteration_num,
                     "refinement_iterations": iteration,
                     "wbs_summary": {
-                        "phases": len(wbs.get("wbs", {}).get("phases", [])),
-                        "total_hours": wbs.get("project_info", {}).get("total_estimated_hours", 0)
+                        "phases": len(phases),
+                        "total_hours": project_info.get("total_estimated_hours", 0)
                     }
                 }
             )
@@ -863,34 +1207,114 @@ class AgentOrchestrator:
         return {"success": True, "data": wbs}
     
     def _generate_with_ensemble(self, document_content: str, max_iterations: int,
-                                mode: str, start_time: float) -> Dict[str, Any]:
+                                mode: str, start_time: float,
+                                analysis: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Generate WBS with ensemble stabilization using parallel execution."""
         
-        logger.info(f"\n🎭 ENSEMBLE mode: launching {self.ensemble_iterations} parallel iterations")
+        logger.info("\n🎭 ENSEMBLE mode: launching %s parallel iterations", self.ensemble_iterations)
+        
+        if analysis is None and Config.ENSEMBLE_SHARED_ANALYSIS:
+            document_key = self._analysis_cache_key(document_content)
+            analysis = get_analysis_cache().get(document_key)
+            if analysis is not None:
+                self._log_conversation("Orchestrator", "analyst_fast_path", {
+                    "source": "cache",
+                    "requirements_count": len(analysis.get("functional_requirements") or ())
+                })
+        
+        if analysis is None and Config.ENSEMBLE_SHARED_ANALYSIS:
+            # Every iteration would send the analyst the same document, so run
+            # that stage once and let iterations vary only in planning.
+            self._log_conversation("Orchestrator", "delegate_to_analyst", {
+                "document_length": len(document_content),
+                "target_agent": self.analyst.name,
+                "shared_by_iterations": self.ensemble_iterations
+            })
+            analysis_result = self.message_bus.request("Orchestrator", self.analyst.name, document_content)
+            if not analysis_result.get("success"):
+                return self._stage_failure("analysis", analysis_result)
+            analysis = analysis_result["analysis"]
+            get_analysis_cache().put(document_key, analysis)
         
         results = []
+        stabilizer = ResultStabilizer(self.estimation_rules)
+        stabilization_config = Config.get_stabilization_config()
+        early_stop_confidence = stabilization_config.get("early_stop_confidence", 1.0)
+        min_iterations = stabilization_config.get("min_ensemble_iterations", 2)
+        
+        # Without early stop every iteration is needed, so all run at once.
+        # With early stop only min_iterations start; further ones are added
+        # one per completion while the results still disagree, so iterations
+        # that would be thrown away are never sent to the LLM.
+        early_stop_enabled = early_stop_confidence < 1.0
+        initial_batch = (
+            min(self.ensemble_iterations, max(1, min_iterations))
+            if early_stop_enabled else self.ensemble_iterations
+        )
+        # The cap only protects the LLM endpoint
+        max_workers = max(1, min(initial_batch, max(5, Config.LLM_MAX_PARALLEL_REQUESTS)))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending: Dict[Any, int] = {}
+        submitted = 0
+        
+        def submit_next() -> None:
+            nonlocal submitted
+            submitted += 1
+            future = executor.submit(
+                self._run_single_ensemble_iteration,
+                document_content, max_iterations, submitted,
+                clone_payload(analysis) if analysis is not None else None
+            )
+            pending[future] = submitted
         
-        # Run iterations in parallel using ThreadPoolExecutor
-        with ThreadPoolExecutor(max_workers=min(self.ensemble_iterations, 5)) as executor:
-            futures = {
-                executor.submit(
-                    self._run_single_ensemble_iteration, 
-                    document_content, max_iterations, i + 1
-                ): i + 1
-                for i in range(self.ensemble_iterations)
-            }
+        try:
+            for _ in range(initial_batch):
+                submit_next()
             
-            for future in as_completed(futures):
-                iteration_num = futures[future]
-                try:
-                    result = future.result()
-                    if result.get("success"):
-                        results.append(result["data"])
-                        logger.info(f"   ✅ Iteration {iteration_num} completed successfully")
-                    else:
-                        logger.warning(f"   ⚠️ Iteration {iteration_num} failed: {result.get('error')}")
-                except Exception as e:
-                    logger.error(f"   ❌ Iteration {iteration_num} raised exception: {e}")
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    iteration_num = pending.pop(future)
+                    try:
+                        result = future.result()
+                        if result.get("success"):
+                            results.append(result["data"])
+                            logger.info("   ✅ Iteration %s completed successfully", iteration_num)
+                        else:
+                            logger.warning("   ⚠️ Iteration %s failed: %s", iteration_num, result.get("error"))
+                    except Exception as e:
+                        logger.error("   ❌ Iteration %s raised exception: %s", iteration_num, e)
+                
+                if (
+                    early_stop_enabled
+                    and len(results) >= min_iterations
+                    and len(results) < self.ensemble_iterations
+                ):
+                    agreement = stabilizer.partial_confidence(results)
+                    if agreement >= early_stop_confidence:
+                        logger.info(
+                            "   ⏹️ Early stop: %s results agree (%.2f >= %.2f)",
+                            len(results), agreement, early_stop_confidence
+                        )
+                        self._log_conversation("Orchestrator", "ensemble_early_stop", {
+                            "completed_iterations": len(results),
+                            "skipped_iterations": self.ensemble_iterations - submitted,
+                            "agreement": round(agreement, 3)
+                        })
+                        break
+                
+                # Until min_iterations results are in, only replace failed
+                # iterations; after that each finished iteration that still
+                # leaves the results disagreeing is followed by one more
+                if len(results) >= min_iterations:
+                    backlog = len(done)
+                else:
+                    backlog = min_iterations - len(results) - len(pending)
+                for _ in range(min(backlog, self.ensemble_iterations - submitted)):
+                    submit_next()
+        finally:
+            # Iterations still running after an early stop finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
         
         if not results:
             return {
@@ -901,11 +1325,11 @@ class AgentOrchestrator:
         # ============================================================
         # Stabilize results
         # ============================================================
-        logger.info(f"\n{'='*50}")
-        logger.info("🔧 СТАБИЛИЗАЦИЯ РЕЗУЛЬТАТОВ")
-        logger.info(f"{'='*50}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", _SECTION_BANNER)
+            logger.info("🔧 СТАБИЛИЗАЦИЯ РЕЗУЛЬТАТОВ")
+            logger.info(_SECTION_BANNER)
         
-        stabilizer = ResultStabilizer(self.estimation_rules)
         stabilized = stabilizer.stabilize(results)
         
         if not stabilized["success"]:
@@ -916,10 +1340,11 @@ class AgentOrchestrator:
         else:
             final_wbs = stabilized["data"]
             stabilization_metadata = stabilized["metadata"]
-            logger.info(f"   Метод консенсуса: {stabilization_metadata.get('method')}")
-            logger.info(f"   Использовано итераций: {stabilization_metadata.get('used_iterations')}")
-            logger.info(f"   Выбросов удалено: {stabilization_metadata.get('outliers_removed')}")
-            logger.info(f"   Confidence: {stabilization_metadata.get('confidence', 0):.2f}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("   Метод консенсуса: %s", stabilization_metadata.get("method"))
+                logger.info("   Использовано итераций: %s", stabilization_metadata.get("used_iterations"))
+                logger.info("   Выбросов удалено: %s", stabilization_metadata.get("outliers_removed"))
+                logger.info("   Confidence: %.2f", stabilization_metadata.get("confidence", 0))
         
         # ============================================================
         # Final validation (if enabled)
@@ -928,11 +1353,10 @@ class AgentOrchestrator:
         if mode == StabilizationMode.ENSEMBLE_VALIDATE:
             validation_result = self.validator.validate_wbs(final_wbs)
             
-            settings = self.estimation_rules.rules.get("stabilization_settings", {})
-            if settings.get("auto_normalize", True):
+            if self._stabilization_settings.get("auto_normalize", True):
                 final_wbs = self.validator.normalize_wbs(final_wbs)
         
-        elapsed_time = time.time() - start_time
+        elapsed_time = time.perf_counter() - start_time
         token_usage = self._progress.get_usage_summary() if self._progress else {
             "totals": {
                 "prompt_tokens": 0,
@@ -946,14 +1370,18 @@ class AgentOrchestrator:
         # ============================================================
         # Build final result
         # ============================================================
-        logger.info("\n" + "="*70)
-        logger.info("🏁 ENSEMBLE ГЕНЕРАЦИЯ ЗАВЕРШЕНА")
-        logger.info(f"   Общее время: {elapsed_time:.2f} сек")
-        logger.info(f"   Всего итераций: {self.ensemble_iterations}")
-        logger.info(f"   Успешных итераций: {len(results)}")
-        logger.info(f"   Фаз в WBS: {len(final_wbs.get('wbs', {}).get('phases', []))}")
-        logger.info(f"   Общая оценка: {final_wbs.get('project_info', {}).get('total_estimated_hours', 0)} часов")
-        logger.info("="*70 + "\n")
+        phases_count = len((final_wbs.get("wbs") or {}).get("phases") or ())
+        total_hours = (final_wbs.get("project_info") or {}).get("total_estimated_hours", 0)
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n%s", _BANNER)
+            logger.info("🏁 ENSEMBLE ГЕНЕРАЦИЯ ЗАВЕРШЕНА")
+            logger.info("   Общее время: %.2f сек", elapsed_time)
+            logger.info("   Всего итераций: %s", self.ensemble_iterations)
+            logger.info("   Успешных итераций: %s", len(results))
+            logger.info("   Фаз в WBS: %s", phases_count)
+            logger.info("   Общая оценка: %s часов", total_hours)
+            logger.info("%s\n", _BANNER)
         
         result = {
             "success": True,
@@ -968,12 +1396,12 @@ class AgentOrchestrator:
                     **stabilization_metadata
                 },
                 "wbs_summary": {
-                    "phases": len(final_wbs.get('wbs', {}).get('phases', [])),
-                    "total_hours": final_wbs.get('project_info', {}).get('total_estimated_hours', 0)
+                    "phases": phases_count,
+                    "total_hours": total_hours
                 },
                 "token_usage": token_usage
             },
-            "agent_conversation": self.conversation_log
+            "agent_conversation": self.get_conversation_log()
         }
         
         if validation_result:
@@ -982,7 +1410,7 @@ class AgentOrchestrator:
                 self._progress.write_json_artifact("validation_result.json", result["validation"])
 
         if self._progress:
-            self._progress.write_json_artifact("agent_conversation.json", self.conversation_log)
+            self._progress.write_text_artifact("agent_conversation.json", self.get_conversation_wire())
             self._progress.record_intermediate(
                 "orchestrator_result",
                 {
@@ -996,42 +1424,68 @@ class AgentOrchestrator:
     
     def _generate_single_iteration(self, document_content: str, 
                                    max_iterations: int) -> Dict[str, Any]:
-        """Generate a single WBS iteration (for ensemble mode)."""
+        """Generate a single WBS iteration (for ensemble mode).
         
-        # Step 1: Analyst
-        analysis_result = self.analyst.analyze_specification(document_content)
+        Runs on fresh agents, so concurrent calls do not share conversation state.
+        """
+        return self._run_single_ensemble_iteration(document_content, max_iterations, 1)
+    
+    def get_conversation_log(self) -> List[Dict[str, Any]]:
+        """Get the conversation log as a list of dictionaries.
         
-        if not analysis_result.get("success"):
-            return analysis_result
+        Returns:
+            Logged steps in the order they were recorded
+        """
+        return [entry._asdict() for entry in self.conversation_log]
+    
+    def get_conversation_wire(self) -> str:
+        """Get the conversation log as a JSON array.
         
-        analysis = analysis_result["analysis"]
+        Entries are serialized once when logged, so building the payload is
+        a plain string join.
         
-        # Step 2: Planner
-        wbs_result = self.planner.create_wbs(analysis)
+        Returns:
+            JSON array string
+        """
+        return "[" + ",".join(self._conversation_wire) + "]"
+    
+    def iter_conversation_summary(self) -> Iterator[str]:
+        """Iterate over the lines of the agent conversation summary.
         
-        if not wbs_result.get("success"):
-            return wbs_result
+        Formatted lines are cached per entry in a deque bounded like the log
+        itself, so repeated calls only format entries logged since the
+        previous call and evicted entries drop out of the summary too.
+        Callers writing the summary to a file or log can consume lines
+        without building the full string.
         
-        wbs = wbs_result["wbs"]
+        Yields:
+            Human-readable summary lines
+        """
+        if not self.conversation_log:
+            yield "No conversation recorded."
+            return
         
-        # Step 3: Validate and refine
-        validation = self.planner.validate_wbs(wbs)
+        new_entries = min(self._logged_count - self._summarized_count, len(self.conversation_log))
         
-        iteration = 0
-        while not validation["valid"] and iteration < max_iterations:
-            feedback = f"Исправь: {', '.join(validation['issues'])}"
-            wbs_result = self.planner.refine_wbs(wbs, feedback)
+        for entry in islice(self.conversation_log, len(self.conversation_log) - new_entries, None):
+            day_second = int(self._log_t0_day_seconds + entry.t_ns / 1e9) % 86400
+            hours, remainder = divmod(day_second, 3600)
+            minutes, seconds = divmod(remainder, 60)
             
-            if wbs_result.get("success"):
-                wbs = wbs_result["wbs"]
-                validation = self.planner.validate_wbs(wbs)
+            entry_lines = [f"[{hours:02d}:{minutes:02d}:{seconds:02d}] {entry.agent}: {entry.action}"]
             
-            iteration += 1
-        
-        return {
-            "success": True,
-            "data": wbs
-        }
+            if entry.details:
+                for key, value in entry.details.items():
+                    if isinstance(value, (list, dict)):
+                        text = str(value)
+                        value = text[:100] + "..." if len(text) > 100 else text
+                    entry_lines.append(f"    {key}: {value}")
+            self._summary_lines.append(tuple(entry_lines))
+        
+        self._summarized_count = self._logged_count
+        yield "=== Agent Conversation Summary ===\n"
+        for entry_lines in self._summary_lines:
+            yield from entry_lines
     
     def get_conversation_summary(self) -> str:
         """Get a summary of the agent conversation.
@@ -1039,50 +1493,23 @@ class AgentOrchestrator:
         Returns:
             Human-readable conversation summary
         """
-        if not self.conversation_log:
-            return "No conversation recorded."
-        
-        summary_lines = ["=== Agent Conversation Summary ===\n"]
-        
-        for entry in self.conversation_log:
-            timestamp = time.strftime("%H:%M:%S", time.localtime(entry["timestamp"]))
-            agent = entry["agent"]
-            action = entry["action"]
-            
-            summary_lines.append(f"[{timestamp}] {agent}: {action}")
-            
-            if entry["details"]:
-                for key, value in entry["details"].items():
-                    if isinstance(value, (list, dict)):
-                        value = str(value)[:100] + "..." if len(str(value)) > 100 else str(value)
-                    summary_lines.append(f"    {key}: {value}")
-        
-        return "\n".join(summary_lines)
+        return "\n".join(self.iter_conversation_summary())
     
     def get_agent_analytics(self) -> Dict[str, Any]:
         """Get analytics about agent performance.
         
         Returns:
-            Analytics dictionary
+            Analytics dictionary built from counters maintained by _log_conversation
         """
         if not self.conversation_log:
             return {}
         
-        analytics = {
-            "total_steps": len(self.conversation_log),
-            "agents_involved": list(set(e["agent"] for e in self.conversation_log)),
-            "actions_performed": {},
-            "timeline": []
+        return {
+            "total_steps": self._logged_count,
+            "agents_involved": list(self._agents_involved),
+            "actions_performed": dict(self._action_counts),
+            "timeline": [
+                {"agent": entry.agent, "action": entry.action, "timestamp": entry.timestamp}
+                for entry in self.conversation_log
+            ]
         }
-        
-        for entry in self.conversation_log:
-            action = entry["action"]
-            analytics["actions_performed"][action] = \
-                analytics["actions_performed"].get(action, 0) + 1
-            analytics["timeline"].append({
-                "agent": entry["agent"],
-                "action": entry["action"],
-                "timestamp": entry["timestamp"]
-            })
-        
-        return analytics
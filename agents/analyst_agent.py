@@ -5,98 +5,19 @@ Analyzes technical specifications and extracts structured requirements.
 import json
 import logging
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from config import Config
 
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, run_bounded
 
 logger = logging.getLogger(__name__)
 
 
-class AnalystAgent(BaseAgent):
-    """Agent responsible for analyzing technical specifications."""
-
-    MAX_REQUIREMENTS_FOR_SYNTHESIS = 40 if Config.SMALL_LLM_MODE else 60
-    MAX_RISKS_FOR_SYNTHESIS = 12 if Config.SMALL_LLM_MODE else 20
-    MAX_QUESTIONS_FOR_SYNTHESIS = 12 if Config.SMALL_LLM_MODE else 20
-    MAX_FULL_DOCUMENT_CHARS = 40000
-    PLACEHOLDER_TEXTS = {
-        "название проекта",
-        "краткое описание",
-        "тип проекта",
-        "название требования",
-        "описание",
-        "описание риска",
-        "как снизить риск",
-        "интересы и потребности",
-        "текст рекомендации",
-        "проект"
-    }
-
-    def __init__(self):
-        """Initialize the Specification Analyst Agent."""
-        super().__init__(
-            name="Аналитик ТЗ",
-            role="Анализирует техническое задание и извлекает структурированные требования"
-        )
-        self._estimation_rules = self._load_estimation_rules()
-
-    def _load_estimation_rules(self) -> Dict[str, Any]:
-        """Load estimation rules from JSON file."""
-        rules_path = Path(__file__).parent.parent / "data" / "estimation_rules.json"
-        try:
-            with open(rules_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.warning(f"Could not load estimation rules: {e}")
-            return {}
-
-    def _build_project_type_reference(self) -> str:
-        """Build project type and complexity reference for the prompt."""
-        rules = self._estimation_rules
-        if not rules:
-            return ""
-
-        if Config.SMALL_LLM_MODE:
-            baselines = ", ".join(rules.get("project_type_baselines", {}).keys())
-            complexity = ", ".join(rules.get("complexity_multipliers", {}).keys())
-            return (
-                "Типы проектов: " + baselines + "\n"
-                "Уровни сложности: " + complexity
-            )
-
-        lines = ["СПРАВОЧНИК ДЛЯ ОПРЕДЕЛЕНИЯ ТИПА И СЛОЖНОСТИ ПРОЕКТА:"]
-
-        baselines = rules.get("project_type_baselines", {})
-        if baselines:
-            lines.append("Типы проектов и базовые трудозатраты:")
-            for proj_type, info in baselines.items():
-                rng = info.get("range_hours", [0, 0])
-                duration = info.get("typical_duration_weeks", "N/A")
-                lines.append(f"- {proj_type}: {rng[0]}-{rng[1]} ч, длительность {duration} недель")
-
-        multipliers = rules.get("complexity_multipliers", {})
-        if multipliers:
-            lines.append("Уровни сложности:")
-            for level, info in multipliers.items():
-                lines.append(
-                    f"- {level}: множитель x{info.get('multiplier', 1.0)}, "
-                    f"команда до {info.get('max_team_size', 'N/A')} чел, "
-                    f"{info.get('description', '')}"
-                )
-
-        lines.append("Используй project_type из списка выше или ближайший аналог.")
-        lines.append("Используй complexity_level строго из: Низкий, Средний, Высокий, Очень высокий.")
-        return "\n".join(lines)
-
-    def _build_system_prompt(self) -> str:
-        """Build the full synthesis system prompt for the Analyst Agent."""
-        project_ref = self._build_project_type_reference()
-        if Config.SMALL_LLM_MODE:
-            return f"""Ты аналитик ТЗ.
+# Static prompt bodies are built once at import; templates with {project_ref}
+# are rendered per agent on first use.
+_SMALL_SYNTHESIS_PROMPT_TEMPLATE = """Ты аналитик ТЗ.
 
 Верни только JSON.
 Собери итоговую структуру:
@@ -116,7 +37,7 @@ class AnalystAgent(BaseAgent):
 - если данных мало, добавляй вопросы в clarifications_needed
 {project_ref}"""
 
-        return f"""Ты — опытный бизнес-аналитик и системный аналитик.
+_SYNTHESIS_PROMPT_TEMPLATE = """Ты — опытный бизнес-аналитик и системный аналитик.
 
 Твоя задача — собрать ИТОГОВЫЙ структурированный анализ проекта.
 ОТВЕТ ДОЛЖЕН БЫТЬ ТОЛЬКО В ФОРМАТЕ JSON.
@@ -182,10 +103,7 @@ class AnalystAgent(BaseAgent):
 - project_type и estimated_duration определяй по справочнику.
 {project_ref}"""
 
-    def _build_full_document_system_prompt(self) -> str:
-        """Build a legacy-style prompt for full-document recovery analysis."""
-        project_ref = self._build_project_type_reference()
-        return f"""Ты — опытный бизнес-аналитик и системный аналитик.
+_FULL_DOCUMENT_PROMPT_TEMPLATE = """Ты — опытный бизнес-аналитик и системный аналитик.
 
 Твоя задача — анализировать технические задания и извлекать структурированную информацию для планирования проекта.
 ОТВЕТ ДОЛЖЕН БЫТЬ ТОЛЬКО В ФОРМАТЕ JSON.
@@ -245,9 +163,7 @@ class AnalystAgent(BaseAgent):
 - project_type и estimated_duration определяй по справочнику.
 {project_ref}"""
 
-    def _build_chunk_system_prompt(self) -> str:
-        """Build a compact prompt for analyzing a single chunk."""
-        return """Ты — аналитик, который разбирает только один фрагмент технического задания.
+_CHUNK_SYSTEM_PROMPT = """Ты — аналитик, который разбирает только один фрагмент технического задания.
 
 ОТВЕТ ДОЛЖЕН БЫТЬ ТОЛЬКО В ФОРМАТЕ JSON.
 НЕ ВЫВОДИ <think> ИЛИ ЛЮБЫЕ ПРОМЕЖУТОЧНЫЕ РАССУЖДЕНИЯ.
@@ -302,9 +218,7 @@ class AnalystAgent(BaseAgent):
   "clarifications_needed": []
 }"""
 
-    def _build_chunk_rescue_system_prompt(self) -> str:
-        """Build a stricter rescue prompt for chunk extraction retries."""
-        return """Ты извлекаешь факты только из одного фрагмента ТЗ.
+_CHUNK_RESCUE_SYSTEM_PROMPT = """Ты извлекаешь факты только из одного фрагмента ТЗ.
 
 Верни ТОЛЬКО валидный JSON.
 НЕ ВЫВОДИ <think>, markdown, пояснения, шаблоны или сокращения.
@@ -334,6 +248,110 @@ class AnalystAgent(BaseAgent):
   "clarifications_needed": []
 }"""
 
+
+class AnalystAgent(BaseAgent):
+    """Agent responsible for analyzing technical specifications."""
+
+    MAX_REQUIREMENTS_FOR_SYNTHESIS = 40 if Config.SMALL_LLM_MODE else 60
+    MAX_RISKS_FOR_SYNTHESIS = 12 if Config.SMALL_LLM_MODE else 20
+    MAX_QUESTIONS_FOR_SYNTHESIS = 12 if Config.SMALL_LLM_MODE else 20
+    MAX_FULL_DOCUMENT_CHARS = 40000
+    PLACEHOLDER_TEXTS = {
+        "название проекта",
+        "краткое описание",
+        "тип проекта",
+        "название требования",
+        "описание",
+        "описание риска",
+        "как снизить риск",
+        "интересы и потребности",
+        "текст рекомендации",
+        "проект"
+    }
+
+    def __init__(self):
+        """Initialize the Specification Analyst Agent."""
+        super().__init__(
+            name="Аналитик ТЗ",
+            role="Анализирует техническое задание и извлекает структурированные требования"
+        )
+        self._estimation_rules = self._load_estimation_rules()
+        self._prompt_cache: Dict[str, str] = {}
+
+    def _load_estimation_rules(self) -> Dict[str, Any]:
+        """Load estimation rules from JSON file."""
+        rules_path = Path(__file__).parent.parent / "data" / "estimation_rules.json"
+        try:
+            with open(rules_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning("Could not load estimation rules: %s", e)
+            return {}
+
+    def _build_project_type_reference(self) -> str:
+        """Build project type and complexity reference for the prompt."""
+        rules = self._estimation_rules
+        if not rules:
+            return ""
+
+        if Config.SMALL_LLM_MODE:
+            baselines = ", ".join(rules.get("project_type_baselines", {}).keys())
+            complexity = ", ".join(rules.get("complexity_multipliers", {}).keys())
+            return (
+                "Типы проектов: " + baselines + "\n"
+                "Уровни сложности: " + complexity
+            )
+
+        lines = ["СПРАВОЧНИК ДЛЯ ОПРЕДЕЛЕНИЯ ТИПА И СЛОЖНОСТИ ПРОЕКТА:"]
+
+        baselines = rules.get("project_type_baselines", {})
+        if baselines:
+            lines.append("Типы проектов и базовые трудозатраты:")
+            for proj_type, info in baselines.items():
+                rng = info.get("range_hours", [0, 0])
+                duration = info.get("typical_duration_weeks", "N/A")
+                lines.append(f"- {proj_type}: {rng[0]}-{rng[1]} ч, длительность {duration} недель")
+
+        multipliers = rules.get("complexity_multipliers", {})
+        if multipliers:
+            lines.append("Уровни сложности:")
+            for level, info in multipliers.items():
+                lines.append(
+                    f"- {level}: множитель x{info.get('multiplier', 1.0)}, "
+                    f"команда до {info.get('max_team_size', 'N/A')} чел, "
+                    f"{info.get('description', '')}"
+                )
+
+        lines.append("Используй project_type из списка выше или ближайший аналог.")
+        lines.append("Используй complexity_level строго из: Низкий, Средний, Высокий, Очень высокий.")
+        return "\n".join(lines)
+
+    def _render_prompt(self, name: str, template: str) -> str:
+        """Render a prompt template with the project reference once per agent."""
+        prompt = self._prompt_cache.get(name)
+        if prompt is None:
+            prompt = template.format(project_ref=self._build_project_type_reference())
+            self._prompt_cache[name] = prompt
+        return prompt
+
+    def _build_system_prompt(self) -> str:
+        """Build the full synthesis system prompt for the Analyst Agent."""
+        if Config.SMALL_LLM_MODE:
+            return self._render_prompt("synthesis", _SMALL_SYNTHESIS_PROMPT_TEMPLATE)
+        return self._render_prompt("synthesis", _SYNTHESIS_PROMPT_TEMPLATE)
+
+    def _build_full_document_system_prompt(self) -> str:
+        """Build a legacy-style prompt for full-document recovery analysis."""
+        return self._render_prompt("full_document", _FULL_DOCUMENT_PROMPT_TEMPLATE)
+
+    def _build_chunk_system_prompt(self) -> str:
+        """Build a compact prompt for analyzing a single chunk."""
+        return _CHUNK_SYSTEM_PROMPT
+
+    def _build_chunk_rescue_system_prompt(self) -> str:
+        """Build a stricter rescue prompt for chunk extraction retries."""
+        return _CHUNK_RESCUE_SYSTEM_PROMPT
+
     def _build_chunk_rescue_message(self, chunk: Dict[str, str], index: int, total: int) -> str:
         """Build a stricter retry message for chunk extraction."""
         return f"""Повтори разбор фрагмента {index} из {total}.
@@ -992,11 +1010,11 @@ JSON:"""
 
     def analyze_specification(self, document_content: str) -> Dict[str, Any]:
         """Analyze a technical specification document with small parallel calls."""
-        logger.info(f"[{self.name}] Starting specification analysis...")
+        logger.info("[%s] Starting specification analysis...", self.name)
 
         chunks = self._split_document_into_chunks(document_content)
         total_chunks = len(chunks)
-        logger.info(f"[{self.name}] Split specification into {total_chunks} chunks")
+        logger.info("[%s] Split specification into %s chunks", self.name, total_chunks)
         self._record_intermediate(
             "chunks_created",
             {
@@ -1021,28 +1039,24 @@ JSON:"""
         errors: List[str] = []
         max_workers = max(1, min(Config.LLM_MAX_PARALLEL_REQUESTS, total_chunks))
 
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(self._analyze_chunk, chunk, idx, total_chunks): idx
-                for idx, chunk in enumerate(chunks, start=1)
-            }
-            for future in as_completed(futures):
-                idx = futures[future]
-                try:
-                    result = future.result()
-                    if result.get("success"):
-                        partials.append(result["data"])
-                        if result.get("warning"):
-                            errors.append(result["warning"])
-                        if self._progress_tracker:
-                            self._progress_tracker.info(
-                                f"📌 Обработан фрагмент ТЗ {idx}/{total_chunks}"
-                            )
-                    else:
-                        errors.append(f"chunk {idx}: {result.get('error', 'unknown error')}")
-                except Exception as exc:
-                    logger.exception(f"[{self.name}] Chunk {idx} analysis failed: {exc}")
-                    errors.append(f"chunk {idx}: {exc}")
+        chunk_args = [(chunk, idx, total_chunks) for idx, chunk in enumerate(chunks, start=1)]
+        for position, future in run_bounded(self._analyze_chunk, chunk_args, max_workers):
+            idx = position + 1
+            try:
+                result = future.result()
+                if result.get("success"):
+                    partials.append(result["data"])
+                    if result.get("warning"):
+                        errors.append(result["warning"])
+                    if self._progress_tracker:
+                        self._progress_tracker.info(
+                            f"📌 Обработан фрагмент ТЗ {idx}/{total_chunks}"
+                        )
+                else:
+                    errors.append(f"chunk {idx}: {result.get('error', 'unknown error')}")
+            except Exception as exc:
+                logger.exception("[%s] Chunk %s analysis failed: %s", self.name, idx, exc)
+                errors.append(f"chunk {idx}: {exc}")
 
         self._record_intermediate(
             "chunk_results_collected",
@@ -1055,7 +1069,7 @@ JSON:"""
 
         if not partials:
             error_message = "; ".join(errors) or "No chunk analysis results"
-            logger.error(f"[{self.name}] Specification analysis failed: {error_message}")
+            logger.error("[%s] Specification analysis failed: %s", self.name, error_message)
             self._record_intermediate(
                 "analysis_failed",
                 {
@@ -1085,7 +1099,7 @@ JSON:"""
                 "error",
                 "Chunked analysis and full-document fallback produced no meaningful functional requirements"
             )
-            logger.error(f"[{self.name}] Specification analysis failed: {error_message}")
+            logger.error("[%s] Specification analysis failed: %s", self.name, error_message)
             self._record_intermediate(
                 "analysis_failed_after_fallback",
                 {
@@ -1110,7 +1124,7 @@ JSON:"""
             )
 
         if not Config.ENABLE_ANALYSIS_SYNTHESIS_LLM:
-            logger.info(f"[{self.name}] LLM synthesis disabled, using deterministic merge")
+            logger.info("[%s] LLM synthesis disabled, using deterministic merge", self.name)
             fallback_analysis = self._build_fallback_analysis(merged)
             self._record_intermediate(
                 "analysis_completed",
@@ -1136,7 +1150,7 @@ JSON:"""
                 }
             }
 
-        synthesis_payload = json.dumps(merged, ensure_ascii=False, indent=2)
+        synthesis_payload = self._serialize_for_prompt(merged)
         synthesis_message = f"""Собери итоговый анализ проекта по агрегированным данным из нескольких фрагментов ТЗ.
 
 Агрегированные данные:
@@ -1185,7 +1199,7 @@ JSON:"""
                         "synthesis_usage": result.get("usage", {})
                     }
                 }
-            logger.info(f"[{self.name}] Specification analysis completed successfully")
+            logger.info("[%s] Specification analysis completed successfully", self.name)
             self._record_intermediate(
                 "analysis_completed",
                 {
@@ -1250,22 +1264,26 @@ JSON:"""
             for q, a in clarifications.items()
         )
 
-        message = f"""На основе полученных уточнений, обнови анализ проекта.
-
-Исходный анализ:
-{json.dumps(original_analysis, ensure_ascii=False, indent=2)}
+        # Static instructions go first and the analysis-specific payload is a
+        # separate trailing message, so repeated calls share a cacheable prefix.
+        message = (
+            "На основе полученных уточнений, обнови анализ проекта. "
+            "Исходный анализ и уточнения переданы в следующем сообщении. "
+            "Предоставь обновленный анализ в том же JSON формате."
+        )
+        context = f"""Исходный анализ:
+{self._serialize_for_prompt(original_analysis)}
 
 Уточнения:
-{clarification_text}
-
-Предоставь обновленный анализ в том же JSON формате."""
+{clarification_text}"""
 
         result = self.send_message(
             message,
             expect_json=True,
             use_history=False,
             max_tokens=Config.ANALYSIS_SYNTHESIS_MAX_TOKENS,
-            temperature=0.0
+            temperature=0.0,
+            context=context
         )
 
         if result["success"]:
@@ -1,17 +1,156 @@
 """
 Base agent class for the multi-agent system.
 """
+import atexit
 import json
 import logging
+import threading
 import time
-from typing import Dict, Any, Optional, List
-from openai import OpenAI
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, Callable, Iterator, Optional, List, Sequence, Tuple, Union
+from openai import DefaultHttpxClient, OpenAI
 from config import Config
-from json_utils import extract_json_from_response, repair_json_text
+from json_utils import (
+    TopLevelKeyScanner,
+    dumps_compact_json,
+    extract_json_from_response,
+    loads_json,
+    repair_json_text,
+)
 from progress_tracker import ProgressTracker
+from .content_cache import ContentCache, get_response_cache
 
 logger = logging.getLogger(__name__)
 
+# Event text, or a callable producing it only when the event is consumed
+LazyText = Union[str, Callable[[], str]]
+
+# Banner separators for AgentEventLogger
+_SEP_EQ = "=" * 60
+_SEP_DASH = "─" * 60
+_SEP_STAR = "*" * 60
+_SEP_BANG = "!" * 60
+
+_llm_pool: Optional[ThreadPoolExecutor] = None
+_llm_pool_lock = threading.Lock()
+_orchestrator_pool: Optional[ThreadPoolExecutor] = None
+_orchestrator_pool_lock = threading.Lock()
+_http_client: Optional[DefaultHttpxClient] = None
+_http_client_lock = threading.Lock()
+_openai_client: Optional[OpenAI] = None
+# Completions currently in flight, keyed by response cache key
+_inflight_completions: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def get_llm_pool() -> ThreadPoolExecutor:
+    """Get the process-wide worker pool for blocking LLM calls.
+    
+    Agents fan out chunk and task requests onto this pool instead of
+    creating a new executor for every analysis or WBS draft.
+    """
+    global _llm_pool
+    if _llm_pool is None:
+        with _llm_pool_lock:
+            if _llm_pool is None:
+                _llm_pool = ThreadPoolExecutor(
+                    max_workers=Config.LLM_POOL_SIZE,
+                    thread_name_prefix="wbs-llm"
+                )
+                atexit.register(_llm_pool.shutdown, wait=False)
+    return _llm_pool
+
+
+def get_orchestrator_pool() -> ThreadPoolExecutor:
+    """Get the process-wide worker pool for outer, per-document work.
+    
+    Work submitted here (a planner stage, a whole project in a batch) fans
+    its LLM calls out onto the LLM pool and blocks on them, so it must never
+    occupy LLM pool workers itself or the leaf calls could wait forever.
+    """
+    global _orchestrator_pool
+    if _orchestrator_pool is None:
+        with _orchestrator_pool_lock:
+            if _orchestrator_pool is None:
+                _orchestrator_pool = ThreadPoolExecutor(
+                    max_workers=max(4, Config.LLM_MAX_PARALLEL_REQUESTS),
+                    thread_name_prefix="wbs-orch"
+                )
+                atexit.register(_orchestrator_pool.shutdown, wait=False)
+    return _orchestrator_pool
+
+
+def get_http_client() -> DefaultHttpxClient:
+    """Get the process-wide HTTP client shared by all agents' OpenAI clients.
+    
+    Sharing one connection pool lets keep-alive connections opened by one
+    agent be reused by the next, instead of every agent paying its own
+    TCP and TLS handshakes.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = DefaultHttpxClient()
+                atexit.register(_http_client.close)
+    return _http_client
+
+
+def get_openai_client() -> OpenAI:
+    """Get the process-wide OpenAI client used by all agents.
+    
+    The client is stateless between requests and thread-safe, so agents
+    created per analysis reuse it instead of building a new one each time.
+    """
+    global _openai_client
+    if _openai_client is None:
+        http_client = get_http_client()
+        with _http_client_lock:
+            if _openai_client is None:
+                _openai_client = OpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    base_url=Config.OPENAI_API_BASE,
+                    timeout=600.0,  # 10 min timeout per request for local LLM
+                    http_client=http_client
+                )
+    return _openai_client
+
+
+def run_bounded(func: Callable[..., Any], args_list: Sequence[Tuple[Any, ...]],
+                limit: int, pool: Optional[ThreadPoolExecutor] = None) -> Iterator[Tuple[int, Future]]:
+    """Run calls on the shared LLM pool with at most `limit` in flight.
+    
+    Args:
+        func: Callable to run
+        args_list: Positional arguments for each call
+        limit: Maximum number of concurrent calls from this batch
+        pool: Executor to run on instead of the LLM pool; required for calls
+            that themselves fan out onto the LLM pool
+        
+    Yields:
+        Tuples of (index into args_list, completed future) in completion order
+    """
+    if pool is None:
+        pool = get_llm_pool()
+    pending: Dict[Future, int] = {}
+    remaining = iter(enumerate(args_list))
+
+    def submit_next() -> bool:
+        for index, args in remaining:
+            pending[pool.submit(func, *args)] = index
+            return True
+        return False
+
+    for _ in range(max(1, limit)):
+        if not submit_next():
+            break
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            submit_next()
+            yield index, future
+
 
 class AgentEventLogger:
     """Logger for agent events with structured output.
@@ -19,6 +158,8 @@ class AgentEventLogger:
     Optionally emits events to a ProgressTracker for frontend streaming.
     """
     
+    __slots__ = ("_progress",)
+    
     def __init__(self):
         self._progress: Optional[ProgressTracker] = None
     
@@ -26,12 +167,19 @@ class AgentEventLogger:
         """Attach a progress tracker for frontend streaming."""
         self._progress = tracker
     
-    def log_agent_started(self, agent_name: str, task: str):
+    @property
+    def is_active(self) -> bool:
+        """Whether events reach a progress tracker or the INFO log."""
+        return self._progress is not None or logger.isEnabledFor(logging.INFO)
+    
+    def log_agent_started(self, agent_name: str, task: LazyText):
         """Log when an agent starts working on a task."""
-        logger.info(f"\n{'='*60}")
-        logger.info(f"🤖 АГЕНТ НАЧАЛ РАБОТУ: {agent_name}")
-        logger.info(f"📋 Задача: {task}")
-        logger.info(f"{'='*60}")
+        if not self.is_active:
+            return
+        if callable(task):
+            task = task()
+        logger.info("\n%s\n🤖 АГЕНТ НАЧАЛ РАБОТУ: %s\n📋 Задача: %s\n%s",
+                    _SEP_EQ, agent_name, task, _SEP_EQ)
         if self._progress:
             self._progress.agent(agent_name, f"🤖 {agent_name}: {task}")
     
@@ -43,13 +191,13 @@ class AgentEventLogger:
         data: Optional[Dict[str, Any]] = None
     ):
         """Log when an agent sends a request to the LLM."""
-        logger.info(f"\n{'─'*60}")
-        logger.info(f"📤 [{agent_name}] ОТПРАВКА ЗАПРОСА В LLM")
-        if request_id:
-            logger.info(f"   Request ID: {request_id}")
-        logger.info(f"   Сообщение (первые 200 символов):")
-        logger.info(f"   {message_preview[:200]}...")
-        logger.info(f"{'─'*60}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "\n%s\n📤 [%s] ОТПРАВКА ЗАПРОСА В LLM%s\n   Сообщение (первые 200 символов):\n   %s...\n%s",
+                _SEP_DASH, agent_name,
+                f"\n   Request ID: {request_id}" if request_id else "",
+                message_preview[:200], _SEP_DASH
+            )
         if self._progress:
             if hasattr(self._progress, "llm_request"):
                 self._progress.llm_request(
@@ -70,13 +218,13 @@ class AgentEventLogger:
         data: Optional[Dict[str, Any]] = None
     ):
         """Log when an agent receives a response from the LLM."""
-        logger.info(f"\n{'─'*60}")
-        logger.info(f"📥 [{agent_name}] ПОЛУЧЕН ОТВЕТ ОТ LLM")
-        if elapsed_time:
-            logger.info(f"   Время ожидания: {elapsed_time:.2f} сек")
-        logger.info(f"   Ответ (первые 300 символов):")
-        logger.info(f"   {response_preview[:300]}...")
-        logger.info(f"{'─'*60}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "\n%s\n📥 [%s] ПОЛУЧЕН ОТВЕТ ОТ LLM%s\n   Ответ (первые 300 символов):\n   %s...\n%s",
+                _SEP_DASH, agent_name,
+                f"\n   Время ожидания: {elapsed_time:.2f} сек" if elapsed_time else "",
+                response_preview[:300], _SEP_DASH
+            )
         if self._progress:
             payload = {
                 **(data or {}),
@@ -95,32 +243,32 @@ class AgentEventLogger:
                 time_str = f" ({elapsed_time:.1f} сек)" if elapsed_time else ""
                 self._progress.agent(agent_name, f"📥 {agent_name}: ответ получен{time_str}", payload)
     
-    def log_agent_handoff(self, from_agent: str, to_agent: str, data_description: str):
+    def log_agent_handoff(self, from_agent: str, to_agent: str, data_description: LazyText):
         """Log when one agent hands off work to another agent."""
-        logger.info(f"\n{'*'*60}")
-        logger.info(f"🔄 ПЕРЕДАЧА ЗАДАЧИ МЕЖДУ АГЕНТАМИ")
-        logger.info(f"   От: {from_agent}")
-        logger.info(f"   Кому: {to_agent}")
-        logger.info(f"   Передаваемые данные: {data_description}")
-        logger.info(f"{'*'*60}")
+        if not self.is_active:
+            return
+        if callable(data_description):
+            data_description = data_description()
+        logger.info("\n%s\n🔄 ПЕРЕДАЧА ЗАДАЧИ МЕЖДУ АГЕНТАМИ\n   От: %s\n   Кому: %s\n   Передаваемые данные: %s\n%s",
+                    _SEP_STAR, from_agent, to_agent, data_description, _SEP_STAR)
         if self._progress:
             self._progress.agent(to_agent, f"🔄 Передача от {from_agent} → {to_agent}")
     
-    def log_agent_completed(self, agent_name: str, result_summary: str):
+    def log_agent_completed(self, agent_name: str, result_summary: LazyText):
         """Log when an agent completes its task."""
-        logger.info(f"\n{'='*60}")
-        logger.info(f"✅ АГЕНТ ЗАВЕРШИЛ РАБОТУ: {agent_name}")
-        logger.info(f"   Результат: {result_summary}")
-        logger.info(f"{'='*60}\n")
+        if not self.is_active:
+            return
+        if callable(result_summary):
+            result_summary = result_summary()
+        logger.info("\n%s\n✅ АГЕНТ ЗАВЕРШИЛ РАБОТУ: %s\n   Результат: %s\n%s\n",
+                    _SEP_EQ, agent_name, result_summary, _SEP_EQ)
         if self._progress:
             self._progress.agent(agent_name, f"✅ {agent_name}: {result_summary}")
     
     def log_agent_error(self, agent_name: str, error: str):
         """Log when an agent encounters an error."""
-        logger.error(f"\n{'!'*60}")
-        logger.error(f"❌ ОШИБКА АГЕНТА: {agent_name}")
-        logger.error(f"   Ошибка: {error}")
-        logger.error(f"{'!'*60}\n")
+        logger.error("\n%s\n❌ ОШИБКА АГЕНТА: %s\n   Ошибка: %s\n%s\n",
+                     _SEP_BANG, agent_name, error, _SEP_BANG)
         if self._progress:
             self._progress.agent(agent_name, f"❌ {agent_name}: ошибка — {error}")
 
@@ -130,6 +278,9 @@ class BaseAgent:
 
     DEFAULT_TEMPERATURE = 0.1
     DEFAULT_MAX_TOKENS = Config.DEFAULT_LLM_MAX_TOKENS
+    # Whether identical deterministic requests may reuse or join another
+    # caller's completion; agents producing independent samples turn it off
+    share_responses = True
     
     def __init__(self, name: str, role: str):
         """Initialize the base agent.
@@ -140,19 +291,16 @@ class BaseAgent:
         """
         self.name = name
         self.role = role
-        self.client = OpenAI(
-            api_key=Config.OPENAI_API_KEY,
-            base_url=Config.OPENAI_API_BASE,
-            timeout=600.0  # 10 min timeout per request for local LLM
-        )
+        self.client = get_openai_client()
         self.model = Config.OPENAI_MODEL
         self.json_mode = Config.OPENAI_JSON_MODE
         self.conversation_history: List[Dict[str, str]] = []
+        self._system_prompt: Optional[str] = None
         self.event_logger = AgentEventLogger()
         self._progress_tracker: Optional[ProgressTracker] = None
         
-        logger.info(f"🤖 Агент '{name}' инициализирован")
-        logger.info(f"   Роль: {role}")
+        logger.info("🤖 Агент '%s' инициализирован", name)
+        logger.info("   Роль: %s", role)
     
     def set_progress_tracker(self, tracker: Optional[ProgressTracker], stream_events: bool = True):
         """Attach a progress tracker for frontend streaming.
@@ -182,6 +330,36 @@ class BaseAgent:
         """
         raise NotImplementedError("Subclasses must implement _build_system_prompt")
     
+    def _get_system_prompt(self) -> str:
+        """Get the default system prompt, built once per agent.
+        
+        Reusing the same string keeps the leading system message
+        byte-identical across calls, so server-side prompt caching can
+        reuse the prefilled prefix.
+        
+        Returns:
+            System prompt string
+        """
+        prompt = getattr(self, "_system_prompt", None)
+        if prompt is None:
+            prompt = self._system_prompt = self._build_system_prompt()
+        return prompt
+    
+    @staticmethod
+    def _serialize_for_prompt(payload: Any) -> str:
+        """Serialize a prompt payload into byte-stable compact JSON.
+        
+        Sorted keys and fixed separators keep identical payloads identical
+        across calls, so repeated prompts share a cacheable prefix.
+        
+        Args:
+            payload: JSON-serializable data to embed in a prompt
+            
+        Returns:
+            Compact JSON string
+        """
+        return dumps_compact_json(payload)
+    
     def _extract_json_from_response(self, text: str) -> Optional[str]:
         """Extract JSON from response that might contain markdown or other text.
         
@@ -195,11 +373,135 @@ class BaseAgent:
         """
         return extract_json_from_response(text, log_prefix=f"   [{self.name}] ")
     
+    def _on_stream_section(self, key: str):
+        """Handle a top-level JSON section completed while streaming.
+        
+        Args:
+            key: Top-level key whose value has been fully received
+        """
+        logger.debug("   [%s] streamed section complete: %s", self.name, key)
+        if self._progress_tracker:
+            self._progress_tracker.agent(self.name, f"📥 {self.name}: получен раздел {key}")
+    
+    def _request_completion(self, api_params: Dict[str, Any], expect_json: bool):
+        """Run a chat completion, streaming JSON responses when enabled.
+        
+        When streaming, chunks are buffered as they arrive and scanned for
+        completed top-level sections, which are reported via
+        `_on_stream_section` while the rest of the response is still decoding.
+        Plain-text replies are short and have no sections, so they are always
+        requested in one piece.
+        
+        Args:
+            api_params: Chat completion parameters
+            expect_json: Whether the response is expected to be JSON
+            
+        Returns:
+            Tuple of (response text, usage object or None)
+        """
+        if not (Config.LLM_STREAM_RESPONSES and expect_json):
+            response = self.client.chat.completions.create(**api_params)
+            return response.choices[0].message.content, response.usage
+
+        stream = self.client.chat.completions.create(
+            **api_params,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        scanner = TopLevelKeyScanner()
+        buffer = []
+        usage = None
+        for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            buffer.append(delta)
+            for key in scanner.feed(delta):
+                self._on_stream_section(key)
+        return "".join(buffer), usage
+    
+    def _coalesced_completion(self, key: Optional[str], api_params: Dict[str, Any], expect_json: bool):
+        """Run a completion, sharing it with identical requests already in flight.
+        
+        Concurrent callers with the same cache key wait for the first
+        caller's request instead of sending their own. Followers get no
+        usage object, so the tokens are only counted once. Only callers
+        that expect identical output may share a completion; agents with
+        share_responses off (ensemble samples) get no key and always send
+        their own request, even with the response cache disabled.
+        
+        Args:
+            key: Response cache key, or None to always send the request
+            api_params: Chat completion parameters
+            expect_json: Whether the response is expected to be JSON
+            
+        Returns:
+            Tuple of (response text, usage object or None)
+        """
+        if key is None:
+            return self._request_completion(api_params, expect_json)
+        
+        with _inflight_lock:
+            future = _inflight_completions.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = _inflight_completions[key] = Future()
+        
+        if not is_owner:
+            logger.info("   [Joining identical in-flight request]")
+            response_text, _ = future.result()
+            return response_text, None
+        
+        try:
+            result = self._request_completion(api_params, expect_json)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with _inflight_lock:
+                _inflight_completions.pop(key, None)
+    
+    def _response_cache_key(self, api_params: Dict[str, Any], expect_json: bool,
+                            request_id: Optional[str]) -> Optional[str]:
+        """Build the response cache key for a request, or None if uncacheable.
+        
+        Only deterministic JSON requests (temperature 0) are cached. The key
+        also drives in-flight coalescing, so it is only built when the
+        response cache or LLM_COALESCE_REQUESTS is enabled. Agents with
+        share_responses off (ensemble iterations, whose planner calls are
+        temperature 0 too) never get a key, so each of their requests
+        reaches the LLM. Single calls can opt out with a request_id
+        prefixed by "nocache:".
+        
+        Args:
+            api_params: Chat completion parameters
+            expect_json: Whether the response is expected to be JSON
+            request_id: Optional request ID
+            
+        Returns:
+            Cache key or None
+        """
+        if not self.share_responses or not expect_json or api_params["temperature"] != 0:
+            return None
+        if request_id and request_id.startswith("nocache:"):
+            return None
+        if Config.LLM_RESPONSE_CACHE_SIZE <= 0 and not Config.LLM_COALESCE_REQUESTS:
+            return None
+        return ContentCache.key_for_payload(api_params)
+    
     def send_message(self, message: str, expect_json: bool = True,
                      request_id: str = None, use_history: bool = True,
                      max_tokens: Optional[int] = None,
                      temperature: Optional[float] = None,
-                     system_prompt: Optional[str] = None) -> Dict[str, Any]:
+                     system_prompt: Optional[str] = None,
+                     context: Optional[str] = None) -> Dict[str, Any]:
         """Send a message to the agent and get a response.
         
         Args:
@@ -210,11 +512,13 @@ class BaseAgent:
             max_tokens: Optional per-call completion token cap
             temperature: Optional per-call temperature override
             system_prompt: Optional per-call system prompt override
+            context: Optional dynamic payload sent as a separate trailing user
+                message, so the static message stays a cacheable prefix
             
         Returns:
             Response dictionary
         """
-        active_system_prompt = system_prompt or self._build_system_prompt()
+        active_system_prompt = system_prompt or self._get_system_prompt()
 
         # Log LLM request
         self.event_logger.log_llm_request(
@@ -232,21 +536,24 @@ class BaseAgent:
             }
         )
         
-        message_entry = {
+        message_entries = [{
             "role": "user",
             "content": message
-        }
+        }]
+        if context:
+            message_entries.append({
+                "role": "user",
+                "content": context
+            })
 
+        # Built as one list per call: the system prompt can be overridden per
+        # call, and the recorded request must not change as history grows.
+        system_message = {"role": "system", "content": active_system_prompt}
         if use_history:
-            self.conversation_history.append(message_entry)
-            messages = [
-                {"role": "system", "content": active_system_prompt}
-            ] + self.conversation_history
+            self.conversation_history.extend(message_entries)
+            messages = [system_message, *self.conversation_history]
         else:
-            messages = [
-                {"role": "system", "content": active_system_prompt},
-                message_entry
-            ]
+            messages = [system_message, *message_entries]
         
         # Prepare API call parameters
         api_params = {
@@ -258,7 +565,7 @@ class BaseAgent:
         
         if self.json_mode and expect_json:
             api_params["response_format"] = {"type": "json_object"}
-            logger.info(f"   [Using JSON response format]")
+            logger.debug("   [Using JSON response format]")
 
         llm_request_payload = {
             "agent": self.name,
@@ -272,6 +579,8 @@ class BaseAgent:
             "response_format": api_params.get("response_format")
         }
         
+        response_cache_key = self._response_cache_key(api_params, expect_json, request_id)
+
         # Retry with exponential backoff
         max_retries = 3
         base_delay = 2.0  # seconds
@@ -281,27 +590,37 @@ class BaseAgent:
             try:
                 if attempt > 0:
                     delay = base_delay * (2 ** (attempt - 1))
-                    logger.info(f"   [Retry {attempt}/{max_retries - 1}, waiting {delay:.1f}s...]")
+                    logger.info("   [Retry %s/%s, waiting %.1fs...]", attempt, max_retries - 1, delay)
                     time.sleep(delay)
                 
-                start_time = time.time()
-                logger.info(f"   [API call attempt {attempt + 1}/{max_retries}...]")
+                start_time = time.perf_counter()
+                logger.info("   [API call attempt %s/%s...]", attempt + 1, max_retries)
                 
-                response = self.client.chat.completions.create(**api_params)
+                cached_text = (
+                    get_response_cache().get(response_cache_key) if response_cache_key else None
+                )
+                if cached_text is not None:
+                    logger.info("   [Response cache hit]")
+                    response_text, response_usage = cached_text, None
+                else:
+                    response_text, response_usage = self._coalesced_completion(
+                        response_cache_key, api_params, expect_json
+                    )
                 
-                elapsed_time = time.time() - start_time
-                response_text = response.choices[0].message.content
+                elapsed_time = time.perf_counter() - start_time
                 
                 # Log token usage if available
-                if response.usage:
+                if response_usage:
                     usage = {
-                        "prompt_tokens": response.usage.prompt_tokens or 0,
-                        "completion_tokens": response.usage.completion_tokens or 0,
-                        "total_tokens": response.usage.total_tokens or 0
+                        "prompt_tokens": response_usage.prompt_tokens or 0,
+                        "completion_tokens": response_usage.completion_tokens or 0,
+                        "total_tokens": response_usage.total_tokens or 0
                     }
-                    logger.info(f"   Tokens: prompt={response.usage.prompt_tokens}, "
-                               f"completion={response.usage.completion_tokens}, "
-                               f"total={response.usage.total_tokens}")
+                    prompt_details = getattr(response_usage, "prompt_tokens_details", None)
+                    logger.info("   Tokens: prompt=%s (cached=%s), completion=%s, total=%s",
+                                usage["prompt_tokens"],
+                                getattr(prompt_details, "cached_tokens", None) or 0,
+                                usage["completion_tokens"], usage["total_tokens"])
                     if self._progress_tracker:
                         self._progress_tracker.usage(
                             self.name,
@@ -338,12 +657,21 @@ class BaseAgent:
                         "role": "assistant",
                         "content": response_text
                     })
+                    self._trim_history()
                 
                 if expect_json:
-                    json_text = self._extract_json_from_response(response_text)
+                    # Fast path: JSON mode responses are usually clean JSON
+                    try:
+                        parsed_data = loads_json(response_text)
+                        json_text = response_text
+                        needs_parse = False
+                    except json.JSONDecodeError:
+                        json_text = self._extract_json_from_response(response_text)
+                        needs_parse = True
                     if json_text:
                         try:
-                            parsed_data = json.loads(json_text)
+                            if needs_parse:
+                                parsed_data = loads_json(json_text)
                         except json.JSONDecodeError as error:
                             repaired_json = repair_json_text(
                                 json_text,
@@ -357,7 +685,7 @@ class BaseAgent:
                                     json_text[snippet_start:snippet_end]
                                 )
                                 logger.warning(
-                                    f"   ⚠️ JSON extraction succeeded but parsing still failed: {error}"
+                                    "   ⚠️ JSON extraction succeeded but parsing still failed: %s", error
                                 )
                                 self._record_llm_call({
                                     **llm_request_payload,
@@ -381,9 +709,11 @@ class BaseAgent:
                                     }
                                 }
                             json_text = repaired_json
-                            parsed_data = json.loads(json_text)
+                            parsed_data = loads_json(json_text)
                             logger.info("   ✅ JSON repaired after initial parse failure")
-                        logger.info(f"   ✅ JSON extracted and parsed successfully")
+                        logger.info("   ✅ JSON extracted and parsed successfully")
+                        if response_cache_key and cached_text is None:
+                            get_response_cache().put(response_cache_key, response_text)
                         self._record_llm_call({
                             **llm_request_payload,
                             "attempt": attempt + 1,
@@ -404,7 +734,7 @@ class BaseAgent:
                             }
                         }
                     else:
-                        logger.warning(f"   ⚠️ Could not extract JSON from response")
+                        logger.warning("   ⚠️ Could not extract JSON from response")
                         self._record_llm_call({
                             **llm_request_payload,
                             "attempt": attempt + 1,
@@ -460,7 +790,7 @@ class BaseAgent:
                 ])
                 
                 if is_retryable and attempt < max_retries - 1:
-                    logger.warning(f"   ⚠️ Retryable error (attempt {attempt + 1}): {error_str}")
+                    logger.warning("   ⚠️ Retryable error (attempt %s): %s", attempt + 1, error_str)
                     if self._progress_tracker:
                         retry_delay = base_delay * (2 ** attempt)
                         self._progress_tracker.info(
@@ -499,10 +829,38 @@ class BaseAgent:
             }
         }
     
+    def _trim_history(self):
+        """Drop the oldest turns once the history exceeds MAX_HISTORY_CHARS.
+        
+        History is trimmed in whole turns. A turn starts at a user entry that
+        follows an assistant reply, so a trailing context message is never
+        kept without the instruction it belongs to. The latest turn is
+        always kept, and the history never starts with an orphaned reply.
+        """
+        history = self.conversation_history
+        total_chars = sum(len(entry["content"]) for entry in history)
+        if total_chars <= Config.MAX_HISTORY_CHARS:
+            return
+        turn_starts = [
+            index for index, entry in enumerate(history)
+            if entry["role"] == "user" and (index == 0 or history[index - 1]["role"] == "assistant")
+        ]
+        if not turn_starts:
+            return
+        dropped = 0
+        for turn_start in turn_starts:
+            if turn_start and total_chars <= Config.MAX_HISTORY_CHARS:
+                break
+            total_chars -= sum(len(entry["content"]) for entry in history[dropped:turn_start])
+            dropped = turn_start
+        if dropped:
+            del history[:dropped]
+            logger.debug("   [%s] trimmed %s old history messages", self.name, dropped)
+    
     def reset_conversation(self):
         """Reset the conversation history."""
         self.conversation_history = []
-        logger.info(f"[{self.name}] Conversation history reset")
+        logger.info("[%s] Conversation history reset", self.name)
     
     def get_conversation_summary(self) -> str:
         """Get a summary of the conversation.
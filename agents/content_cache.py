@@ -0,0 +1,191 @@
+"""
+Content Cache Module.
+LRU caches for agent outputs keyed by a hash of their input, so identical
+requests skip repeated LLM work. Entries can optionally be persisted to disk.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from config import Config
+from json_utils import dumps_json_bytes
+from wbs_utils import clone_payload
+
+logger = logging.getLogger(__name__)
+
+
+class ContentCache:
+    """Thread-safe LRU cache keyed by content digests.
+
+    Values are deep-copied on the way in and out, so callers may mutate
+    what they get back without corrupting the cached entry. When a storage
+    directory is configured, entries are also persisted as JSON files so
+    they survive restarts and are shared between worker processes.
+    """
+
+    def __init__(self, maxsize: int = 32, storage_dir: Optional[str] = None,
+                 ttl_seconds: Optional[float] = None):
+        """Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of in-memory entries (0 disables caching)
+            storage_dir: Optional directory for persisted entries
+            ttl_seconds: Maximum age of persisted entries
+        """
+        self.maxsize = max(0, maxsize)
+        self.storage_dir = Path(storage_dir) if storage_dir else None
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.storage_dir and self.maxsize:
+            self.storage_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key_for_text(text: str) -> str:
+        """Build a cache key for a text document."""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def key_for_payload(payload: Any) -> str:
+        """Build a cache key for a JSON-serializable payload."""
+        canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a copy of a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value or None on miss
+        """
+        if not self.maxsize:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return clone_payload(value)
+
+        value = self._read_persisted(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._remember(key, value)
+        self.hits += 1
+        return clone_payload(value)
+
+    def put(self, key: str, value: Any):
+        """Store a copy of a value.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        if not self.maxsize:
+            return
+        value = clone_payload(value)
+        self._remember(key, value)
+        self._write_persisted(key, value)
+
+    def _remember(self, key: str, value: Any):
+        """Insert a value into the in-memory LRU."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _persisted_path(self, key: str) -> Optional[Path]:
+        if not self.storage_dir:
+            return None
+        return self.storage_dir / f"{key}.json"
+
+    def _read_persisted(self, key: str) -> Optional[Any]:
+        """Load a persisted entry if it exists and has not expired."""
+        path = self._persisted_path(key)
+        if path is None:
+            return None
+        try:
+            if self.ttl_seconds and time.time() - path.stat().st_mtime > self.ttl_seconds:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Failed to read cache entry %s: %s", path, e)
+            return None
+
+    def _write_persisted(self, key: str, value: Any):
+        """Atomically persist an entry when disk storage is enabled."""
+        path = self._persisted_path(key)
+        if path is None:
+            return
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.storage_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(dumps_json_bytes(value))
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to persist cache entry %s: %s", path, e)
+
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+_analysis_cache: Optional[ContentCache] = None
+_wbs_cache: Optional[ContentCache] = None
+_response_cache: Optional[ContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> ContentCache:
+    """Get the global cache of analyst results keyed by document hash."""
+    global _analysis_cache
+    if _analysis_cache is None:
+        with _cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = ContentCache(
+                    Config.ANALYSIS_CACHE_SIZE,
+                    storage_dir=Config.ANALYSIS_CACHE_DIR or None,
+                    ttl_seconds=Config.ANALYSIS_CACHE_TTL_SECONDS
+                )
+    return _analysis_cache
+
+
+def get_wbs_cache() -> ContentCache:
+    """Get the global cache of planner results keyed by analysis hash."""
+    global _wbs_cache
+    if _wbs_cache is None:
+        with _cache_lock:
+            if _wbs_cache is None:
+                _wbs_cache = ContentCache(
+                    Config.WBS_CACHE_SIZE,
+                    storage_dir=Config.WBS_CACHE_DIR or None,
+                    ttl_seconds=Config.WBS_CACHE_TTL_SECONDS
+                )
+    return _wbs_cache
+
+
+def get_response_cache() -> ContentCache:
+    """Get the global cache of raw LLM responses keyed by request payload."""
+    global _response_cache
+    if _response_cache is None:
+        with _cache_lock:
+            if _response_cache is None:
+                _response_cache = ContentCache(Config.LLM_RESPONSE_CACHE_SIZE)
+    return _response_cache
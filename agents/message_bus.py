@@ -0,0 +1,146 @@
+"""
+Message Bus Module.
+Routes typed messages between agents so handoffs do not need to be
+hard-coded in the orchestrator.
+"""
+import logging
+import threading
+import time
+from collections import Counter, deque
+from enum import Enum
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MessageType(Enum):
+    """Types of messages exchanged between agents."""
+    REQUEST = "request"
+    RESPONSE = "response"
+    ERROR = "error"
+
+
+class Message(NamedTuple):
+    """A single message passed through the bus."""
+    sender: str
+    receiver: str
+    content: Any
+    timestamp: float
+    type: MessageType
+
+
+class MessageBus:
+    """Synchronous message bus connecting agents.
+
+    Agents register a handler for the requests they serve. A request is
+    delivered to the receiver's handler and its return value is published
+    back to the sender as a RESPONSE (or ERROR if the handler raised).
+    Listeners receive every published message.
+    """
+
+    def __init__(self, max_history: int = 1000):
+        """Initialize the bus.
+
+        Args:
+            max_history: Maximum number of messages kept in history
+        """
+        self._handlers: Dict[str, Callable[[Any], Any]] = {}
+        self._listeners: List[Callable[[Message], None]] = []
+        self._history: deque = deque(maxlen=max_history)
+        self._lock = threading.Lock()
+
+    def subscribe(self, receiver: str, handler: Callable[[Any], Any]):
+        """Register the request handler for an agent.
+
+        Args:
+            receiver: Agent name that requests are addressed to
+            handler: Callable invoked with the request content
+        """
+        self._handlers[receiver] = handler
+
+    def add_listener(self, listener: Callable[[Message], None]):
+        """Register a callable that observes every published message.
+
+        Args:
+            listener: Callable invoked with each Message
+        """
+        self._listeners.append(listener)
+
+    def publish(self, sender: str, receiver: str, content: Any,
+                message_type: MessageType) -> Message:
+        """Publish a message to the bus.
+
+        Args:
+            sender: Sending agent name
+            receiver: Receiving agent name
+            content: Message payload
+            message_type: Message type
+
+        Returns:
+            Published message
+        """
+        message = Message(sender, receiver, content, time.time(), message_type)
+        with self._lock:
+            self._history.append(message)
+        for listener in self._listeners:
+            listener(message)
+        return message
+
+    def request(self, sender: str, receiver: str, content: Any) -> Any:
+        """Send a request and block until the receiver responds.
+
+        Args:
+            sender: Requesting agent name
+            receiver: Agent expected to handle the request
+            content: Request payload
+
+        Returns:
+            Handler result
+
+        Raises:
+            KeyError: If no handler is registered for the receiver
+        """
+        handler = self._handlers.get(receiver)
+        if handler is None:
+            raise KeyError(f"No handler subscribed for agent '{receiver}'")
+
+        self.publish(sender, receiver, content, MessageType.REQUEST)
+        try:
+            result = handler(content)
+        except Exception as e:
+            self.publish(receiver, sender, str(e), MessageType.ERROR)
+            raise
+        self.publish(receiver, sender, result, MessageType.RESPONSE)
+        return result
+
+    def get_history(self, agent: Optional[str] = None) -> List[Message]:
+        """Get message history, optionally filtered by agent.
+
+        Args:
+            agent: Agent name to filter by (as sender or receiver)
+
+        Returns:
+            List of messages
+        """
+        with self._lock:
+            history = list(self._history)
+        if agent is None:
+            return history
+        return [m for m in history if m.sender == agent or m.receiver == agent]
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get message counts by type.
+
+        Returns:
+            Statistics dictionary
+        """
+        history = self.get_history()
+        return {
+            "total_messages": len(history),
+            "by_type": dict(Counter(m.type.value for m in history))
+        }
+
+    def clear(self):
+        """Drop all recorded messages."""
+        with self._lock:
+            self._history.clear()
@@ -7,21 +7,30 @@ import json
 import logging
 import math
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from config import Config
 from wbs_utils import canonicalize_wbs_result
 
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, get_orchestrator_pool, run_bounded
 
 logger = logging.getLogger(__name__)
 
+_PLANNER_SYSTEM_PROMPT = """Ты — опытный проектный менеджер и планировщик разработки ПО.
+
+ОТВЕТ ДОЛЖЕН БЫТЬ ТОЛЬКО В ФОРМАТЕ JSON.
+Не добавляй комментарии и не используй markdown.
+Все оценки часов и длительности возвращай числами."""
+
 
 class PlannerAgent(BaseAgent):
     """Agent responsible for creating Work Breakdown Structure."""
 
+    VALIDATION_FEEDBACK_TEMPLATE = "Пожалуйста, исправь следующие проблемы: {issues}"
+    # Lower bound of the refinement completion budget for small WBS drafts
+    REFINEMENT_MIN_TOKENS = 1500
+
     STANDARD_PHASES = [
         ("Планирование и анализ", "Уточнение объема проекта, декомпозиция требований и план работ."),
         ("Проектирование", "Архитектурное, UX/UI и техническое проектирование решения."),
@@ -45,7 +54,7 @@ class PlannerAgent(BaseAgent):
             with open(rules_path, "r", encoding="utf-8") as f:
                 return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError) as e:
-            logger.warning(f"Could not load estimation rules: {e}")
+            logger.warning("Could not load estimation rules: %s", e)
             return {}
 
     def _normalize_space(self, value: Any) -> str:
@@ -59,11 +68,7 @@ class PlannerAgent(BaseAgent):
 
     def _build_system_prompt(self) -> str:
         """Build the default system prompt for the Planner Agent."""
-        return """Ты — опытный проектный менеджер и планировщик разработки ПО.
-
-ОТВЕТ ДОЛЖЕН БЫТЬ ТОЛЬКО В ФОРМАТЕ JSON.
-Не добавляй комментарии и не используй markdown.
-Все оценки часов и длительности возвращай числами."""
+        return _PLANNER_SYSTEM_PROMPT
 
     def _build_skeleton_system_prompt(self) -> str:
         """Build a compact prompt for phase/work-package planning."""
@@ -634,7 +639,7 @@ class PlannerAgent(BaseAgent):
 
         return (
             "Детализируй пакет работ в набор задач.\n\n"
-            f"Контекст:\n{json.dumps(compact_context, ensure_ascii=False, indent=2)}\n\n"
+            f"Контекст:\n{self._serialize_for_prompt(compact_context)}\n\n"
             "Важно: каждая задача должна содержать requirement_ids, "
             "и эти requirement_ids должны быть непустым подмножеством requirement_ids пакета работ.\n\n"
             "JSON:"
@@ -900,20 +905,72 @@ class PlannerAgent(BaseAgent):
             "recommendations": recommendations
         }
 
-    def create_wbs(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
-        """Create WBS based on the analysis from Analyst Agent."""
-        logger.info(f"[{self.name}] Starting WBS creation...")
+    def _request_skeleton_batch(self, analyses: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Request WBS skeletons for several analyses in one LLM call.
+
+        The model returns one skeleton per numbered project, so the skeleton
+        system prompt is sent and prefilled once for the whole batch.
+
+        Args:
+            analyses: Analyst results
+
+        Returns:
+            Per-analysis skeleton results in send_message format, or None
+            for projects missing from the reply (planned individually)
+        """
+        projects = "\n\n".join(
+            f"{position}. {self._serialize_for_prompt(self._build_compact_analysis(analysis))}"
+            for position, analysis in enumerate(analyses, start=1)
+        )
+        try:
+            result = self.send_message(
+                f"Построй каркас WBS для каждого из {len(analyses)} проектов по их компактным анализам.\n"
+                "Верни один JSON-объект, где ключ — номер проекта, а значение — его каркас: "
+                '{"1": {...}, "2": {...}}\n\n'
+                f"Анализы:\n{projects}\n\nJSON:",
+                expect_json=True,
+                use_history=False,
+                max_tokens=Config.WBS_SKELETON_MAX_TOKENS * len(analyses),
+                temperature=0.0,
+                system_prompt=self._build_skeleton_system_prompt()
+            )
+        except Exception as exc:
+            logger.warning("[%s] Batched skeleton request raised: %s", self.name, exc)
+            result = {"success": False}
+        data = result.get("data") if result.get("success") else None
+        if not isinstance(data, dict):
+            logger.warning("[%s] Batched skeleton request failed, planning projects one by one", self.name)
+            return [None] * len(analyses)
+
+        skeletons = []
+        for position in range(1, len(analyses) + 1):
+            skeleton = data.get(str(position))
+            skeletons.append({"success": True, "data": skeleton} if isinstance(skeleton, dict) else None)
+        return skeletons
+
+    def create_wbs(self, analysis: Dict[str, Any],
+                   skeleton_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Create WBS based on the analysis from Analyst Agent.
+
+        Args:
+            analysis: Analyst result
+            skeleton_result: Optional skeleton already produced by a batched
+                request; when omitted the skeleton is requested here
+
+        Returns:
+            WBS creation result
+        """
+        logger.info("[%s] Starting WBS creation...", self.name)
 
         compact_analysis = self._build_compact_analysis(analysis)
         self._record_intermediate("planning_started", {"compact_analysis": compact_analysis})
         skeleton_message = (
             "Построй каркас WBS на основе компактного анализа проекта.\n\n"
-            f"Анализ:\n{json.dumps(compact_analysis, ensure_ascii=False, indent=2)}\n\n"
+            f"Анализ:\n{self._serialize_for_prompt(compact_analysis)}\n\n"
             "JSON:"
         )
 
-        skeleton_result = None
-        if Config.ENABLE_WBS_SKELETON_LLM:
+        if skeleton_result is None and Config.ENABLE_WBS_SKELETON_LLM:
             skeleton_result = self.send_message(
                 skeleton_message,
                 expect_json=True,
@@ -932,7 +989,7 @@ class PlannerAgent(BaseAgent):
                     f"{skeleton_result.get('error')}"
                 )
             else:
-                logger.info(f"[{self.name}] LLM skeleton disabled, using deterministic skeleton")
+                logger.info("[%s] LLM skeleton disabled, using deterministic skeleton", self.name)
             skeleton = self._build_fallback_skeleton(analysis)
 
         skeleton = self._normalize_phase_plan(skeleton, analysis)
@@ -962,28 +1019,24 @@ class PlannerAgent(BaseAgent):
         llm_task_requests = 0
         fallback_task_packages = 0
         max_workers = max(1, min(Config.LLM_MAX_PARALLEL_REQUESTS, len(work_items) or 1))
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(self._generate_tasks_for_work_package, analysis, phase, wp): wp["_key"]
-                for phase, wp in work_items
-            }
-            for future in as_completed(futures):
-                wp_key = futures[future]
-                try:
-                    result = future.result()
-                    if result.get("success"):
-                        generated_tasks[wp_key] = result.get("data", {})
-                        if result.get("metadata", {}).get("used_fallback_tasks"):
-                            fallback_task_packages += 1
-                        else:
-                            llm_task_requests += 1
+        task_args = [(analysis, phase, wp) for phase, wp in work_items]
+        for position, future in run_bounded(self._generate_tasks_for_work_package, task_args, max_workers):
+            wp_key = work_items[position][1]["_key"]
+            try:
+                result = future.result()
+                if result.get("success"):
+                    generated_tasks[wp_key] = result.get("data", {})
+                    if result.get("metadata", {}).get("used_fallback_tasks"):
+                        fallback_task_packages += 1
                     else:
-                        generated_tasks[wp_key] = {}
                         llm_task_requests += 1
-                except Exception as exc:
-                    logger.exception(f"[{self.name}] Failed to generate tasks for {wp_key}: {exc}")
+                else:
                     generated_tasks[wp_key] = {}
                     llm_task_requests += 1
+            except Exception as exc:
+                logger.exception("[%s] Failed to generate tasks for %s: %s", self.name, wp_key, exc)
+                generated_tasks[wp_key] = {}
+                llm_task_requests += 1
 
         wbs = self._build_wbs_from_skeleton(analysis, skeleton, generated_tasks)
         self._record_intermediate(
@@ -1007,7 +1060,7 @@ class PlannerAgent(BaseAgent):
             }
         )
 
-        logger.info(f"[{self.name}] WBS creation completed successfully")
+        logger.info("[%s] WBS creation completed successfully", self.name)
         return {
             "success": True,
             "wbs": wbs,
@@ -1019,6 +1072,44 @@ class PlannerAgent(BaseAgent):
             }
         }
 
+    def create_wbs_batch(self, analyses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create WBS for several analyses concurrently.
+
+        Skeletons are first requested WBS_SKELETON_BATCH_SIZE projects per
+        LLM call. Each create_wbs call then runs on the shared LLM pool; the
+        number of projects planned at once is capped by
+        LLM_MAX_PARALLEL_REQUESTS.
+
+        Args:
+            analyses: Analyst results, one per project
+
+        Returns:
+            create_wbs results in the same order as the analyses
+        """
+        skeletons: List[Optional[Dict[str, Any]]] = [None] * len(analyses)
+        batch_size = Config.WBS_SKELETON_BATCH_SIZE
+        if Config.ENABLE_WBS_SKELETON_LLM and batch_size > 1 and len(analyses) > 1:
+            for start in range(0, len(analyses), batch_size):
+                batch = analyses[start:start + batch_size]
+                if len(batch) > 1:
+                    skeletons[start:start + len(batch)] = self._request_skeleton_batch(batch)
+
+        results: List[Dict[str, Any]] = [{} for _ in analyses]
+        # Each create_wbs blocks on its own task fan-out on the LLM pool, so
+        # projects run on the orchestrator pool to keep LLM workers for leaves
+        limit = max(1, min(Config.LLM_MAX_PARALLEL_REQUESTS, len(analyses) or 1))
+        create_args = [
+            (analysis,) if skeleton is None else (analysis, skeleton)
+            for analysis, skeleton in zip(analyses, skeletons)
+        ]
+        for position, future in run_bounded(self.create_wbs, create_args, limit, pool=get_orchestrator_pool()):
+            try:
+                results[position] = future.result()
+            except Exception as exc:
+                logger.exception("[%s] Batch WBS creation failed for project %s: %s", self.name, position, exc)
+                results[position] = {"success": False, "error": str(exc)}
+        return results
+
     def _compact_wbs_for_review(self, wbs: Dict[str, Any]) -> Dict[str, Any]:
         """Build a compact WBS snapshot for review/refinement prompts."""
         phases = []
@@ -1347,13 +1438,30 @@ class PlannerAgent(BaseAgent):
 
         return merged
 
+    def _refinement_max_tokens(self, serialized_wbs: str) -> int:
+        """Size the refinement completion budget to the WBS being returned.
+
+        The reply is a full compact WBS of roughly the input's size. One token
+        per input character leaves about 2x headroom for Cyrillic JSON, capped
+        by WBS_REFINEMENT_MAX_TOKENS.
+        """
+        return max(
+            min(self.REFINEMENT_MIN_TOKENS, Config.WBS_REFINEMENT_MAX_TOKENS),
+            min(len(serialized_wbs), Config.WBS_REFINEMENT_MAX_TOKENS)
+        )
+
     def refine_wbs(self, current_wbs: Dict[str, Any], feedback: str) -> Dict[str, Any]:
-        """Refine the WBS based on feedback."""
+        """Refine the WBS based on feedback.
+
+        The prompt keeps the stable part (instructions and the serialized WBS)
+        ahead of the feedback so consecutive refinement calls share a prefix.
+        """
         compact_wbs = self._compact_wbs_for_review(current_wbs)
+        serialized_wbs = self._serialize_for_prompt(compact_wbs)
         message = f"""Проверь компактное представление WBS и обратную связь.
 
 Текущий WBS:
-{json.dumps(compact_wbs, ensure_ascii=False, indent=2)}
+{serialized_wbs}
 
 Обратная связь:
 {feedback}
@@ -1364,7 +1472,7 @@ class PlannerAgent(BaseAgent):
             message,
             expect_json=True,
             use_history=False,
-            max_tokens=Config.WBS_REFINEMENT_MAX_TOKENS,
+            max_tokens=self._refinement_max_tokens(serialized_wbs),
             temperature=0.0
         )
 
@@ -1386,38 +1494,118 @@ class PlannerAgent(BaseAgent):
 
         return self.send_message(message, expect_json=False, use_history=False, max_tokens=800)
 
-    def validate_wbs(self, wbs: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate the WBS for completeness and consistency."""
-        issues = []
-
+    def _iter_wbs_issues(self, wbs: Dict[str, Any]) -> Iterator[str]:
+        """Yield structural and traceability issues of a WBS in document order."""
         if "wbs" not in wbs:
-            issues.append("Missing 'wbs' field")
-        elif "phases" not in wbs["wbs"]:
-            issues.append("Missing 'phases' in WBS")
+            yield "Missing 'wbs' field"
+            return
+        if "phases" not in wbs["wbs"]:
+            yield "Missing 'phases' in WBS"
+            return
+
+        dedupe = self._dedupe_strings
+        for phase in wbs["wbs"]["phases"]:
+            work_packages = phase.get("work_packages")
+            if not work_packages:
+                yield f"Phase {phase.get('id')} has no work packages"
+                continue
+            for wp in work_packages:
+                wp_id = wp.get("id")
+                wp_requirement_ids = set(dedupe(wp.get("requirement_ids", ())))
+                if not wp_requirement_ids:
+                    yield f"Work package {wp_id} has no requirement_ids"
+                tasks = wp.get("tasks")
+                if not tasks:
+                    yield f"Work package {wp_id} has no tasks"
+                    continue
+                for task in tasks:
+                    task_requirement_ids = dedupe(task.get("requirement_ids", ()))
+                    if not task_requirement_ids:
+                        yield f"Task {task.get('id')} has no requirement_ids"
+                    elif wp_requirement_ids and not wp_requirement_ids.issuperset(task_requirement_ids):
+                        yield f"Task {task.get('id')} references requirements outside work package {wp_id}"
+
+    def validate_wbs(self, wbs: Dict[str, Any], fail_fast: bool = False) -> Dict[str, Any]:
+        """Validate the WBS for completeness and consistency.
+
+        Args:
+            wbs: WBS to validate
+            fail_fast: Stop at the first issue when only validity matters
+
+        Returns:
+            Validation result with "valid" and "issues"
+        """
+        issue_iter = self._iter_wbs_issues(wbs)
+        if fail_fast:
+            first_issue = next(issue_iter, None)
+            issues = [] if first_issue is None else [first_issue]
         else:
-            for phase in wbs["wbs"]["phases"]:
-                if not phase.get("work_packages"):
-                    issues.append(f"Phase {phase.get('id')} has no work packages")
-                else:
-                    for wp in phase["work_packages"]:
-                        wp_requirement_ids = self._dedupe_strings(wp.get("requirement_ids", []))
-                        if not wp_requirement_ids:
-                            issues.append(f"Work package {wp.get('id')} has no requirement_ids")
-                        if not wp.get("tasks"):
-                            issues.append(f"Work package {wp.get('id')} has no tasks")
-                            continue
-                        for task in wp["tasks"]:
-                            task_requirement_ids = self._dedupe_strings(task.get("requirement_ids", []))
-                            if not task_requirement_ids:
-                                issues.append(f"Task {task.get('id')} has no requirement_ids")
-                            elif wp_requirement_ids and not set(task_requirement_ids).issubset(set(wp_requirement_ids)):
-                                issues.append(
-                                    f"Task {task.get('id')} references requirements outside work package {wp.get('id')}"
-                                )
+            issues = list(issue_iter)
 
         validation_result = {
-            "valid": len(issues) == 0,
+            "valid": not issues,
             "issues": issues
         }
         self._record_intermediate("planner_validation", validation_result)
         return validation_result
+
+    def validate_and_refine(
+        self,
+        wbs: Dict[str, Any],
+        validation: Optional[Dict[str, Any]] = None,
+        feedback_template: str = VALIDATION_FEEDBACK_TEMPLATE,
+        refine_func: Optional[Callable[[Dict[str, Any], str], Dict[str, Any]]] = None,
+        revalidate: bool = True
+    ) -> Dict[str, Any]:
+        """Validate the WBS and refine it within the same dispatch if issues are found.
+
+        Args:
+            wbs: WBS to check
+            validation: Result of a previous validate_wbs call for this WBS, if any
+            feedback_template: Feedback text with an {issues} placeholder
+            refine_func: Refinement callable, defaults to refine_wbs
+            revalidate: Whether to validate the refined WBS; callers on their
+                last refinement attempt can skip it, leaving valid as None
+
+        Returns:
+            Dictionary with success, valid, issues, wbs and refined flags
+        """
+        if validation is None:
+            validation = self.validate_wbs(wbs)
+
+        outcome = {
+            "success": True,
+            "valid": validation["valid"],
+            "issues": validation["issues"],
+            "wbs": wbs,
+            "refined": False
+        }
+        if validation["valid"]:
+            return outcome
+
+        feedback = feedback_template.format(issues=", ".join(validation["issues"]))
+        refine_result = (refine_func or self.refine_wbs)(wbs, feedback)
+        if not refine_result.get("success"):
+            outcome["success"] = False
+            outcome["error"] = refine_result.get("error", "WBS refinement failed")
+            return outcome
+
+        refined_wbs = refine_result["wbs"]
+        refined_validation = refine_result.get("validation")
+        if refined_validation is None:
+            if not revalidate:
+                return {
+                    "success": True,
+                    "valid": None,
+                    "issues": [],
+                    "wbs": refined_wbs,
+                    "refined": True
+                }
+            refined_validation = self.validate_wbs(refined_wbs)
+        return {
+            "success": True,
+            "valid": refined_validation["valid"],
+            "issues": refined_validation["issues"],
+            "wbs": refined_wbs,
+            "refined": True
+        }
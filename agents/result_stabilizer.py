@@ -2,20 +2,170 @@
 Result Stabilizer Module.
 Implements ensemble approach for stabilizing WBS generation results.
 """
+import asyncio
+import atexit
+import copy
+import functools
+import inspect
+import itertools
 import logging
 import json
-import statistics
+import math
+import re
+import threading
 import time
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+
+from json_utils import loads_json
+from wbs_utils import float_mean, float_median, float_stdev, float_trimmed_mean
 
 logger = logging.getLogger(__name__)
 
+_NUMBER_RE = re.compile(r'[\d.]+')
+
+# Upper bound on concurrent ensemble iterations across all callers
+ENSEMBLE_MAX_WORKERS = 5
+
+_ensemble_pool: Optional[ThreadPoolExecutor] = None
+_ensemble_pool_lock = threading.Lock()
+
+
+def _get_ensemble_pool() -> ThreadPoolExecutor:
+    """Get the process-wide pool that runs parallel ensemble iterations.
+    
+    Reusing one pool avoids creating and joining worker threads on every
+    ensemble run.
+    """
+    global _ensemble_pool
+    if _ensemble_pool is None:
+        with _ensemble_pool_lock:
+            if _ensemble_pool is None:
+                _ensemble_pool = ThreadPoolExecutor(
+                    max_workers=ENSEMBLE_MAX_WORKERS,
+                    thread_name_prefix="wbs-ens"
+                )
+                atexit.register(_ensemble_pool.shutdown, wait=False)
+    return _ensemble_pool
+
+
+class SiblingIndex(NamedTuple):
+    """Lookup tables for one list of sibling WBS nodes."""
+    by_id: Dict[Any, Dict[str, Any]]
+    by_name: Dict[str, Dict[str, Any]]
+    names: List[Tuple[str, Dict[str, Any]]]  # (lowercased name, node) in list order
+
+
+def _index_nodes(nodes: List[Dict[str, Any]]) -> SiblingIndex:
+    """Index sibling WBS nodes by ID and by lowercased name (first occurrence wins)."""
+    by_id: Dict[Any, Dict[str, Any]] = {}
+    by_name: Dict[str, Dict[str, Any]] = {}
+    names = []
+    for node in nodes:
+        name = node.get('name', '').lower()
+        by_id.setdefault(node.get('id', ''), node)
+        by_name.setdefault(name, node)
+        names.append((name, node))
+    return SiblingIndex(by_id, by_name, names)
+
+
+def _index_tree(wbs_results: List[Dict[str, Any]]) -> Dict[int, SiblingIndex]:
+    """Index every sibling list of every WBS result in a single walk.
+    
+    Entries are keyed by the identity of the list, so each list of phases,
+    work packages or tasks is indexed once no matter how many template
+    nodes are matched against it. The results must stay alive (and
+    unmodified) while the index is used.
+    """
+    indexes: Dict[int, SiblingIndex] = {}
+    
+    def add(nodes: List[Dict[str, Any]]):
+        # Only non-empty lists that belong to the results are keyed; an
+        # empty default list is temporary and its id could be reused
+        if nodes:
+            indexes[id(nodes)] = _index_nodes(nodes)
+    
+    for wbs in wbs_results:
+        phases = wbs.get('wbs', {}).get('phases', [])
+        add(phases)
+        for phase in phases:
+            wps = phase.get('work_packages', [])
+            add(wps)
+            for wp in wps:
+                add(wp.get('tasks', []))
+    return indexes
+
+
+class TotalsStats(NamedTuple):
+    """Summary of the positive project totals of a set of WBS results."""
+    totals: List[float]
+    mean: float
+    median: float
+    stdev: float  # 0 when there are fewer than two totals
+
+
+def _totals_stats(wbs_results: List[Dict[str, Any]]) -> TotalsStats:
+    """Collect positive project totals and reduce them in one place."""
+    totals = [
+        wbs.get('project_info', {}).get('total_estimated_hours', 0)
+        for wbs in wbs_results
+    ]
+    totals = [t for t in totals if t > 0]
+    if not totals:
+        return TotalsStats(totals, 0, 0, 0)
+    mean = float_mean(totals)
+    return TotalsStats(
+        totals,
+        mean,
+        float_median(totals),
+        float_stdev(totals, mean) if len(totals) > 1 else 0
+    )
+
+
+def _structure_signature(wbs: Dict[str, Any]) -> Optional[Tuple]:
+    """Describe the shape of a WBS tree as nested tuples of node IDs.
+    
+    Returns None when a sibling list repeats an ID, since ID matching is
+    then not equivalent to matching by position.
+    """
+    signature = []
+    for phase in wbs.get('wbs', {}).get('phases', []):
+        wps = []
+        for wp in phase.get('work_packages', []):
+            task_ids = tuple(task.get('id', '') for task in wp.get('tasks', []))
+            if len(set(task_ids)) != len(task_ids):
+                return None
+            wps.append((wp.get('id', ''), task_ids))
+        if len({wp_id for wp_id, _ in wps}) != len(wps):
+            return None
+        signature.append((phase.get('id', ''), tuple(wps)))
+    if len({phase_id for phase_id, _ in signature}) != len(signature):
+        return None
+    return tuple(signature)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_rules_file(rules_path: str, mtime: float) -> Dict[str, Any]:
+    """Read and parse an estimation rules file once per path and version.
+    
+    The modification time is part of the cache key, so an edited file is
+    parsed again while unchanged files are shared process-wide. Failures are
+    raised rather than cached. The returned dict must be treated as read-only.
+    """
+    # One read of the raw bytes; both parsers decode UTF-8 themselves
+    return loads_json(Path(rules_path).read_bytes())
+
 
 class EstimationRules:
     """Loads and provides access to estimation rules."""
     
+    __slots__ = (
+        "rules", "_patterns", "_task_limits",
+        "min_hours_per_task", "max_hours_per_task",
+        "min_hours_per_phase", "max_hours_per_phase",
+    )
+    
     def __init__(self, rules_path: str = None):
         """Initialize estimation rules.
         
@@ -23,6 +173,7 @@ class EstimationRules:
             rules_path: Path to estimation rules JSON file
         """
         self.rules = self._load_rules(rules_path)
+        self._index_rules()
     
     def _load_rules(self, rules_path: str = None) -> Dict[str, Any]:
         """Load estimation rules from file."""
@@ -30,9 +181,9 @@ class EstimationRules:
             rules_path = Path(__file__).parent.parent / "data" / "estimation_rules.json"
         
         try:
-            with open(rules_path, 'r', encoding='utf-8') as f:
-                rules = json.load(f)
-            logger.info(f"Loaded estimation rules from {rules_path}")
+            resolved = Path(rules_path).resolve()
+            rules = _load_rules_file(str(resolved), resolved.stat().st_mtime)
+            logger.info("Loaded estimation rules from %s", rules_path)
             return rules
         except FileNotFoundError:
             logger.warning(f"Estimation rules file not found: {rules_path}")
@@ -62,30 +213,59 @@ class EstimationRules:
             }
         }
     
+    def _index_rules(self):
+        """Precompute lookup data derived from the loaded rules.
+        
+        Task patterns are lowercased once and flattened across categories in
+        file order, and the limits are resolved to attributes, so per-task
+        lookups do no string or dict work beyond the match itself.
+        """
+        templates = self.rules.get("task_templates", {})
+        self._patterns: List[Tuple[str, Dict[str, Any]]] = [
+            (pattern.lower(), estimation)
+            for tasks in templates.values()
+            for pattern, estimation in tasks.items()
+        ]
+        
+        limits = self.rules.get("limits", {})
+        self.min_hours_per_task = limits.get("min_hours_per_task", 2)
+        self.max_hours_per_task = limits.get("max_hours_per_task", 80)
+        self.min_hours_per_phase = limits.get("min_hours_per_phase", 8)
+        self.max_hours_per_phase = limits.get("max_hours_per_phase", 500)
+        
+        # Task names repeat across iterations and normalization passes, so
+        # the pattern scan behind a task's limits runs once per name
+        self._task_limits = functools.lru_cache(maxsize=2048)(self._resolve_task_limits)
+    
     def get_task_estimation(self, task_name: str) -> Optional[Dict[str, Any]]:
         """Get estimation for a task by name pattern matching."""
         task_lower = task_name.lower()
         
-        templates = self.rules.get("task_templates", {})
-        for category, tasks in templates.items():
-            for pattern, estimation in tasks.items():
-                if pattern.lower() in task_lower:
-                    return estimation
+        for pattern, estimation in self._patterns:
+            if pattern in task_lower:
+                return estimation
         
         return None
     
+    def _resolve_task_limits(self, task_name: str) -> Tuple[float, float]:
+        """Get the (min, max) hours for a task, narrowed by its template."""
+        min_hours = self.min_hours_per_task
+        max_hours = self.max_hours_per_task
+        
+        estimation = self.get_task_estimation(task_name)
+        if estimation:
+            min_hours = max(min_hours, estimation.get("min_hours", min_hours))
+            max_hours = min(max_hours, estimation.get("max_hours", max_hours))
+        
+        return min_hours, max_hours
+    
     def normalize_hours(self, hours: float, task_name: str = None) -> float:
         """Normalize hours to acceptable range."""
-        limits = self.rules.get("limits", {})
-        min_hours = limits.get("min_hours_per_task", 2)
-        max_hours = limits.get("max_hours_per_task", 80)
-        
         # Check against task template if available
         if task_name:
-            estimation = self.get_task_estimation(task_name)
-            if estimation:
-                min_hours = max(min_hours, estimation.get("min_hours", min_hours))
-                max_hours = min(max_hours, estimation.get("max_hours", max_hours))
+            min_hours, max_hours = self._task_limits(task_name)
+        else:
+            min_hours, max_hours = self.min_hours_per_task, self.max_hours_per_task
         
         return max(min_hours, min(max_hours, hours))
     
@@ -106,6 +286,8 @@ class ResultStabilizer:
     - Confidence scoring
     """
     
+    __slots__ = ("rules", "settings")
+    
     def __init__(self, estimation_rules: EstimationRules = None):
         """Initialize the result stabilizer.
         
@@ -116,12 +298,15 @@ class ResultStabilizer:
         self.settings = self.rules.rules.get("stabilization_settings", {})
     
     def stabilize(self, wbs_results: List[Dict[str, Any]], 
-                  method: str = None) -> Dict[str, Any]:
+                  method: str = None,
+                  include_stats: bool = True) -> Dict[str, Any]:
         """Stabilize multiple WBS results into one consensus result.
         
         Args:
             wbs_results: List of WBS results to stabilize
             method: Consensus method ('median', 'mean', 'trimmed_mean')
+            include_stats: Add the totals summary to metadata["statistics"];
+                callers that only use the data can skip it
             
         Returns:
             Stabilized WBS result with metadata
@@ -142,71 +327,88 @@ class ResultStabilizer:
         
         method = method or self.settings.get("consensus_method", "median")
         
+        # Totals are reduced once and shared by every step below
+        all_stats = _totals_stats(wbs_results)
+        
         # Step 1: Remove outliers
-        filtered_results = self._remove_outliers(wbs_results)
+        filtered_results = self._remove_outliers(wbs_results, all_stats)
         
         if not filtered_results:
             filtered_results = wbs_results  # Fallback to all results
         
+        if len(filtered_results) == len(wbs_results):
+            filtered_stats = all_stats
+        else:
+            filtered_stats = _totals_stats(filtered_results)
+        
         # Step 2: Calculate consensus
-        consensus_wbs = self._calculate_consensus(filtered_results, method)
+        consensus_wbs = self._calculate_consensus(filtered_results, method, filtered_stats)
         
         # Step 3: Normalize values
         normalized_wbs = self._normalize_wbs(consensus_wbs)
         
         # Step 4: Calculate confidence
-        confidence = self._calculate_confidence(wbs_results, filtered_results, normalized_wbs)
+        confidence = self._calculate_confidence(wbs_results, filtered_results, normalized_wbs,
+                                                filtered_stats)
+        
+        metadata = {
+            "method": method,
+            "confidence": confidence,
+            "total_iterations": len(wbs_results),
+            "used_iterations": len(filtered_results),
+            "outliers_removed": len(wbs_results) - len(filtered_results)
+        }
+        if include_stats:
+            metadata["statistics"] = self._calculate_statistics(wbs_results, all_stats)
         
         return {
             "success": True,
             "data": normalized_wbs,
-            "metadata": {
-                "method": method,
-                "confidence": confidence,
-                "total_iterations": len(wbs_results),
-                "used_iterations": len(filtered_results),
-                "outliers_removed": len(wbs_results) - len(filtered_results),
-                "statistics": self._calculate_statistics(wbs_results)
-            }
+            "metadata": metadata
         }
     
-    def _remove_outliers(self, wbs_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _remove_outliers(self, wbs_results: List[Dict[str, Any]],
+                         stats: Optional[TotalsStats] = None) -> List[Dict[str, Any]]:
         """Remove outlier results based on total hours."""
         threshold = self.settings.get("outlier_threshold_std", 2.0)
-        
-        # Extract total hours
-        totals = []
-        for wbs in wbs_results:
-            total = wbs.get('project_info', {}).get('total_estimated_hours', 0)
-            if total > 0:
-                totals.append(total)
+        if stats is None:
+            stats = _totals_stats(wbs_results)
+        totals = stats.totals
         
         if len(totals) < 3:
             return wbs_results  # Not enough data to detect outliers
         
-        mean = statistics.mean(totals)
-        std = statistics.stdev(totals)
+        mean = stats.mean
+        std = stats.stdev
         
         if std == 0:
             return wbs_results  # All values are the same
         
-        # Filter results within threshold
+        # Filter results within threshold, keeping each total aligned with its
+        # result; results without a positive total are never treated as outliers
         filtered = []
-        for i, wbs in enumerate(wbs_results):
-            total = totals[i] if i < len(totals) else 0
-            z_score = abs(total - mean) / std
-            if z_score <= threshold:
-                filtered.append(wbs)
+        outliers = []
+        for wbs in wbs_results:
+            total = wbs.get('project_info', {}).get('total_estimated_hours', 0)
+            if total > 0 and abs(total - mean) / std > threshold:
+                outliers.append(total)
             else:
-                logger.info(f"Removed outlier: {total} hours (z-score: {z_score:.2f})")
+                filtered.append(wbs)
+        
+        if outliers:
+            logger.info("Removed %d outliers: %s hours (mean: %.1f, std: %.1f)",
+                        len(outliers), outliers, mean, std)
         
         return filtered
     
     def _calculate_consensus(self, wbs_results: List[Dict[str, Any]], 
-                            method: str) -> Dict[str, Any]:
-        """Calculate consensus WBS from multiple results."""
-        import copy
+                            method: str,
+                            stats: Optional[TotalsStats] = None) -> Dict[str, Any]:
+        """Calculate consensus WBS from multiple results.
         
+        The first result is deep-copied once and serves as the template;
+        consensus values are then written into that copy in place.
+        """
         if not wbs_results:
             return {}
         
@@ -215,260 +417,198 @@ class ResultStabilizer:
         
         # Calculate consensus for project_info
         if 'project_info' in consensus:
-            consensus['project_info'] = self._consensus_project_info(wbs_results, method)
+            if stats is None:
+                stats = _totals_stats(wbs_results)
+            self._consensus_project_info(consensus['project_info'], stats, method)
         
         # Calculate consensus for phases
         if 'wbs' in consensus and 'phases' in consensus['wbs']:
-            consensus['wbs']['phases'] = self._consensus_phases(wbs_results, method)
+            # Results that share one tree of unique IDs match by position, so
+            # the lookup tables are only built when the structures differ
+            signature = _structure_signature(wbs_results[0])
+            if signature is not None and all(
+                _structure_signature(wbs) == signature for wbs in wbs_results[1:]
+            ):
+                indexes = None
+            else:
+                indexes = _index_tree(wbs_results)
+            self._consensus_phases(consensus['wbs']['phases'], wbs_results, method, indexes)
         
         return consensus
     
-    def _consensus_project_info(self, wbs_results: List[Dict[str, Any]], 
-                                method: str) -> Dict[str, Any]:
-        """Calculate consensus for project_info."""
-        # Collect all total hours
-        totals = [
-            wbs.get('project_info', {}).get('total_estimated_hours', 0)
-            for wbs in wbs_results
-        ]
-        totals = [t for t in totals if t > 0]
+    def _consensus_project_info(self, project_info: Dict[str, Any],
+                                stats: TotalsStats, method: str):
+        """Write consensus totals into the template project_info in place."""
+        totals = stats.totals
         
         if not totals:
-            return wbs_results[0].get('project_info', {})
+            return
         
         # Calculate consensus value
         if method == 'median':
-            consensus_total = statistics.median(totals)
+            consensus_total = stats.median
         elif method == 'trimmed_mean':
-            sorted_totals = sorted(totals)
-            trim = max(1, len(sorted_totals) // 4)
-            trimmed = sorted_totals[trim:-trim] if len(sorted_totals) > trim * 2 else sorted_totals
-            consensus_total = statistics.mean(trimmed) if trimmed else statistics.mean(totals)
+            consensus_total = float_trimmed_mean(totals)
         else:  # mean
-            consensus_total = statistics.mean(totals)
+            consensus_total = stats.mean
         
-        # Build consensus project_info
-        import copy
-        consensus_info = copy.deepcopy(wbs_results[0].get('project_info', {}))
-        consensus_info['total_estimated_hours'] = round(consensus_total)
+        project_info['total_estimated_hours'] = round(consensus_total)
         
         # Calculate duration (40 hours per week)
         weeks = max(1, round(consensus_total / 40))
-        consensus_info['estimated_duration'] = f"{weeks} недель"
-        
-        return consensus_info
+        project_info['estimated_duration'] = f"{weeks} недель"
     
-    def _consensus_phases(self, wbs_results: List[Dict[str, Any]], 
-                         method: str) -> List[Dict[str, Any]]:
-        """Calculate consensus for phases.
+    def _consensus_phases(self, phases: List[Dict[str, Any]],
+                          wbs_results: List[Dict[str, Any]],
+                          method: str,
+                          indexes: Optional[Dict[int, SiblingIndex]]):
+        """Write consensus values into the template phases in place.
         
         Matches phases by ID or name instead of index to handle
         cases where LLM returns phases in different order.
         """
-        import copy
+        phase_lists = [wbs.get('wbs', {}).get('phases', []) for wbs in wbs_results]
+        matches = self._match_siblings(phases, phase_lists, indexes, partial_names=True)
         
-        # Get phase structure from first result as template
-        template_phases = wbs_results[0].get('wbs', {}).get('phases', [])
-        consensus_phases = []
-        
-        for template_phase in template_phases:
-            consensus_phase = copy.deepcopy(template_phase)
-            phase_id = template_phase.get('id', '')
-            phase_name = template_phase.get('name', '').lower()
-            
-            # Collect hours for this phase across all results, matching by ID or name
-            phase_hours = []
-            matched_phases_by_result = []
-            
-            for wbs in wbs_results:
-                phases = wbs.get('wbs', {}).get('phases', [])
-                matched_phase = None
-                
-                # First try to match by ID
-                for p in phases:
-                    if p.get('id', '') == phase_id:
-                        matched_phase = p
-                        break
-                
-                # Fallback: match by name similarity
-                if matched_phase is None and phase_name:
-                    for p in phases:
-                        if p.get('name', '').lower() == phase_name:
-                            matched_phase = p
-                            break
-                
-                # Last fallback: partial name match
-                if matched_phase is None and phase_name:
-                    for p in phases:
-                        p_name = p.get('name', '').lower()
-                        if phase_name in p_name or p_name in phase_name:
-                            matched_phase = p
-                            break
-                
-                if matched_phase:
-                    hours = matched_phase.get('estimated_hours', 0)
-                    if hours > 0:
-                        phase_hours.append(hours)
-                    matched_phases_by_result.append(matched_phase)
-            
-            if phase_hours:
-                if method == 'median':
-                    consensus_phase['estimated_hours'] = round(statistics.median(phase_hours))
-                else:
-                    consensus_phase['estimated_hours'] = round(statistics.mean(phase_hours))
+        for phase, matched_phases in zip(phases, matches):
+            hours = self._consensus_hours(matched_phases, method)
+            if hours is not None:
+                phase['estimated_hours'] = hours
             
-            # Calculate duration from hours
-            hours = consensus_phase.get('estimated_hours', 0)
-            days = max(1, round(hours / 8))
-            consensus_phase['duration'] = f"{days} дней"
+            # Durations are derived once the hours are final, in _normalize_wbs
             
             # Consensus for work packages using matched phases
-            if 'work_packages' in consensus_phase and matched_phases_by_result:
-                consensus_phase['work_packages'] = self._consensus_work_packages_by_match(
-                    matched_phases_by_result, method
+            if 'work_packages' in phase and matched_phases:
+                self._consensus_work_packages_by_match(
+                    phase['work_packages'], matched_phases, method, indexes
                 )
-            
-            consensus_phases.append(consensus_phase)
-        
-        return consensus_phases
     
-    def _consensus_work_packages_by_match(self, matched_phases: List[Dict[str, Any]], 
-                                          method: str) -> List[Dict[str, Any]]:
-        """Calculate consensus for work packages using matched phases.
+    def _consensus_work_packages_by_match(self, work_packages: List[Dict[str, Any]],
+                                          matched_phases: List[Dict[str, Any]], 
+                                          method: str,
+                                          indexes: Optional[Dict[int, SiblingIndex]]):
+        """Write consensus values into template work packages in place.
         
         Matches work packages by ID or name instead of index.
         
         Args:
+            work_packages: Template work packages to update
             matched_phases: List of phase dicts that were matched across results
             method: Consensus method
-            
-        Returns:
-            List of consensus work packages
+            indexes: Sibling indexes from _index_tree, or None to match by position
         """
-        import copy
+        wp_lists = [phase.get('work_packages', []) for phase in matched_phases]
         
-        if not matched_phases:
-            return []
-        
-        # Use first matched phase as template
-        template_wps = matched_phases[0].get('work_packages', [])
-        consensus_wps = []
-        
-        for template_wp in template_wps:
-            consensus_wp = copy.deepcopy(template_wp)
-            wp_id = template_wp.get('id', '')
-            wp_name = template_wp.get('name', '').lower()
-            
-            # Collect hours for this work package across all matched phases
-            wp_hours = []
-            matched_wps = []
-            
-            for phase in matched_phases:
-                wps = phase.get('work_packages', [])
-                matched_wp = None
-                
-                # Match by ID first
-                for wp in wps:
-                    if wp.get('id', '') == wp_id:
-                        matched_wp = wp
-                        break
-                
-                # Fallback: match by name
-                if matched_wp is None and wp_name:
-                    for wp in wps:
-                        if wp.get('name', '').lower() == wp_name:
-                            matched_wp = wp
-                            break
-                
-                if matched_wp:
-                    hours = matched_wp.get('estimated_hours', 0)
-                    if hours > 0:
-                        wp_hours.append(hours)
-                    matched_wps.append(matched_wp)
-            
-            if wp_hours:
-                if method == 'median':
-                    consensus_wp['estimated_hours'] = round(statistics.median(wp_hours))
-                else:
-                    consensus_wp['estimated_hours'] = round(statistics.mean(wp_hours))
+        for wp, matched_wps in zip(work_packages, self._match_siblings(work_packages, wp_lists, indexes)):
+            hours = self._consensus_hours(matched_wps, method)
+            if hours is not None:
+                wp['estimated_hours'] = hours
             
             # Consensus for tasks using matched work packages
-            if 'tasks' in consensus_wp and matched_wps:
-                consensus_wp['tasks'] = self._consensus_tasks_by_match(
-                    matched_wps, method
-                )
-            
-            consensus_wps.append(consensus_wp)
-        
-        return consensus_wps
+            if 'tasks' in wp and matched_wps:
+                self._consensus_tasks_by_match(wp['tasks'], matched_wps, method, indexes)
     
-    def _consensus_tasks_by_match(self, matched_wps: List[Dict[str, Any]], 
-                                   method: str) -> List[Dict[str, Any]]:
-        """Calculate consensus for tasks using matched work packages.
+    def _consensus_tasks_by_match(self, tasks: List[Dict[str, Any]],
+                                   matched_wps: List[Dict[str, Any]], 
+                                   method: str,
+                                   indexes: Optional[Dict[int, SiblingIndex]]):
+        """Write consensus values into template tasks in place.
         
         Matches tasks by ID or name instead of index.
         
         Args:
+            tasks: Template tasks to update
             matched_wps: List of work package dicts matched across results
             method: Consensus method
-            
-        Returns:
-            List of consensus tasks
+            indexes: Sibling indexes from _index_tree, or None to match by position
         """
-        import copy
+        task_lists = [wp.get('tasks', []) for wp in matched_wps]
         
-        if not matched_wps:
-            return []
-        
-        # Use first matched WP as template
-        template_tasks = matched_wps[0].get('tasks', [])
-        consensus_tasks = []
-        
-        for template_task in template_tasks:
-            consensus_task = copy.deepcopy(template_task)
-            task_id = template_task.get('id', '')
-            task_name = template_task.get('name', '').lower()
-            
-            # Collect hours for this task across all matched WPs
-            task_hours = []
-            
-            for wp in matched_wps:
-                tasks = wp.get('tasks', [])
-                matched_task = None
-                
-                # Match by ID first
-                for t in tasks:
-                    if t.get('id', '') == task_id:
-                        matched_task = t
-                        break
-                
-                # Fallback: match by name
-                if matched_task is None and task_name:
-                    for t in tasks:
-                        if t.get('name', '').lower() == task_name:
-                            matched_task = t
-                            break
-                
-                if matched_task:
-                    hours = matched_task.get('estimated_hours', 0)
-                    if hours > 0:
-                        task_hours.append(hours)
-            
-            if task_hours:
-                if method == 'median':
-                    consensus_task['estimated_hours'] = round(statistics.median(task_hours))
-                else:
-                    consensus_task['estimated_hours'] = round(statistics.mean(task_hours))
+        for task, matched_tasks in zip(tasks, self._match_siblings(tasks, task_lists, indexes)):
+            hours = self._consensus_hours(matched_tasks, method)
+            if hours is not None:
+                task['estimated_hours'] = hours
             
             # Normalize task hours
-            task_name_orig = consensus_task.get('name', '')
-            consensus_task['estimated_hours'] = self.rules.normalize_hours(
-                consensus_task.get('estimated_hours', 0), task_name_orig
+            task['estimated_hours'] = self.rules.normalize_hours(
+                task.get('estimated_hours', 0), task.get('name', '')
             )
+    
+    @staticmethod
+    def _match_siblings(template_nodes: List[Dict[str, Any]],
+                        sibling_lists: List[List[Dict[str, Any]]],
+                        indexes: Optional[Dict[int, SiblingIndex]],
+                        partial_names: bool = False) -> List[List[Dict[str, Any]]]:
+        """Match each template node against every list of sibling nodes.
+        
+        Sibling lists are looked up in the pre-built tree index (lists that
+        are not part of it are indexed on the spot), so a template node is
+        matched with dictionary lookups instead of scanning the siblings of
+        every result again. The first node wins on duplicate IDs or names,
+        exactly as a linear scan would. Without indexes, all lists share the
+        template's structure and nodes are paired by position.
+        
+        Args:
+            template_nodes: Nodes whose counterparts are looked up
+            sibling_lists: Sibling nodes at the same level, one list per result
+            indexes: Sibling indexes from _index_tree, or None to match by position
+            partial_names: Fall back to substring name matching
             
-            consensus_tasks.append(consensus_task)
+        Returns:
+            Matched nodes per template node, in result order
+        """
+        if indexes is None:
+            return [
+                [nodes[i] for nodes in sibling_lists if nodes[i]]
+                for i in range(len(template_nodes))
+            ]
+        
+        indexed = [indexes.get(id(nodes)) or _index_nodes(nodes) for nodes in sibling_lists]
+        matches = []
+        
+        for template in template_nodes:
+            node_id = template.get('id', '')
+            name = template.get('name', '').lower()
+            matched = []
+            
+            for index in indexed:
+                node = index.by_id.get(node_id)
+                if node is None and name:
+                    node = index.by_name.get(name)
+                    if node is None and partial_names:
+                        node = next(
+                            (n for n_name, n in index.names if name in n_name or n_name in name),
+                            None
+                        )
+                if node:
+                    matched.append(node)
+            
+            matches.append(matched)
         
-        return consensus_tasks
+        return matches
+    
+    @staticmethod
+    def _consensus_hours(nodes: List[Dict[str, Any]], method: str) -> Optional[int]:
+        """Reduce the positive hours of matched nodes to one consensus value.
+        
+        Args:
+            nodes: Matched nodes across results
+            method: Consensus method ('median' or mean for anything else)
+            
+        Returns:
+            Rounded consensus hours, or None if no node has positive hours
+        """
+        hours = []
+        for node in nodes:
+            h = node.get('estimated_hours', 0)
+            if h > 0:
+                hours.append(h)
+        if len(hours) < 2:
+            # Nothing to reduce when at most one result has hours for the node
+            return round(hours[0]) if hours else None
+        if method == 'median':
+            return round(float_median(hours))
+        return round(float_mean(hours))
     
     @staticmethod
     def _coerce_to_number(value, default: float = 0) -> float:
@@ -476,8 +616,7 @@ class ResultStabilizer:
         if isinstance(value, (int, float)):
             return float(value)
         if isinstance(value, str):
-            import re
-            match = re.search(r'[\d.]+', value)
+            match = _NUMBER_RE.search(value)
             if match:
                 try:
                     return float(match.group())
@@ -486,16 +625,20 @@ class ResultStabilizer:
         return default
     
     def _normalize_wbs(self, wbs: Dict[str, Any]) -> Dict[str, Any]:
-        """Normalize WBS values according to rules with bottom-up recalculation."""
-        import copy
-        import math
-        normalized = copy.deepcopy(wbs)
+        """Normalize WBS values according to rules with bottom-up recalculation.
         
-        limits = self.rules.rules.get("limits", {})
-        min_task = limits.get("min_hours_per_task", 2)
-        max_task = limits.get("max_hours_per_task", 80)
-        min_phase = limits.get("min_hours_per_phase", 8)
-        max_phase = limits.get("max_hours_per_phase", 500)
+        Task hours are clamped to the task limits and rounded first; every
+        parent is then the exact sum of its rounded children, so the project
+        total always equals the sum of the task hours shown. Phase limits
+        only apply to phases without work packages.
+        
+        Works in place: the consensus passed in is already a private copy.
+        """
+        normalized = wbs
+        
+        min_task = self.rules.min_hours_per_task
+        min_phase = self.rules.min_hours_per_phase
+        max_phase = self.rules.max_hours_per_phase
         
         # Normalize phases with bottom-up recalculation
         total_hours = 0
@@ -511,14 +654,14 @@ class ResultStabilizer:
                     for task in wp.get('tasks', []):
                         task_hours = self._coerce_to_number(task.get('estimated_hours', 0))
                         task_name = task.get('name', '')
-                        task_hours = self.rules.normalize_hours(task_hours, task_name)
-                        task['estimated_hours'] = round(task_hours)
+                        task_hours = round(self.rules.normalize_hours(task_hours, task_name))
+                        task['estimated_hours'] = task_hours
                         task['duration_days'] = math.ceil(task_hours / 8)
                         wp_hours_sum += task_hours
                     
                     # Bottom-up: WP hours = sum of task hours
                     if wp.get('tasks'):
-                        wp['estimated_hours'] = round(wp_hours_sum)
+                        wp['estimated_hours'] = wp_hours_sum
                     else:
                         wp_hours = self._coerce_to_number(wp.get('estimated_hours', 0))
                         wp['estimated_hours'] = round(max(min_task, wp_hours))
@@ -526,21 +669,23 @@ class ResultStabilizer:
                     wp['duration_days'] = math.ceil(wp['estimated_hours'] / 8)
                     phase_hours_sum += wp['estimated_hours']
                 
-                # Bottom-up: phase hours = sum of WP hours
+                # Bottom-up: phase hours = sum of WP hours; clamping the sum
+                # would break the total, so limits only apply to leaf phases
                 if phase.get('work_packages'):
                     phase_hours = phase_hours_sum
                 else:
                     phase_hours = self._coerce_to_number(phase.get('estimated_hours', 0))
+                    phase_hours = round(max(min_phase, min(max_phase, phase_hours)))
                 
-                phase_hours = max(min_phase, min(max_phase, phase_hours))
-                phase['estimated_hours'] = round(phase_hours)
+                # Sums of rounded children are already whole numbers
+                phase['estimated_hours'] = phase_hours
                 phase_days = math.ceil(phase_hours / 8)
                 phase['duration'] = f"{phase_days} дней"
                 
                 total_hours += phase['estimated_hours']
         
         if 'project_info' in normalized:
-            normalized['project_info']['total_estimated_hours'] = round(total_hours)
+            normalized['project_info']['total_estimated_hours'] = total_hours
             weeks = max(1, round(total_hours / 40))
             normalized['project_info']['estimated_duration'] = f"{weeks} недель"
         
@@ -548,7 +693,8 @@ class ResultStabilizer:
     
     def _calculate_confidence(self, all_results: List[Dict[str, Any]], 
                              filtered_results: List[Dict[str, Any]],
-                             consensus: Dict[str, Any]) -> float:
+                             consensus: Dict[str, Any],
+                             stats: Optional[TotalsStats] = None) -> float:
         """Calculate confidence score for the consensus."""
         if len(all_results) < 2:
             return 1.0
@@ -561,34 +707,58 @@ class ResultStabilizer:
         outlier_penalty = outlier_ratio * 0.2
         
         # Variance penalty
-        totals = [
-            r.get('project_info', {}).get('total_estimated_hours', 0)
-            for r in filtered_results
-        ]
-        totals = [t for t in totals if t > 0]
+        if stats is None:
+            stats = _totals_stats(filtered_results)
         
         variance_penalty = 0
-        if len(totals) > 1:
-            mean = statistics.mean(totals)
-            std = statistics.stdev(totals)
-            cv = std / mean if mean > 0 else 0
+        if len(stats.totals) > 1:
+            cv = stats.stdev / stats.mean if stats.mean > 0 else 0
             variance_penalty = min(0.3, cv * 0.5)
         
         confidence = base_confidence - outlier_penalty - variance_penalty
         return max(0.0, min(1.0, confidence))
     
-    def _calculate_statistics(self, wbs_results: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate statistics for the results."""
+    def partial_confidence(self, wbs_results: List[Dict[str, Any]]) -> float:
+        """Estimate how well the results gathered so far agree.
+        
+        A cheap check used to stop an ensemble early: combines the coefficient
+        of variation of total hours and of phase counts.
+        
+        Args:
+            wbs_results: WBS results collected so far
+            
+        Returns:
+            Agreement score between 0 and 1 (0 when undecidable)
+        """
+        if len(wbs_results) < 2:
+            return 0.0
+        
         totals = [
-            r.get('project_info', {}).get('total_estimated_hours', 0)
+            self._coerce_to_number((r.get('project_info') or {}).get('total_estimated_hours', 0))
             for r in wbs_results
         ]
         totals = [t for t in totals if t > 0]
+        phase_counts = [len((r.get('wbs') or {}).get('phases') or ()) for r in wbs_results]
+        if len(totals) < 2 or not any(phase_counts):
+            return 0.0
+        
+        hours_mean = float_mean(totals)
+        phases_mean = float_mean(phase_counts)
+        hours_cv = float_stdev(totals, hours_mean) / hours_mean
+        phases_cv = float_stdev(phase_counts, phases_mean) / phases_mean
+        return max(0.0, min(1.0, 1.0 - hours_cv - phases_cv))
+    
+    def _calculate_statistics(self, wbs_results: List[Dict[str, Any]],
+                              stats: Optional[TotalsStats] = None) -> Dict[str, Any]:
+        """Calculate statistics for the results."""
+        if stats is None:
+            stats = _totals_stats(wbs_results)
+        totals = stats.totals
         
         if not totals:
             return {}
         
-        stats = {
+        summary = {
             "count": len(totals),
             "min": min(totals),
             "max": max(totals),
@@ -596,17 +766,19 @@ class ResultStabilizer:
         }
         
         if len(totals) > 1:
-            stats["mean"] = round(statistics.mean(totals), 1)
-            stats["median"] = statistics.median(totals)
-            stats["std"] = round(statistics.stdev(totals), 1)
-            stats["cv"] = round(stats["std"] / stats["mean"], 3) if stats["mean"] > 0 else 0
+            summary["mean"] = round(stats.mean, 1)
+            summary["median"] = stats.median
+            summary["std"] = round(stats.stdev, 1)
+            summary["cv"] = round(summary["std"] / summary["mean"], 3) if summary["mean"] > 0 else 0
         
-        return stats
+        return summary
 
 
 class EnsembleGenerator:
     """Generates multiple WBS results for ensemble stabilization."""
     
+    __slots__ = ("generator_func", "stabilizer")
+    
     def __init__(self, generator_func, stabilizer: ResultStabilizer = None):
         """Initialize ensemble generator.
         
@@ -634,34 +806,37 @@ class EnsembleGenerator:
         iterations = iterations or settings.get("ensemble_iterations", 3)
         
         logger.info(f"Starting ensemble generation with {iterations} iterations")
-        start_time = time.time()
+        start_time = time.perf_counter()
         
         results = []
         
-        if parallel and iterations > 1:
-            # Parallel execution
-            with ThreadPoolExecutor(max_workers=min(iterations, 5)) as executor:
-                futures = [
-                    executor.submit(self.generator_func, document_content)
-                    for _ in range(iterations)
-                ]
-                for future in as_completed(futures):
-                    try:
-                        result = future.result()
-                        if result.get('success'):
-                            results.append(result.get('data'))
-                    except Exception as e:
-                        logger.error(f"Error in parallel generation: {e}")
+        if parallel and iterations > 1 and inspect.iscoroutinefunction(self.generator_func):
+            # Concurrent execution of a coroutine generator on one event loop
+            outcomes = asyncio.run(self._gather_async(document_content, iterations))
+            for outcome in outcomes:
+                if isinstance(outcome, Exception):
+                    logger.error("Error in parallel generation: %s", outcome)
+                elif outcome.get('success'):
+                    results.append(outcome.get('data'))
+        elif parallel and iterations > 1:
+            # Parallel execution; generation is I/O-bound, so threads suffice
+            executor = _get_ensemble_pool()
+            for result in executor.map(self._generate_safely,
+                                       itertools.repeat(document_content, iterations)):
+                if result.get('success'):
+                    results.append(result.get('data'))
         else:
             # Sequential execution
             for i in range(iterations):
-                logger.info(f"Ensemble iteration {i + 1}/{iterations}")
+                logger.debug("Ensemble iteration %d/%d", i + 1, iterations)
                 try:
                     result = self.generator_func(document_content)
+                    if inspect.isawaitable(result):
+                        result = asyncio.run(result)
                     if result.get('success'):
                         results.append(result.get('data'))
                 except Exception as e:
-                    logger.error(f"Error in iteration {i + 1}: {e}")
+                    logger.error("Error in iteration %d: %s", i + 1, e)
         
         if not results:
             return {
@@ -672,7 +847,7 @@ class EnsembleGenerator:
         # Stabilize results
         stabilized = self.stabilizer.stabilize(results)
         
-        elapsed_time = time.time() - start_time
+        elapsed_time = time.perf_counter() - start_time
         logger.info(f"Ensemble generation completed in {elapsed_time:.2f}s")
         
         if stabilized["success"]:
@@ -687,3 +862,25 @@ class EnsembleGenerator:
             }
         
         return stabilized
+    
+    def _generate_safely(self, document_content: str) -> Dict[str, Any]:
+        """Run one parallel iteration, turning an exception into a failed result."""
+        try:
+            result = self.generator_func(document_content)
+            if not isinstance(result, dict):
+                raise TypeError(f"generator returned {type(result).__name__}")
+            return result
+        except Exception as e:
+            logger.error("Error in parallel generation: %s", e)
+            return {"success": False, "error": str(e)}
+    
+    async def _gather_async(self, document_content: str, iterations: int) -> List[Any]:
+        """Await all iterations of a coroutine generator concurrently.
+        
+        Exceptions are returned in place of results so one failed
+        iteration does not cancel the others.
+        """
+        return await asyncio.gather(
+            *(self.generator_func(document_content) for _ in range(iterations)),
+            return_exceptions=True
+        )
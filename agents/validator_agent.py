@@ -2,17 +2,93 @@
 Validator Agent.
 Validates and normalizes WBS results for consistency and realism.
 """
+import functools
 import logging
 import json
-import statistics
+import math
+import re
+from itertools import zip_longest
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Collection, Dict, Any, List, Mapping, Optional, Tuple
 from config import Config
-from wbs_utils import canonicalize_wbs_result
+from wbs_utils import canonicalize_wbs_result, copy_wbs_nodes, float_mean, float_median, float_stdev
 from .base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
+_NUMBER_RE = re.compile(r'[\d.]+')
+# Fill value for variants with fewer phases than the consensus template
+_NO_PHASE = object()
+
+_VALIDATOR_SYSTEM_PROMPT = """Ты — опытный QA инженер и проектный аналитик. Твоя задача — проверять Work Breakdown Structure (WBS) на корректность, реалистичность и полноту.
+
+ОТВЕТ ДОЛЖЕН БЫТЬ ТОЛЬКО В ФОРМАТЕ JSON. НЕ ПИШИ НИЧЕГО КРОМЕ JSON.
+
+Твоя проверка должна включать:
+
+1. **structure_validation** — проверка структуры:
+   - all_phases_present: все ли фазы присутствуют
+   - all_work_packages_have_tasks: есть ли задачи в пакетах работ
+   - dependencies_valid: корректны ли зависимости
+
+2. **estimation_validation** — проверка оценок:
+   - hours_realistic: реалистичны ли оценки трудозатрат
+   - phase_ratios_correct: правильное ли распределение по фазам
+   - total_hours_reasonable: общая оценка в разумных пределах
+
+3. **completeness_validation** — проверка полноты:
+   - all_fields_filled: все ли поля заполнены
+   - deliverables_defined: определены ли результаты
+   - skills_specified: указаны ли требуемые навыки
+
+4. **issues** — найденные проблемы:
+   Массив объектов с полями:
+   - severity: "error" или "warning"
+   - location: где найдена проблема
+   - description: описание проблемы
+   - suggestion: предложение по исправлению
+
+5. **normalized_values** — нормализованные значения:
+   - suggested_total_hours: рекомендуемое общее количество часов
+   - suggested_duration_weeks: рекомендуемая длительность в неделях
+   - adjustments: массив корректировок
+
+Пример ответа:
+{
+  "structure_validation": {
+    "all_phases_present": true,
+    "all_work_packages_have_tasks": true,
+    "dependencies_valid": true
+  },
+  "estimation_validation": {
+    "hours_realistic": false,
+    "phase_ratios_correct": true,
+    "total_hours_reasonable": true,
+    "issues_found": ["Оценки для задач авторизации завышены"]
+  },
+  "completeness_validation": {
+    "all_fields_filled": true,
+    "deliverables_defined": true,
+    "skills_specified": true
+  },
+  "issues": [],
+  "normalized_values": {
+    "suggested_total_hours": 320,
+    "suggested_duration_weeks": 8,
+    "adjustments": []
+  },
+  "confidence_score": 0.85
+}"""
+
+
+def _gap_exceeds(gap: float, reference: float, ratio: float) -> bool:
+    """Return True when gap / max(reference, 1) exceeds ratio.
+    
+    Compared by multiplying the threshold instead of dividing the gap.
+    """
+    return gap > ratio * max(reference, 1)
+
 
 def _load_estimation_rules_from_file() -> Dict[str, Any]:
     """Load estimation rules from the canonical JSON file.
@@ -56,7 +132,7 @@ def _load_estimation_rules_from_file() -> Dict[str, Any]:
             "max_total_hours": limits.get("max_total_hours", 5000),
         }
     except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.warning(f"Could not load estimation rules from file: {e}, using defaults")
+        logger.warning("Could not load estimation rules from file: %s, using defaults", e)
         return {
             "task_templates": {},
             "phase_ratios": {},
@@ -71,8 +147,42 @@ def _load_estimation_rules_from_file() -> Dict[str, Any]:
         }
 
 
-# Load rules from the single source of truth: data/estimation_rules.json
-ESTIMATION_RULES = _load_estimation_rules_from_file()
+def _freeze_rules(value: Any) -> Any:
+    """Return a deeply read-only view of loaded rules.
+    
+    Mappings become MappingProxyType and lists become tuples at every level,
+    so nested templates and baselines cannot be changed in place either.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze_rules(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze_rules(item) for item in value)
+    return value
+
+
+def estimation_rules_to_dict(rules: Any) -> Any:
+    """Copy (possibly read-only) estimation rules into plain dicts and lists.
+    
+    MappingProxyType is not JSON serializable; use this before json.dumps
+    or when a mutable copy to build custom rules from is needed.
+    
+    Args:
+        rules: Estimation rules, e.g. ESTIMATION_RULES
+        
+    Returns:
+        Plain dict/list copy of the rules
+    """
+    if isinstance(rules, Mapping):
+        return {key: estimation_rules_to_dict(item) for key, item in rules.items()}
+    if isinstance(rules, (list, tuple)):
+        return [estimation_rules_to_dict(item) for item in rules]
+    return rules
+
+
+# Load rules from the single source of truth: data/estimation_rules.json.
+# Deeply read-only so a validator cannot change the rules shared by every
+# instance; see estimation_rules_to_dict for a serializable copy.
+ESTIMATION_RULES = _freeze_rules(_load_estimation_rules_from_file())
 
 
 class ValidationResult:
@@ -153,68 +263,50 @@ class ValidatorAgent(BaseAgent):
             role="Проверяет и нормализует результаты WBS для стабильности"
         )
         self.estimation_rules = estimation_rules or ESTIMATION_RULES
+
+    @property
+    def estimation_rules(self) -> Dict[str, Any]:
+        """Estimation rules used for validation and normalization."""
+        return self._estimation_rules
+
+    @estimation_rules.setter
+    def estimation_rules(self, rules: Dict[str, Any]):
+        # Hour limits and template matches are cached from the rules here,
+        # so rules must be replaced by assigning a new mapping, never
+        # mutated in place after assignment
+        self._estimation_rules = rules
+        # Hour limits are read for every phase and task; keep them as attributes
+        self._min_task = rules['min_hours_per_task']
+        self._max_task = rules['max_hours_per_task']
+        self._min_phase = rules['min_hours_per_phase']
+        self._max_phase = rules['max_hours_per_phase']
+        # Lowercase template patterns once instead of on every task check
+        self._task_template_index: Tuple[Tuple[str, Dict[str, Any]], ...] = tuple(
+            (pattern.lower(), template)
+            for pattern, template in rules.get('task_templates', {}).items()
+        )
+        # Task names repeat across refinement rounds and variants; remember
+        # which template each name resolved to for the current rules
+        self._match_task_template = functools.lru_cache(maxsize=2048)(self._find_task_template)
+
+    def _find_task_template(self, task_name: str) -> Optional[Dict[str, Any]]:
+        """Return the first task template whose pattern occurs in the task name.
+        
+        Args:
+            task_name: Task name
+            
+        Returns:
+            Matching template rules or None
+        """
+        name_lower = task_name.lower()
+        for pattern_lower, template in self._task_template_index:
+            if pattern_lower in name_lower:
+                return template
+        return None
     
     def _build_system_prompt(self) -> str:
         """Build the system prompt for the Validator Agent."""
-        return """Ты — опытный QA инженер и проектный аналитик. Твоя задача — проверять Work Breakdown Structure (WBS) на корректность, реалистичность и полноту.
-
-ОТВЕТ ДОЛЖЕН БЫТЬ ТОЛЬКО В ФОРМАТЕ JSON. НЕ ПИШИ НИЧЕГО КРОМЕ JSON.
-
-Твоя проверка должна включать:
-
-1. **structure_validation** — проверка структуры:
-   - all_phases_present: все ли фазы присутствуют
-   - all_work_packages_have_tasks: есть ли задачи в пакетах работ
-   - dependencies_valid: корректны ли зависимости
-
-2. **estimation_validation** — проверка оценок:
-   - hours_realistic: реалистичны ли оценки трудозатрат
-   - phase_ratios_correct: правильное ли распределение по фазам
-   - total_hours_reasonable: общая оценка в разумных пределах
-
-3. **completeness_validation** — проверка полноты:
-   - all_fields_filled: все ли поля заполнены
-   - deliverables_defined: определены ли результаты
-   - skills_specified: указаны ли требуемые навыки
-
-4. **issues** — найденные проблемы:
-   Массив объектов с полями:
-   - severity: "error" или "warning"
-   - location: где найдена проблема
-   - description: описание проблемы
-   - suggestion: предложение по исправлению
-
-5. **normalized_values** — нормализованные значения:
-   - suggested_total_hours: рекомендуемое общее количество часов
-   - suggested_duration_weeks: рекомендуемая длительность в неделях
-   - adjustments: массив корректировок
-
-Пример ответа:
-{
-  "structure_validation": {
-    "all_phases_present": true,
-    "all_work_packages_have_tasks": true,
-    "dependencies_valid": true
-  },
-  "estimation_validation": {
-    "hours_realistic": false,
-    "phase_ratios_correct": true,
-    "total_hours_reasonable": true,
-    "issues_found": ["Оценки для задач авторизации завышены"]
-  },
-  "completeness_validation": {
-    "all_fields_filled": true,
-    "deliverables_defined": true,
-    "skills_specified": true
-  },
-  "issues": [],
-  "normalized_values": {
-    "suggested_total_hours": 320,
-    "suggested_duration_weeks": 8,
-    "adjustments": []
-  },
-  "confidence_score": 0.85
-}"""
+        return _VALIDATOR_SYSTEM_PROMPT
 
     def validate_wbs(self, wbs: Dict[str, Any]) -> ValidationResult:
         """Validate WBS structure and content.
@@ -226,7 +318,8 @@ class ValidatorAgent(BaseAgent):
             ValidationResult with details
         """
         result = ValidationResult()
-        wbs = canonicalize_wbs_result(wbs)
+        # Validation only reads the tree, so the node skeleton copy is enough
+        wbs = canonicalize_wbs_result(wbs, deep=False)
         
         # Check basic structure
         if 'wbs' not in wbs:
@@ -239,24 +332,32 @@ class ValidatorAgent(BaseAgent):
         
         phases = wbs['wbs'].get('phases', [])
         
-        # Validate each phase
+        # Validate each phase, collecting the phase hour sum and task count
+        # in the same pass so the checks below need not walk the tree again
+        actual_total = 0.0
+        total_tasks = 0
         for phase in phases:
-            self._validate_phase(phase, result)
+            total_tasks += self._validate_phase(phase, result)
+            actual_total += self._coerce_to_number(phase.get('estimated_hours', 0))
         
         # Validate project info
         self._validate_project_info(wbs.get('project_info', {}), result)
         
         # Validate total hours consistency
-        self._validate_total_hours(wbs, result)
+        self._validate_total_hours(wbs, result, actual_total)
         
         # Calculate confidence score
-        result.confidence_score = self._calculate_confidence(result, wbs)
+        result.confidence_score = self._calculate_confidence(result, wbs, actual_total, total_tasks)
         self._record_intermediate("validation_completed", result.to_dict())
         
         return result
     
-    def _validate_phase(self, phase: Dict[str, Any], result: ValidationResult):
-        """Validate a single phase."""
+    def _validate_phase(self, phase: Dict[str, Any], result: ValidationResult) -> int:
+        """Validate a single phase.
+        
+        Returns:
+            Number of tasks in the phase
+        """
         phase_id = phase.get('id', 'unknown')
         phase_name = phase.get('name', 'unnamed')
         location = f"phase[{phase_id}]"
@@ -269,27 +370,33 @@ class ValidatorAgent(BaseAgent):
         
         # Validate hours
         hours = phase.get('estimated_hours', 0)
-        if hours < self.estimation_rules['min_hours_per_phase']:
+        if hours < self._min_phase:
             result.add_warning("estimation", 
                              f"Phase hours ({hours}) below minimum", location)
-        elif hours > self.estimation_rules['max_hours_per_phase']:
+        elif hours > self._max_phase:
             result.add_issue("estimation", 
                            f"Phase hours ({hours}) exceed maximum", location,
                            current_value=hours,
-                           suggested_value=self.estimation_rules['max_hours_per_phase'])
+                           suggested_value=self._max_phase)
         
         # Validate work packages
         work_packages = phase.get('work_packages', [])
         if not work_packages:
             result.add_issue("structure", "Phase has no work packages", location)
-            return
+            return 0
         
+        task_count = 0
         for wp in work_packages:
-            self._validate_work_package(wp, location, result)
+            task_count += self._validate_work_package(wp, location, result)
+        return task_count
     
     def _validate_work_package(self, wp: Dict[str, Any], 
-                               parent_location: str, result: ValidationResult):
-        """Validate a work package."""
+                               parent_location: str, result: ValidationResult) -> int:
+        """Validate a work package.
+        
+        Returns:
+            Number of tasks in the work package
+        """
         wp_id = wp.get('id', 'unknown')
         location = f"{parent_location}.wp[{wp_id}]"
         wp_requirement_ids = [req_id for req_id in wp.get('requirement_ids', []) if req_id]
@@ -301,26 +408,34 @@ class ValidatorAgent(BaseAgent):
         tasks = wp.get('tasks', [])
         if not tasks:
             result.add_warning("structure", "Work package has no tasks", location)
-            return
+            return 0
         
-        # Validate each task
+        # Validate each task, summing hours in the same loop; the parent
+        # requirement set is built once instead of once per task
+        wp_requirement_set = frozenset(wp_requirement_ids)
+        validate_task = self._validate_task
+        task_hours_sum = 0
         for task in tasks:
-            self._validate_task(task, location, wp_requirement_ids, result)
+            task_hours_sum += validate_task(task, location, wp_requirement_set, result)
         
         # Check work package hours vs sum of task hours
         wp_hours = wp.get('estimated_hours', 0)
-        task_hours_sum = sum(t.get('estimated_hours', 0) for t in tasks)
         
         if wp_hours > 0 and task_hours_sum > 0:
-            diff_ratio = abs(wp_hours - task_hours_sum) / max(wp_hours, 1)
-            if diff_ratio > 0.3:  # More than 30% difference
+            if _gap_exceeds(abs(wp_hours - task_hours_sum), wp_hours, 0.3):  # More than 30% difference
                 result.add_warning("estimation", 
                     f"WP hours ({wp_hours}) differ from sum of tasks ({task_hours_sum})",
                     location)
+        return len(tasks)
     
     def _validate_task(self, task: Dict[str, Any], 
-                       parent_location: str, wp_requirement_ids: List[str], result: ValidationResult):
-        """Validate a single task."""
+                       parent_location: str, wp_requirement_ids: Collection[str],
+                       result: ValidationResult) -> float:
+        """Validate a single task.
+        
+        Returns:
+            The task's estimated_hours, for the parent work package sum
+        """
         task_id = task.get('id', 'unknown')
         task_name = task.get('name', '')
         location = f"{parent_location}.task[{task_id}]"
@@ -328,7 +443,7 @@ class ValidatorAgent(BaseAgent):
 
         if not task_requirement_ids:
             result.add_issue("traceability", "Task has no requirement_ids", location)
-        elif wp_requirement_ids and not set(task_requirement_ids).issubset(set(wp_requirement_ids)):
+        elif wp_requirement_ids and not set(task_requirement_ids).issubset(wp_requirement_ids):
             result.add_issue(
                 "traceability",
                 "Task requirement_ids must be a subset of the parent work package requirement_ids",
@@ -338,31 +453,30 @@ class ValidatorAgent(BaseAgent):
         hours = task.get('estimated_hours', 0)
         
         # Check minimum hours
-        if hours < self.estimation_rules['min_hours_per_task']:
+        if hours < self._min_task:
             result.add_correction(
                 location, "estimated_hours", hours,
-                self.estimation_rules['min_hours_per_task'],
-                f"Hours below minimum ({hours} < {self.estimation_rules['min_hours_per_task']})"
+                self._min_task,
+                f"Hours below minimum ({hours} < {self._min_task})"
             )
         
         # Check maximum hours
-        if hours > self.estimation_rules['max_hours_per_task']:
+        if hours > self._max_task:
             result.add_correction(
                 location, "estimated_hours", hours,
-                self.estimation_rules['max_hours_per_task'],
-                f"Hours exceed maximum ({hours} > {self.estimation_rules['max_hours_per_task']})"
+                self._max_task,
+                f"Hours exceed maximum ({hours} > {self._max_task})"
             )
         
         # Check against estimation rules for task type
-        if task_name:
-            for pattern, rules in self.estimation_rules['task_templates'].items():
-                if pattern.lower() in task_name.lower():
-                    if hours < rules['min_hours'] or hours > rules['max_hours']:
-                        result.add_warning("estimation",
-                            f"Task '{task_name}' hours ({hours}) outside typical range "
-                            f"({rules['min_hours']}-{rules['max_hours']})",
-                            location)
-                    break
+        rules = self._match_task_template(task_name) if task_name else None
+        if rules is not None:
+            if hours < rules['min_hours'] or hours > rules['max_hours']:
+                result.add_warning("estimation",
+                    f"Task '{task_name}' hours ({hours}) outside typical range "
+                    f"({rules['min_hours']}-{rules['max_hours']})",
+                    location)
+        return hours
     
     def _validate_project_info(self, project_info: Dict[str, Any], 
                                result: ValidationResult):
@@ -427,17 +541,24 @@ class ValidatorAgent(BaseAgent):
 
         return adjusted_min, adjusted_max, adjusted_baseline
 
-    def _validate_total_hours(self, wbs: Dict[str, Any], result: ValidationResult):
-        """Validate total hours consistency."""
+    def _validate_total_hours(self, wbs: Dict[str, Any], result: ValidationResult,
+                              actual_total: Optional[float] = None):
+        """Validate total hours consistency.
+        
+        Args:
+            wbs: WBS being validated
+            result: Validation result to update
+            actual_total: Precomputed sum of phase hours (calculated if omitted)
+        """
         project_info = wbs.get('project_info', {})
         declared_total = self._coerce_to_number(project_info.get('total_estimated_hours', 0))
         
         # Calculate actual sum
-        actual_total = self._calculate_actual_total_hours(wbs)
+        if actual_total is None:
+            actual_total = self._calculate_actual_total_hours(wbs)
         
         if declared_total > 0 and actual_total > 0:
-            diff_ratio = abs(declared_total - actual_total) / max(declared_total, 1)
-            if diff_ratio > 0.2:  # More than 20% difference
+            if _gap_exceeds(abs(declared_total - actual_total), declared_total, 0.2):  # More than 20% difference
                 result.add_warning("estimation",
                     f"Declared total ({declared_total}) differs from sum of phases ({actual_total})",
                     "project_info")
@@ -472,11 +593,11 @@ class ValidatorAgent(BaseAgent):
                     f"'{project_type}' with complexity '{complexity}' ({expected_min}-{expected_max})"
                 )
                 if total_for_rules < expected_min:
-                    gap_ratio = (expected_min - total_for_rules) / max(expected_min, 1)
+                    gap, reference = expected_min - total_for_rules, expected_min
                 else:
-                    gap_ratio = (total_for_rules - expected_max) / max(expected_max, 1)
+                    gap, reference = total_for_rules - expected_max, expected_max
 
-                if gap_ratio >= 0.35:
+                if gap >= 0.35 * max(reference, 1):
                     result.add_issue(
                         "estimation",
                         message,
@@ -488,8 +609,17 @@ class ValidatorAgent(BaseAgent):
                     result.add_warning("estimation", message, "project_info")
     
     def _calculate_confidence(self, result: ValidationResult, 
-                              wbs: Dict[str, Any]) -> float:
-        """Calculate confidence score for the WBS."""
+                              wbs: Dict[str, Any],
+                              actual_total: Optional[float] = None,
+                              total_tasks: Optional[int] = None) -> float:
+        """Calculate confidence score for the WBS.
+        
+        Args:
+            result: Validation result with issues and warnings
+            wbs: WBS being validated
+            actual_total: Precomputed sum of phase hours (calculated if omitted)
+            total_tasks: Precomputed task count (counted if omitted)
+        """
         base_score = 1.0
         
         # Deduct for issues
@@ -502,16 +632,19 @@ class ValidatorAgent(BaseAgent):
             base_score -= 0.1
         
         # Check for tasks
-        total_tasks = 0
-        for phase in phases:
-            for wp in phase.get('work_packages', []):
-                total_tasks += len(wp.get('tasks', []))
+        if total_tasks is None:
+            total_tasks = 0
+            for phase in phases:
+                for wp in phase.get('work_packages', []):
+                    total_tasks += len(wp.get('tasks', []))
         
         if total_tasks < 5:
             base_score -= 0.1
 
         project_info = wbs.get('project_info', {})
-        total_hours = self._calculate_actual_total_hours(wbs) or self._coerce_to_number(
+        if actual_total is None:
+            actual_total = self._calculate_actual_total_hours(wbs)
+        total_hours = actual_total or self._coerce_to_number(
             project_info.get('total_estimated_hours', 0)
         )
         expected_range = self._expected_total_hours_range(project_info)
@@ -539,8 +672,7 @@ class ValidatorAgent(BaseAgent):
             return float(value)
         if isinstance(value, str):
             # Extract first number from string like "16 часов", "2-3 дня", etc.
-            import re
-            match = re.search(r'[\d.]+', value)
+            match = _NUMBER_RE.search(value)
             if match:
                 try:
                     return float(match.group())
@@ -557,20 +689,23 @@ class ValidatorAgent(BaseAgent):
         3. Recalculate duration_days = ceil(estimated_hours / 8)
         4. Bottom-up recalculation: tasks → work_packages → phases → total
         
+        Task hours are rounded before summing and every parent is the exact
+        sum of its children; phase limits only apply to phases without work
+        packages. ResultStabilizer._normalize_wbs follows the same rules, so
+        single and ensemble runs report the same totals for the same WBS.
+        
         Args:
             wbs: WBS to normalize
             
         Returns:
             Normalized WBS
         """
-        import copy
-        import math
-        normalized = canonicalize_wbs_result(wbs)
+        normalized = canonicalize_wbs_result(wbs, deep=False)
         
-        min_task = self.estimation_rules['min_hours_per_task']
-        max_task = self.estimation_rules['max_hours_per_task']
-        min_phase = self.estimation_rules['min_hours_per_phase']
-        max_phase = self.estimation_rules['max_hours_per_phase']
+        min_task = self._min_task
+        max_task = self._max_task
+        min_phase = self._min_phase
+        max_phase = self._max_phase
         
         # Normalize phases with bottom-up recalculation
         total_hours = 0
@@ -587,8 +722,8 @@ class ValidatorAgent(BaseAgent):
                         # Type coercion
                         task_hours = self._coerce_to_number(task.get('estimated_hours', 0))
                         # Clamp to range
-                        task_hours = max(min_task, min(max_task, task_hours))
-                        task['estimated_hours'] = round(task_hours)
+                        task_hours = round(max(min_task, min(max_task, task_hours)))
+                        task['estimated_hours'] = task_hours
                         # Recalculate duration_days
                         task['duration_days'] = math.ceil(task_hours / 8)
                         
@@ -596,10 +731,10 @@ class ValidatorAgent(BaseAgent):
                     
                     # Bottom-up: WP hours = sum of task hours
                     if wp.get('tasks'):
-                        wp_hours = wp_hours_sum
+                        wp['estimated_hours'] = wp_hours_sum
                     else:
                         wp_hours = self._coerce_to_number(wp.get('estimated_hours', 0))
-                    wp['estimated_hours'] = round(max(min_task, wp_hours))
+                        wp['estimated_hours'] = round(max(min_task, wp_hours))
 
                     if not wp.get('requirement_ids'):
                         inherited_requirement_ids = []
@@ -633,15 +768,15 @@ class ValidatorAgent(BaseAgent):
                     
                     phase_hours_sum += wp['estimated_hours']
                 
-                # Bottom-up: phase hours = sum of WP hours
+                # Bottom-up: phase hours = sum of WP hours; clamping the sum
+                # would break the total, so limits only apply to leaf phases
                 if phase.get('work_packages'):
                     phase_hours = phase_hours_sum
                 else:
                     phase_hours = self._coerce_to_number(phase.get('estimated_hours', 0))
+                    phase_hours = round(max(min_phase, min(max_phase, phase_hours)))
                 
-                # Clamp phase hours
-                phase_hours = max(min_phase, min(max_phase, phase_hours))
-                phase['estimated_hours'] = round(phase_hours)
+                phase['estimated_hours'] = phase_hours
                 
                 # Recalculate phase duration
                 phase_days = math.ceil(phase_hours / 8)
@@ -671,14 +806,14 @@ class ValidatorAgent(BaseAgent):
             return {"consistent": True, "message": "Only one WBS provided"}
         
         # Extract totals
-        totals = []
-        for wbs in wbs_list:
-            total = wbs.get('project_info', {}).get('total_estimated_hours', 0)
-            totals.append(total)
-        
-        # Calculate statistics
-        mean_total = statistics.mean(totals)
-        std_total = statistics.stdev(totals) if len(totals) > 1 else 0
+        totals = [wbs.get('project_info', {}).get('total_estimated_hours', 0) for wbs in wbs_list]
+        min_total = min(totals)
+        max_total = max(totals)
+        
+        # Calculate statistics with plain float arithmetic (statistics.mean/stdev
+        # use exact rational arithmetic and are far slower)
+        mean_total = float_mean(totals)
+        std_total = float_stdev(totals, mean_total) if len(totals) > 1 else 0
         cv = std_total / mean_total if mean_total > 0 else 0  # Coefficient of variation
         
         # Check consistency (CV < 0.2 is considered consistent)
@@ -689,9 +824,9 @@ class ValidatorAgent(BaseAgent):
             "coefficient_of_variation": round(cv, 3),
             "mean_hours": round(mean_total, 1),
             "std_hours": round(std_total, 1),
-            "min_hours": min(totals),
-            "max_hours": max(totals),
-            "range_hours": max(totals) - min(totals),
+            "min_hours": min_total,
+            "max_hours": max_total,
+            "range_hours": max_total - min_total,
             "values": totals,
             "message": "Results are consistent" if is_consistent else 
                       f"High variance in results (CV={cv:.2f})"
@@ -715,14 +850,13 @@ class ValidatorAgent(BaseAgent):
         if len(wbs_list) == 1:
             return wbs_list[0]
         
-        # Start with the first WBS as template
-        import copy
-        consensus = copy.deepcopy(wbs_list[0])
+        # Start with the first WBS as template; only node fields are rewritten
+        consensus = copy_wbs_nodes(wbs_list[0])
         
         # Collect all totals for median calculation
         totals = [wbs.get('project_info', {}).get('total_estimated_hours', 0) 
                   for wbs in wbs_list]
-        median_total = statistics.median(totals)
+        median_total = float_median(totals)
         
         # Apply median total
         if 'project_info' in consensus:
@@ -732,15 +866,17 @@ class ValidatorAgent(BaseAgent):
         
         # Normalize phases using median values
         if 'wbs' in consensus and 'phases' in consensus['wbs']:
-            for i, phase in enumerate(consensus['wbs']['phases']):
-                phase_hours = []
-                for wbs in wbs_list:
-                    phases = wbs.get('wbs', {}).get('phases', [])
-                    if i < len(phases):
-                        phase_hours.append(phases[i].get('estimated_hours', 0))
+            # Build the variants x phases hour matrix once and walk it by column
+            hour_rows = [
+                [phase.get('estimated_hours', 0) for phase in wbs.get('wbs', {}).get('phases', [])]
+                for wbs in wbs_list
+            ]
+            hour_columns = zip_longest(*hour_rows, fillvalue=_NO_PHASE)
+            for phase, column in zip(consensus['wbs']['phases'], hour_columns):
+                phase_hours = [hours for hours in column if hours is not _NO_PHASE]
                 
                 if phase_hours:
-                    phase['estimated_hours'] = statistics.median(phase_hours)
+                    phase['estimated_hours'] = float_median(phase_hours)
         
         return consensus
     
@@ -782,7 +918,7 @@ class ValidatorAgent(BaseAgent):
 ВЕРНИ ТОЛЬКО JSON БЕЗ КАКИХ-ЛИБО ДОПОЛНИТЕЛЬНЫХ КОММЕНТАРИЕВ.
 
 WBS:
-{json.dumps(compact_wbs, ensure_ascii=False, indent=2)}
+{self._serialize_for_prompt(compact_wbs)}
 
 JSON:"""
         
@@ -1,17 +1,21 @@
 """
 Flask backend application for Technical Specification Analyzer.
 """
+import atexit
 import copy
 import hmac
 import os
 import json
 import logging
+import queue
 import re
 import secrets
 import time
 import uuid
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Optional
 
 from flask import Flask, render_template, request, jsonify, redirect, send_file, send_from_directory, session, Response
 from werkzeug.utils import secure_filename
@@ -26,14 +30,24 @@ from rate_limiter import get_rate_limiter
 from job_worker import JobWorker
 
 
-# Configure logging
+# Configure logging. Request threads only enqueue records; a background
+# listener formats them and writes to the console and app.log.
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.StreamHandler(),
+    logging.FileHandler('app.log', encoding='utf-8')
+]
+for _log_handler in _log_handlers:
+    _log_handler.setFormatter(_log_formatter)
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, *_log_handlers)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('app.log', encoding='utf-8')
-    ]
+    level=getattr(logging, Config.LOG_LEVEL, logging.INFO),
+    handlers=[_queue_handler]
 )
 logger = logging.getLogger(__name__)
 
@@ -65,6 +79,14 @@ def _close_uploaded_file(uploaded_file, request_id: str):
         logger.warning("[%s] Failed to close uploaded file stream: %s", request_id, close_error)
 
 
+def _parse_event_offset(last_event_id: Optional[str]) -> int:
+    """Return the progress log offset encoded in an SSE Last-Event-ID header."""
+    try:
+        return max(0, int(last_event_id or 0))
+    except ValueError:
+        return 0
+
+
 def _save_uploaded_file(uploaded_file, upload_folder: str, saved_filename: str, request_id: str) -> tuple[str, int]:
     """Persist the upload and return an absolute path plus file size."""
     upload_dir = os.path.abspath(upload_folder)
@@ -109,7 +131,8 @@ def create_app(config_class=Config):
     # File-based result storage with TTL cleanup
     store = get_result_store(
         storage_dir=app.config['RESULTS_STORAGE_DIR'],
-        ttl_seconds=app.config['RESULT_TTL_SECONDS']
+        ttl_seconds=app.config['RESULT_TTL_SECONDS'],
+        max_entries=app.config['RESULT_MAX_ENTRIES']
     )
     progress_store = get_progress_store(
         storage_root=app.config['PROGRESS_STORAGE_DIR'],
@@ -815,7 +838,10 @@ def create_app(config_class=Config):
     @app.route('/upload', methods=['POST'])
     def upload_file():
         """Handle file upload — starts background processing and returns task_id."""
-        request_id = str(uuid.uuid4())[:8]
+        # One random UUID per upload: disjoint slices give the short log and
+        # task ids, the full value names the upload and run directory
+        upload_uuid = uuid.uuid4()
+        request_id = upload_uuid.hex[:8]
         logger.info(f"[{request_id}] Starting file upload process")
         
         # Check if file was uploaded
@@ -843,9 +869,9 @@ def create_app(config_class=Config):
         try:
             # Generate unique filename
             filename, safe_filename = _prepare_upload_filenames(file.filename)
-            unique_id = str(uuid.uuid4())
-            task_id = str(uuid.uuid4())[:12]
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            unique_id = str(upload_uuid)
+            task_id = upload_uuid.hex[8:20]
+            timestamp = time.strftime('%Y%m%d_%H%M%S')
             saved_filename = f"{timestamp}_{unique_id}_{safe_filename}"
             filepath, file_size = _save_uploaded_file(
                 file,
@@ -939,19 +965,28 @@ def create_app(config_class=Config):
         tracker = progress_store.get(task_id)
         if not tracker:
             return jsonify({'error': 'Task not found', 'status': 404}), 404
+
+        # Each open stream holds a server thread; streams are closed after
+        # SSE_MAX_STREAM_SECONDS so uploads are not starved, and clients
+        # reconnect from the byte offset sent as the SSE event id.
+        start_offset = _parse_event_offset(request.headers.get('Last-Event-ID'))
+        max_stream_seconds = app.config['SSE_MAX_STREAM_SECONDS']
         
         def generate():
             """Generate SSE events from the persisted progress log."""
-            offset = 0
+            offset = start_offset
             last_keepalive = 0.0
+            deadline = time.time() + max_stream_seconds if max_stream_seconds > 0 else None
 
             while True:
                 events, offset = tracker.read_events_since(offset)
 
                 if events:
-                    for event in events:
+                    last_index = len(events) - 1
+                    for index, event in enumerate(events):
                         event_data = json.dumps(event, ensure_ascii=False)
-                        yield f"event: {event['type']}\ndata: {event_data}\n\n"
+                        event_id = f"id: {offset}\n" if index == last_index else ""
+                        yield f"{event_id}event: {event['type']}\ndata: {event_data}\n\n"
 
                         if event['type'] in ('complete', 'error'):
                             progress_store.remove(task_id)
@@ -961,6 +996,11 @@ def create_app(config_class=Config):
 
                 tracker.refresh_state()
                 now = time.time()
+                if deadline is not None and now >= deadline:
+                    # A named event tells the client this close is planned,
+                    # so its reconnect is not counted as a stream failure
+                    yield f"id: {offset}\nevent: reconnect\ndata: {{}}\nretry: 1000\n\n"
+                    return
                 if now - last_keepalive >= 15:
                     yield ": keepalive\n\n"
                     last_keepalive = now
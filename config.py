@@ -41,6 +41,10 @@ class StabilizationConfig:
     # Minimum confidence score to accept result
     MIN_CONFIDENCE_SCORE = float(os.getenv('MIN_CONFIDENCE_SCORE', '0.7'))
     
+    # Stop the ensemble once this many results agree at least this well (1.0 disables)
+    EARLY_STOP_CONFIDENCE = float(os.getenv('EARLY_STOP_CONFIDENCE', '1.0'))
+    MIN_ENSEMBLE_ITERATIONS = int(os.getenv('MIN_ENSEMBLE_ITERATIONS', '2'))
+    
     # Path to estimation rules file
     ESTIMATION_RULES_PATH = os.getenv('ESTIMATION_RULES_PATH', 'data/estimation_rules.json')
 
@@ -53,6 +57,7 @@ class Config:
     # Flask configuration
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
     TESTING = False
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = os.getenv('SESSION_COOKIE_SAMESITE', 'Lax')
@@ -78,7 +83,11 @@ class Config:
     # Set to False if using other LLM APIs (like local LLM servers)
     OPENAI_JSON_MODE = os.getenv('OPENAI_JSON_MODE', 'true').lower() == 'true'
     DEFAULT_LLM_MAX_TOKENS = int(os.getenv('DEFAULT_LLM_MAX_TOKENS', '6000' if SMALL_LLM_MODE else '16000'))
+    # Stream JSON completions and report finished sections while decoding
+    LLM_STREAM_RESPONSES = os.getenv('LLM_STREAM_RESPONSES', 'false').lower() == 'true'
     LLM_MAX_PARALLEL_REQUESTS = int(os.getenv('LLM_MAX_PARALLEL_REQUESTS', '2' if SMALL_LLM_MODE else '4'))
+    # Process-wide worker threads shared by all agents for blocking LLM calls
+    LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', str(max(8, 4 * LLM_MAX_PARALLEL_REQUESTS))))
     ANALYSIS_CHUNK_CHARS = int(os.getenv('ANALYSIS_CHUNK_CHARS', '3500' if SMALL_LLM_MODE else '6000'))
     ANALYSIS_CHUNK_MAX_TOKENS = int(os.getenv('ANALYSIS_CHUNK_MAX_TOKENS', '1500' if SMALL_LLM_MODE else '3000'))
     ANALYSIS_SYNTHESIS_MAX_TOKENS = int(os.getenv('ANALYSIS_SYNTHESIS_MAX_TOKENS', '2500' if SMALL_LLM_MODE else '5000'))
@@ -86,6 +95,8 @@ class Config:
     WBS_TASKS_MAX_TOKENS = int(os.getenv('WBS_TASKS_MAX_TOKENS', '1400' if SMALL_LLM_MODE else '2500'))
     WBS_REFINEMENT_MAX_TOKENS = int(os.getenv('WBS_REFINEMENT_MAX_TOKENS', '2500' if SMALL_LLM_MODE else '5000'))
     VALIDATION_MAX_TOKENS = int(os.getenv('VALIDATION_MAX_TOKENS', '1500' if SMALL_LLM_MODE else '3000'))
+    # Analyses whose WBS skeletons are requested together in create_wbs_batch (1 disables)
+    WBS_SKELETON_BATCH_SIZE = int(os.getenv('WBS_SKELETON_BATCH_SIZE', '1' if SMALL_LLM_MODE else '3'))
     ENABLE_ANALYSIS_SYNTHESIS_LLM = os.getenv(
         'ENABLE_ANALYSIS_SYNTHESIS_LLM',
         'false' if SMALL_LLM_MODE else 'true'
@@ -98,6 +109,28 @@ class Config:
         'ENABLE_LLM_SEMANTIC_VALIDATION',
         'false' if SMALL_LLM_MODE else 'true'
     ).lower() == 'true'
+    # In-process caches of analyst/planner outputs keyed by input hash (0 disables)
+    ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', '32'))
+    WBS_CACHE_SIZE = int(os.getenv('WBS_CACHE_SIZE', '32'))
+    # Optional directory to persist cached analyses across restarts (empty disables)
+    ANALYSIS_CACHE_DIR = os.getenv('ANALYSIS_CACHE_DIR', '')
+    ANALYSIS_CACHE_TTL_SECONDS = int(os.getenv('ANALYSIS_CACHE_TTL_SECONDS', str(7 * 24 * 60 * 60)))
+    # Optional directory to persist planned WBS drafts across restarts (empty disables)
+    WBS_CACHE_DIR = os.getenv('WBS_CACHE_DIR', '')
+    WBS_CACHE_TTL_SECONDS = int(os.getenv('WBS_CACHE_TTL_SECONDS', str(30 * 24 * 60 * 60)))
+    # In-process cache of deterministic (temperature 0) JSON LLM responses (0 disables)
+    LLM_RESPONSE_CACHE_SIZE = int(os.getenv('LLM_RESPONSE_CACHE_SIZE', '128'))
+    # Let identical concurrent deterministic requests share one completion
+    LLM_COALESCE_REQUESTS = os.getenv('LLM_COALESCE_REQUESTS', 'true').lower() == 'true'
+    # Run the analyst once per ensemble and share its output across iterations
+    ENSEMBLE_SHARED_ANALYSIS = os.getenv('ENSEMBLE_SHARED_ANALYSIS', 'true').lower() == 'true'
+    # Orchestrator conversation log: keep at most N entries, optionally without details
+    CONVERSATION_LOG_MAX_ENTRIES = int(os.getenv('CONVERSATION_LOG_MAX_ENTRIES', '1024'))
+    CONVERSATION_LOG_MINIMAL = os.getenv('CONVERSATION_LOG_MINIMAL', 'false').lower() == 'true'
+    # Character budget for an agent's conversation history; oldest turns are dropped first
+    MAX_HISTORY_CHARS = int(os.getenv('MAX_HISTORY_CHARS', '60000'))
+    # Run two perturbed refinement requests in parallel and keep the first valid one
+    ENABLE_SPECULATIVE_REFINEMENT = os.getenv('ENABLE_SPECULATIVE_REFINEMENT', 'false').lower() == 'true'
     SMALL_LLM_ONLY_DEV_LLM_TASKS = os.getenv(
         'SMALL_LLM_ONLY_DEV_LLM_TASKS',
         'true' if SMALL_LLM_MODE else 'false'
@@ -113,11 +146,13 @@ class Config:
     RATE_LIMIT_DB_PATH = os.getenv('RATE_LIMIT_DB_PATH', os.path.join(RUNTIME_DIR, 'rate_limits.sqlite3'))
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB default
     RESULT_TTL_SECONDS = int(os.getenv('RESULT_TTL_SECONDS', 24 * 60 * 60))
+    RESULT_MAX_ENTRIES = int(os.getenv('RESULT_MAX_ENTRIES', 0))  # 0 = unlimited, TTL only
     PROGRESS_TTL_SECONDS = int(os.getenv('PROGRESS_TTL_SECONDS', 2 * 60 * 60))
     ARTIFACT_RETENTION_SECONDS = int(os.getenv('ARTIFACT_RETENTION_SECONDS', 7 * 24 * 60 * 60))
     JOB_RETENTION_SECONDS = int(os.getenv('JOB_RETENTION_SECONDS', 7 * 24 * 60 * 60))
     JOB_STALE_AFTER_SECONDS = int(os.getenv('JOB_STALE_AFTER_SECONDS', 30 * 60))
     WORKER_POLL_INTERVAL_SECONDS = float(os.getenv('WORKER_POLL_INTERVAL_SECONDS', '2.0'))
+    SSE_MAX_STREAM_SECONDS = int(os.getenv('SSE_MAX_STREAM_SECONDS', 5 * 60))  # 0 = unlimited
     EMBEDDED_WORKER_ENABLED = os.getenv(
         'EMBEDDED_WORKER_ENABLED',
         'true' if ENV_NAME == 'development' else 'false'
@@ -158,6 +193,7 @@ class Config:
         logger.info("Configuration values:")
         logger.info(f"  - ENV_NAME: {cls.ENV_NAME}")
         logger.info(f"  - DEBUG: {cls.DEBUG}")
+        logger.info(f"  - LOG_LEVEL: {cls.LOG_LEVEL}")
         logger.info(f"  - OPENAI_API_BASE: {cls.OPENAI_API_BASE}")
         logger.info(f"  - OPENAI_MODEL: {cls.OPENAI_MODEL}")
         logger.info(f"  - LLM_PROFILE: {cls.LLM_PROFILE}")
@@ -165,10 +201,26 @@ class Config:
         logger.info(f"  - OPENAI_JSON_MODE: {cls.OPENAI_JSON_MODE}")
         logger.info(f"  - DEFAULT_LLM_MAX_TOKENS: {cls.DEFAULT_LLM_MAX_TOKENS}")
         logger.info(f"  - LLM_MAX_PARALLEL_REQUESTS: {cls.LLM_MAX_PARALLEL_REQUESTS}")
+        logger.info(f"  - LLM_STREAM_RESPONSES: {cls.LLM_STREAM_RESPONSES}")
+        logger.info(f"  - LLM_POOL_SIZE: {cls.LLM_POOL_SIZE}")
         logger.info(f"  - ANALYSIS_CHUNK_CHARS: {cls.ANALYSIS_CHUNK_CHARS}")
         logger.info(f"  - ENABLE_ANALYSIS_SYNTHESIS_LLM: {cls.ENABLE_ANALYSIS_SYNTHESIS_LLM}")
         logger.info(f"  - ENABLE_WBS_SKELETON_LLM: {cls.ENABLE_WBS_SKELETON_LLM}")
+        logger.info(f"  - WBS_SKELETON_BATCH_SIZE: {cls.WBS_SKELETON_BATCH_SIZE}")
         logger.info(f"  - ENABLE_LLM_SEMANTIC_VALIDATION: {cls.ENABLE_LLM_SEMANTIC_VALIDATION}")
+        logger.info(f"  - ANALYSIS_CACHE_SIZE: {cls.ANALYSIS_CACHE_SIZE}")
+        logger.info(f"  - WBS_CACHE_SIZE: {cls.WBS_CACHE_SIZE}")
+        logger.info(f"  - ANALYSIS_CACHE_DIR: {cls.ANALYSIS_CACHE_DIR or 'disabled'}")
+        logger.info(f"  - ANALYSIS_CACHE_TTL_SECONDS: {cls.ANALYSIS_CACHE_TTL_SECONDS}")
+        logger.info(f"  - WBS_CACHE_DIR: {cls.WBS_CACHE_DIR or 'disabled'}")
+        logger.info(f"  - WBS_CACHE_TTL_SECONDS: {cls.WBS_CACHE_TTL_SECONDS}")
+        logger.info(f"  - LLM_RESPONSE_CACHE_SIZE: {cls.LLM_RESPONSE_CACHE_SIZE}")
+        logger.info(f"  - LLM_COALESCE_REQUESTS: {cls.LLM_COALESCE_REQUESTS}")
+        logger.info(f"  - ENSEMBLE_SHARED_ANALYSIS: {cls.ENSEMBLE_SHARED_ANALYSIS}")
+        logger.info(f"  - CONVERSATION_LOG_MAX_ENTRIES: {cls.CONVERSATION_LOG_MAX_ENTRIES}")
+        logger.info(f"  - MAX_HISTORY_CHARS: {cls.MAX_HISTORY_CHARS}")
+        logger.info(f"  - CONVERSATION_LOG_MINIMAL: {cls.CONVERSATION_LOG_MINIMAL}")
+        logger.info(f"  - ENABLE_SPECULATIVE_REFINEMENT: {cls.ENABLE_SPECULATIVE_REFINEMENT}")
         logger.info(f"  - SMALL_LLM_ONLY_DEV_LLM_TASKS: {cls.SMALL_LLM_ONLY_DEV_LLM_TASKS}")
         logger.info(f"  - UPLOAD_FOLDER: {cls.UPLOAD_FOLDER}")
         logger.info(f"  - ARTIFACTS_ROOT: {cls.ARTIFACTS_ROOT}")
@@ -177,11 +229,13 @@ class Config:
         logger.info(f"  - JOB_QUEUE_DB_PATH: {cls.JOB_QUEUE_DB_PATH}")
         logger.info(f"  - RATE_LIMIT_DB_PATH: {cls.RATE_LIMIT_DB_PATH}")
         logger.info(f"  - RESULT_TTL_SECONDS: {cls.RESULT_TTL_SECONDS}")
+        logger.info(f"  - RESULT_MAX_ENTRIES: {cls.RESULT_MAX_ENTRIES}")
         logger.info(f"  - PROGRESS_TTL_SECONDS: {cls.PROGRESS_TTL_SECONDS}")
         logger.info(f"  - ARTIFACT_RETENTION_SECONDS: {cls.ARTIFACT_RETENTION_SECONDS}")
         logger.info(f"  - JOB_RETENTION_SECONDS: {cls.JOB_RETENTION_SECONDS}")
         logger.info(f"  - JOB_STALE_AFTER_SECONDS: {cls.JOB_STALE_AFTER_SECONDS}")
         logger.info(f"  - WORKER_POLL_INTERVAL_SECONDS: {cls.WORKER_POLL_INTERVAL_SECONDS}")
+        logger.info(f"  - SSE_MAX_STREAM_SECONDS: {cls.SSE_MAX_STREAM_SECONDS}")
         logger.info(f"  - EMBEDDED_WORKER_ENABLED: {cls.EMBEDDED_WORKER_ENABLED}")
         logger.info(f"  - SERVE_FRONTEND_BUILD: {cls.SERVE_FRONTEND_BUILD}")
         logger.info(f"  - FRONTEND_DIST_DIR: {cls.FRONTEND_DIST_DIR}")
@@ -195,6 +249,8 @@ class Config:
         logger.info(f"  - ENSEMBLE_ITERATIONS: {StabilizationConfig.ENSEMBLE_ITERATIONS}")
         logger.info(f"  - CONSENSUS_METHOD: {StabilizationConfig.CONSENSUS_METHOD}")
         logger.info(f"  - OUTLIER_THRESHOLD: {StabilizationConfig.OUTLIER_THRESHOLD}")
+        logger.info(f"  - EARLY_STOP_CONFIDENCE: {StabilizationConfig.EARLY_STOP_CONFIDENCE}")
+        logger.info(f"  - MIN_ENSEMBLE_ITERATIONS: {StabilizationConfig.MIN_ENSEMBLE_ITERATIONS}")
         logger.info(f"  - AUTO_NORMALIZE: {StabilizationConfig.AUTO_NORMALIZE}")
         logger.info(f"  - ESTIMATION_RULES_PATH: {StabilizationConfig.ESTIMATION_RULES_PATH}")
         
@@ -288,6 +344,8 @@ class Config:
             'auto_normalize': StabilizationConfig.AUTO_NORMALIZE,
             'apply_rules_validation': StabilizationConfig.APPLY_RULES_VALIDATION,
             'min_confidence_score': StabilizationConfig.MIN_CONFIDENCE_SCORE,
+            'early_stop_confidence': StabilizationConfig.EARLY_STOP_CONFIDENCE,
+            'min_ensemble_iterations': StabilizationConfig.MIN_ENSEMBLE_ITERATIONS,
             'estimation_rules_path': StabilizationConfig.ESTIMATION_RULES_PATH
         }
 
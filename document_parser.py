@@ -3,6 +3,7 @@ Document parser module for reading Microsoft Word and PDF files.
 """
 import os
 import logging
+import re
 from typing import Optional
 from docx import Document
 from docx.opc.exceptions import PackageNotFoundError
@@ -10,6 +11,8 @@ from docx.opc.exceptions import PackageNotFoundError
 
 logger = logging.getLogger(__name__)
 
+_NUMBERED_HEADING_RE = re.compile(r'^\d+\.?\d*\.?\s')
+
 
 class PDFParser:
     """Parser for PDF documents."""
@@ -110,8 +113,7 @@ class PDFParser:
             )
             
             # Check for numbered sections like "1.", "1.1", etc.
-            import re
-            if re.match(r'^\d+\.?\d*\.?\s', line) and len(line) < 100:
+            if _NUMBERED_HEADING_RE.match(line) and len(line) < 100:
                 is_heading = True
             
             if is_heading:
@@ -171,6 +171,7 @@ export function useTaskProgress({
     let eventSource: EventSource | null = null;
     let consecutiveStreamErrors = 0;
     let streamClosed = false;
+    let plannedReconnect = false;
     let snapshotPollId: number | null = null;
     const maxVisibleEvents = compactSnapshot ? 15 : MAX_VISIBLE_EVENTS;
 
@@ -295,6 +296,13 @@ export function useTaskProgress({
       }));
     });
 
+    // The server closes long streams on purpose and announces it first; the
+    // browser then reconnects from the last event id on its own.
+    eventSource.addEventListener("reconnect", () => {
+      noteActivity();
+      plannedReconnect = true;
+    });
+
     eventSource.addEventListener("complete", (rawEvent) => {
       const event = parseEvent(rawEvent as MessageEvent<string>);
       noteActivity();
@@ -340,6 +348,11 @@ export function useTaskProgress({
         return;
       }
 
+      if (plannedReconnect) {
+        plannedReconnect = false;
+        return;
+      }
+
       consecutiveStreamErrors += 1;
 
       if (consecutiveStreamErrors >= MAX_STREAM_ERRORS) {
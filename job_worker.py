@@ -29,7 +29,8 @@ class JobWorker:
         )
         self.result_store = get_result_store(
             storage_dir=Config.RESULTS_STORAGE_DIR,
-            ttl_seconds=Config.RESULT_TTL_SECONDS
+            ttl_seconds=Config.RESULT_TTL_SECONDS,
+            max_entries=Config.RESULT_MAX_ENTRIES
         )
         self.poll_interval_seconds = Config.WORKER_POLL_INTERVAL_SECONDS
         self.stale_after_seconds = Config.JOB_STALE_AFTER_SECONDS
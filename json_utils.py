@@ -6,11 +6,90 @@ BaseAgent and OpenAIClient.
 import json
 import logging
 import re
-from typing import Optional
+from typing import Any, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 _JSON_NUMBER_RE = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_THINK_BLOCK_RE = re.compile(r'<think>[\s\S]*?</think>', re.IGNORECASE)
+_THINK_OPEN_RE = re.compile(r'^\s*<think>', re.IGNORECASE)
+_CODE_FENCE_RE = re.compile(r'```(?:json)?\s*([\s\S]*?)\s*```')
+_BRACE_RE = re.compile(r'[{}]')
+_JSON_DECODER = json.JSONDecoder()
+_TRAILING_COMMA_RE = re.compile(r',(\s*[}\]])')
+_DANGLING_SEPARATOR_RE = re.compile(r'[:,]\s*$')
+_LEADING_COMMA_RE = re.compile(r'([{\[])\s*,')
+_REPEATED_COMMA_RE = re.compile(r',\s*,+')
+
+
+def loads_json(text: Union[str, bytes]) -> Any:
+    """Parse JSON text, using orjson when it is installed.
+    
+    orjson is strict RFC 8259: it rejects NaN/Infinity literals and numbers
+    outside the float/int64 range that the stdlib parser accepts, so text
+    orjson refuses is re-parsed with json.loads. Failures are always
+    json.JSONDecodeError, so callers can handle them the same way.
+    
+    Args:
+        text: JSON text, or UTF-8 encoded bytes
+        
+    Returns:
+        Parsed value
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except json.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def dumps_compact_json(payload: Any) -> str:
+    """Serialize to compact JSON with sorted keys, using orjson when installed.
+    
+    Non-ASCII text is kept as-is and no whitespace is emitted, which keeps
+    prompt payloads small. Payloads orjson cannot encode (e.g. non-string
+    keys) fall back to the stdlib encoder.
+    
+    Args:
+        payload: JSON-serializable data
+        
+    Returns:
+        Compact JSON string
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def dumps_json_bytes(payload: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 encoded JSON bytes, using orjson when installed.
+    
+    Used for payloads written straight to disk, where encoding to bytes
+    in one step avoids building an intermediate str. Payloads orjson
+    cannot encode fall back to the stdlib encoder.
+    
+    Args:
+        payload: JSON-serializable data
+        indent: Pretty-print with two-space indentation
+        
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
 
 
 def _normalize_json_text(text: str) -> str:
@@ -201,8 +280,8 @@ def _close_open_json_structures(text: str) -> str:
     if in_string:
         fixed += '"'
 
-    fixed = re.sub(r',(\s*[}\]])', r'\1', fixed)
-    fixed = re.sub(r'[:,]\s*$', '', fixed.rstrip())
+    fixed = _TRAILING_COMMA_RE.sub(r'\1', fixed)
+    fixed = _DANGLING_SEPARATOR_RE.sub('', fixed.rstrip())
     return fixed + "".join(reversed(closers))
 
 
@@ -252,7 +331,7 @@ def _repair_from_decode_error(text: str, error: json.JSONDecodeError) -> Optiona
         return _close_open_json_structures(text + '"')
 
     if "Expecting value" in message:
-        trimmed = re.sub(r'[:,]\s*$', '', text[:pos].rstrip())
+        trimmed = _DANGLING_SEPARATOR_RE.sub('', text[:pos].rstrip())
         if trimmed:
             return _close_open_json_structures(trimmed)
 
@@ -279,7 +358,7 @@ def fix_common_json_errors(text: str) -> str:
     fixed = _normalize_json_text(text)
 
     # Remove trailing commas before } or ]
-    fixed = re.sub(r',(\s*[}\]])', r'\1', fixed)
+    fixed = _TRAILING_COMMA_RE.sub(r'\1', fixed)
 
     # Fix missing commas between array elements (common LLM error)
     # Pattern: "value"\n"value" -> "value",\n"value"
@@ -296,18 +375,18 @@ def fix_common_json_errors(text: str) -> str:
     fixed = re.sub(r'(\})\s*\n\s*(")', r'\1,\n\2', fixed)
 
     # Fix stray commas immediately after opening object/array brackets
-    fixed = re.sub(r'([{\[])\s*,', r'\1', fixed)
+    fixed = _LEADING_COMMA_RE.sub(r'\1', fixed)
 
     # Fix duplicated commas between values
-    fixed = re.sub(r',\s*,+', ',', fixed)
+    fixed = _REPEATED_COMMA_RE.sub(',', fixed)
 
     fixed = _replace_structural_ellipsis(fixed)
     fixed = _escape_control_chars_in_strings(fixed)
     fixed = _insert_missing_commas(fixed)
     fixed = _replace_structural_ellipsis(fixed)
-    fixed = re.sub(r'([{\[])\s*,', r'\1', fixed)
-    fixed = re.sub(r',\s*,+', ',', fixed)
-    fixed = re.sub(r',(\s*[}\]])', r'\1', fixed)
+    fixed = _LEADING_COMMA_RE.sub(r'\1', fixed)
+    fixed = _REPEATED_COMMA_RE.sub(',', fixed)
+    fixed = _TRAILING_COMMA_RE.sub(r'\1', fixed)
     return _close_open_json_structures(fixed)
 
 
@@ -330,6 +409,44 @@ def repair_json_text(text: str, log_prefix: str = "", max_attempts: int = 8) ->
     return None
 
 
+def _scan_top_level_objects(text: str) -> Tuple[Optional[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Locate top-level JSON objects embedded in text.
+    
+    Each top-level '{' is first decoded in place with raw_decode; a valid
+    object is skipped in one C-level step, so its inner braces are never
+    visited from Python. Only spans that fail to decode are brace-matched.
+    Unclosed trailing spans are dropped.
+    
+    Args:
+        text: Text to scan
+        
+    Returns:
+        Tuple of (longest valid object span or None, invalid spans)
+    """
+    best_span = None
+    invalid_spans = []
+    pos = text.find('{')
+    while pos != -1:
+        try:
+            _, stop = _JSON_DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            stop = None
+            depth = 0
+            for match in _BRACE_RE.finditer(text, pos):
+                depth += 1 if match.group() == '{' else -1
+                if depth == 0:
+                    stop = match.end()
+                    invalid_spans.append((pos, stop))
+                    break
+            if stop is None:
+                break
+        else:
+            if best_span is None or stop - pos > best_span[1] - best_span[0]:
+                best_span = (pos, stop)
+        pos = text.find('{', stop)
+    return best_span, invalid_spans
+
+
 def extract_json_from_response(text: str, log_prefix: str = "") -> Optional[str]:
     """Extract JSON from LLM response that might contain markdown or other text.
     
@@ -349,14 +466,13 @@ def extract_json_from_response(text: str, log_prefix: str = "") -> Optional[str]
     """
     # Pre-processing: Strip <think>...</think> blocks (Qwen, DeepSeek reasoning models)
     # These models wrap their chain-of-thought in <think> tags before the actual response
-    think_pattern = re.compile(r'<think>[\s\S]*?</think>', re.IGNORECASE)
-    cleaned = think_pattern.sub('', text).strip()
+    cleaned = _THINK_BLOCK_RE.sub('', text).strip()
     if cleaned != text:
         logger.info(f"{log_prefix}Stripped <think> block from response ({len(text)} -> {len(cleaned)} chars)")
         text = cleaned
     
     # Also handle unclosed <think> tags (model didn't close the tag)
-    if re.match(r'^\s*<think>', text, re.IGNORECASE):
+    if _THINK_OPEN_RE.match(text):
         # Find the first { after <think> that could be the start of JSON
         # but only if there's no </think> (already handled above)
         think_open = text.lower().find('<think>')
@@ -367,7 +483,7 @@ def extract_json_from_response(text: str, log_prefix: str = "") -> Optional[str]
     
     # Strategy 1: Try to parse the whole text as JSON
     try:
-        json.loads(text)
+        loads_json(text)
         logger.info(f"{log_prefix}Entire response is valid JSON")
         return text
     except json.JSONDecodeError:
@@ -380,11 +496,11 @@ def extract_json_from_response(text: str, log_prefix: str = "") -> Optional[str]
         return fixed
 
     # Strategy 3: Find JSON in markdown code blocks
-    json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', text)
+    json_match = _CODE_FENCE_RE.search(text)
     if json_match:
         json_text = json_match.group(1).strip()
         try:
-            json.loads(json_text)
+            loads_json(json_text)
             logger.info(f"{log_prefix}Found valid JSON in markdown code block")
             return json_text
         except json.JSONDecodeError:
@@ -394,36 +510,27 @@ def extract_json_from_response(text: str, log_prefix: str = "") -> Optional[str]
                 logger.info(f"{log_prefix}Fixed JSON from markdown code block")
                 return fixed
 
-    # Strategy 4: Find all JSON objects by brace matching and try each
-    brace_count = 0
-    json_start = -1
-    candidates = []
+    # Strategy 4: Find top-level JSON objects. Valid ones are found with
+    # raw_decode and skipped over whole; only invalid spans are repaired.
+    best_span, invalid_spans = _scan_top_level_objects(text)
     
-    for i, char in enumerate(text):
-        if char == '{':
-            if brace_count == 0:
-                json_start = i
-            brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0 and json_start != -1:
-                candidates.append(text[json_start:i + 1])
-                json_start = -1
+    # Walk valid and invalid candidates together, largest first, so a small
+    # valid example does not shadow a larger answer that only needs repair.
+    # On equal size the valid span wins and no repair is attempted.
+    candidates = [(start, end, False) for start, end in invalid_spans]
+    if best_span is not None:
+        candidates.append((best_span[0], best_span[1], True))
+    candidates.sort(key=lambda span: (span[1] - span[0], span[2]), reverse=True)
     
-    # Try each candidate, starting from the largest
-    candidates.sort(key=len, reverse=True)
-    
-    for candidate in candidates:
-        try:
-            json.loads(candidate)
+    for start, end, is_valid in candidates:
+        if is_valid:
+            candidate = text[start:end]
             logger.info(f"{log_prefix}Found valid JSON object ({len(candidate)} chars)")
             return candidate
-        except json.JSONDecodeError:
-            # Try to fix
-            fixed = repair_json_text(candidate, log_prefix=log_prefix)
-            if fixed is not None:
-                logger.info(f"{log_prefix}Fixed JSON candidate")
-                return fixed
+        fixed = repair_json_text(text[start:end], log_prefix=log_prefix)
+        if fixed is not None:
+            logger.info(f"{log_prefix}Fixed JSON candidate")
+            return fixed
 
     # Strategy 5: Last resort — find first { and last } and try to fix
     first_brace = text.find('{')
@@ -453,3 +560,74 @@ def extract_json_from_response(text: str, log_prefix: str = "") -> Optional[str]
 
     logger.error(f"{log_prefix}Could not extract JSON from response")
     return None
+
+
+class TopLevelKeyScanner:
+    """Incrementally scan streamed JSON text for completed top-level keys.
+
+    Fed with response chunks as they arrive, the scanner reports each key of
+    the outermost object once its value has been fully received, so callers
+    can react to finished sections before the whole response is decoded.
+    Text before the first opening brace (markdown fences, preambles) is ignored.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._capturing = False
+        self._key_chars = []
+        self._current_key: Optional[str] = None
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk of response text.
+
+        Args:
+            chunk: Next piece of streamed text
+
+        Returns:
+            List of top-level keys whose values were completed by this chunk
+        """
+        completed = []
+        for char in chunk:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._capturing:
+                        self._capturing = False
+                        self._expect_key = False
+                        self._current_key = "".join(self._key_chars)
+                    continue
+                if self._capturing:
+                    self._key_chars.append(char)
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._capturing = True
+                    self._key_chars = []
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0 and self._current_key is not None:
+                    completed.append(self._current_key)
+                    self._current_key = None
+            elif char == "," and self._depth == 1:
+                if self._current_key is not None:
+                    completed.append(self._current_key)
+                    self._current_key = None
+                self._expect_key = True
+        return completed
@@ -8,7 +8,7 @@ import time
 from typing import Optional, Dict, Any
 from openai import OpenAI, APIError, APIConnectionError, APITimeoutError
 from config import Config
-from json_utils import extract_json_from_response, repair_json_text
+from json_utils import extract_json_from_response, loads_json, repair_json_text
 
 
 logger = logging.getLogger(__name__)
@@ -269,7 +269,7 @@ JSON:"""
             # Parse JSON response
             logger.info(f"{log_prefix}Parsing JSON response...")
             try:
-                result = json.loads(json_text)
+                result = loads_json(json_text)
             except json.JSONDecodeError as e:
                 repaired_json = repair_json_text(json_text, log_prefix=log_prefix)
                 if repaired_json is None:
@@ -284,7 +284,7 @@ JSON:"""
                     }
 
                 json_text = repaired_json
-                result = json.loads(json_text)
+                result = loads_json(json_text)
                 logger.info(f"{log_prefix}JSON repaired after initial parse failure")
             
             logger.info(f"{log_prefix}Document analysis completed successfully")
@@ -431,8 +431,8 @@ def analyze_specification(document_content: str, request_id: str = None,
             token_totals = token_usage.get("totals", {})
             
             # Log conversation summary
-            conversation_summary = orchestrator.get_conversation_summary()
-            logger.debug(f"{log_prefix}Agent conversation:\n{conversation_summary}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%sAgent conversation:\n%s", log_prefix, orchestrator.get_conversation_summary())
             
             return {
                 "success": True,
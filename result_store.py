@@ -10,6 +10,8 @@ import threading
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+from json_utils import dumps_json_bytes
+
 logger = logging.getLogger(__name__)
 
 # Default TTL: 24 hours
@@ -25,19 +27,28 @@ class ResultStore:
     This supports multi-worker deployments (Gunicorn) and survives restarts.
     """
     
-    def __init__(self, storage_dir: str = "results_data", ttl_seconds: int = DEFAULT_TTL_SECONDS):
+    def __init__(self, storage_dir: str = "results_data", ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries: int = 0):
         """Initialize the result store.
         
         Args:
             storage_dir: Directory to store result files
             ttl_seconds: Time-to-live for results in seconds
+            max_entries: Maximum number of stored results; once exceeded the
+                oldest are evicted down to 90% of the limit (0 disables it)
         """
         self.storage_dir = Path(storage_dir)
         self.ttl_seconds = ttl_seconds
+        self.max_entries = max(0, max_entries)
         self._lock = threading.Lock()
+        # Running count of result files, so saves only scan the directory
+        # when the limit is actually exceeded (None until first counted)
+        self._entry_count: Optional[int] = None
+        self._count_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
         self._ensure_storage_dir()
         self._start_cleanup_thread()
-        logger.info(f"ResultStore initialized: dir={storage_dir}, ttl={ttl_seconds}s")
+        logger.info(f"ResultStore initialized: dir={storage_dir}, ttl={ttl_seconds}s, max_entries={self.max_entries}")
     
     def _ensure_storage_dir(self):
         """Create storage directory if it doesn't exist."""
@@ -52,6 +63,8 @@ class ResultStore:
                 time.sleep(CLEANUP_INTERVAL_SECONDS)
                 try:
                     self.cleanup_expired()
+                    if self.max_entries:
+                        self._evict_oldest()
                 except Exception as e:
                     logger.error(f"Error during cleanup: {e}")
         
@@ -94,10 +107,14 @@ class ResultStore:
             
             temp_path = filepath.with_suffix(".tmp")
             with self._lock:
-                with open(temp_path, 'w', encoding='utf-8') as f:
-                    json.dump(stored_data, f, ensure_ascii=False, indent=2)
+                is_new = not filepath.exists()
+                with open(temp_path, 'wb') as f:
+                    f.write(dumps_json_bytes(stored_data, indent=True))
                 os.replace(temp_path, filepath)
             
+            if self.max_entries and is_new and self._increment_count() > self.max_entries:
+                self._evict_oldest(keep=filepath)
+            
             logger.info(f"Result saved: {result_id} -> {filepath}")
             return True
             
@@ -167,12 +184,76 @@ class ResultStore:
             if filepath.exists():
                 filepath.unlink()
                 logger.debug(f"Deleted result file: {filepath}")
+                with self._count_lock:
+                    if self._entry_count is not None:
+                        self._entry_count = max(0, self._entry_count - 1)
                 return True
             return False
         except Exception as e:
             logger.error(f"Failed to delete {filepath}: {e}")
             return False
     
+    def _increment_count(self) -> int:
+        """Count a newly stored result and return the running total.
+        
+        The directory is scanned only the first time; afterwards saves and
+        deletes keep the count up to date.
+        """
+        with self._count_lock:
+            if self._entry_count is None:
+                self._entry_count = self.count()
+            else:
+                self._entry_count += 1
+            return self._entry_count
+    
+    def _evict_oldest(self, keep: Optional[Path] = None) -> int:
+        """Delete the oldest result files once there are more than max_entries.
+        
+        Evicts down to 90% of max_entries so the directory scan runs once
+        per batch of saves rather than on every save past the limit. Runs
+        outside the write lock; a save arriving while another thread
+        evicts skips eviction instead of waiting.
+        
+        Args:
+            keep: File that must survive eviction (the one just saved)
+            
+        Returns:
+            Number of evicted results
+        """
+        if not self._evict_lock.acquire(blocking=False):
+            return 0
+        try:
+            return self._evict_oldest_locked(keep)
+        finally:
+            self._evict_lock.release()
+    
+    def _evict_oldest_locked(self, keep: Optional[Path]) -> int:
+        """Scan the directory and evict the oldest results; see _evict_oldest."""
+        files = []
+        for filepath in self.storage_dir.glob("*.json"):
+            try:
+                files.append((filepath.stat().st_mtime, filepath))
+            except FileNotFoundError:
+                continue
+        
+        with self._count_lock:
+            self._entry_count = len(files)
+        if len(files) <= self.max_entries:
+            return 0
+        excess = len(files) - (self.max_entries - self.max_entries // 10)
+        
+        files.sort(key=lambda item: item[0])
+        evicted = 0
+        for _, filepath in files:
+            if evicted >= excess:
+                break
+            if filepath != keep and self._delete_file(filepath):
+                evicted += 1
+        
+        if evicted:
+            logger.info(f"Evicted {evicted} oldest results (max_entries={self.max_entries})")
+        return evicted
+    
     def cleanup_expired(self) -> int:
         """Remove all expired results.
         
@@ -251,12 +332,14 @@ class ResultStore:
 _store_instance: Optional[ResultStore] = None
 
 
-def get_result_store(storage_dir: str = "results_data", ttl_seconds: int = DEFAULT_TTL_SECONDS) -> ResultStore:
+def get_result_store(storage_dir: str = "results_data", ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                     max_entries: int = 0) -> ResultStore:
     """Get or create the global ResultStore instance.
     
     Args:
         storage_dir: Directory to store result files
         ttl_seconds: Time-to-live for results in seconds
+        max_entries: Maximum number of stored results (0 = unlimited)
         
     Returns:
         ResultStore instance
@@ -265,7 +348,8 @@ def get_result_store(storage_dir: str = "results_data", ttl_seconds: int = DEFAU
     if (
         _store_instance is None or
         str(_store_instance.storage_dir) != str(Path(storage_dir)) or
-        _store_instance.ttl_seconds != ttl_seconds
+        _store_instance.ttl_seconds != ttl_seconds or
+        _store_instance.max_entries != max(0, max_entries)
     ):
-        _store_instance = ResultStore(storage_dir=storage_dir, ttl_seconds=ttl_seconds)
+        _store_instance = ResultStore(storage_dir=storage_dir, ttl_seconds=ttl_seconds, max_entries=max_entries)
     return _store_instance
@@ -94,12 +94,20 @@ class RunArtifacts:
         os.replace(temp_path, path)
 
     def copy_source_file(self, source_path: str, filename: Optional[str] = None) -> str:
-        """Copy the uploaded source file into the run directory."""
+        """Copy the uploaded source file into the run directory.
+        
+        The copy is a hard link when the upload folder and the run directory
+        share a filesystem, so the document is not written to disk a second
+        time; removing the upload later leaves the linked copy intact.
+        """
         source_name = Path(filename or source_path).name
         safe_name = _safe_filename(source_name, fallback_stem="upload")
         target = self._resolve_path(f"source/{safe_name}")
         with self._lock:
-            shutil.copy2(source_path, target)
+            try:
+                os.link(source_path, target)
+            except OSError:
+                shutil.copy2(source_path, target)
         logger.info("Copied uploaded file into run directory: %s", target)
         return str(target.relative_to(self.base_dir))
 
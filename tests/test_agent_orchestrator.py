@@ -0,0 +1,243 @@
+import json
+import threading
+import unittest
+from unittest.mock import patch
+
+from agents.agent_orchestrator import AgentOrchestrator, StabilizationMode, _get_estimation_rules
+from agents.base_agent import BaseAgent
+from agents.content_cache import ContentCache
+from agents.planner_agent import PlannerAgent
+from config import Config
+
+
+class AgentOrchestratorConversationLogTests(unittest.TestCase):
+    def _orchestrator(self) -> AgentOrchestrator:
+        orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+        orchestrator._progress = None
+        orchestrator._reset_conversation_log()
+        return orchestrator
+
+    def test_analytics_are_aggregated_while_logging(self):
+        orchestrator = self._orchestrator()
+
+        orchestrator._log_conversation("Orchestrator", "delegate_to_analyst", {"document_length": 10})
+        orchestrator._log_conversation("Analyst", "analysis_complete", {})
+        orchestrator._log_conversation("Orchestrator", "delegate_to_analyst", {})
+
+        analytics = orchestrator.get_agent_analytics()
+
+        self.assertEqual(analytics["total_steps"], 3)
+        self.assertEqual(sorted(analytics["agents_involved"]), ["Analyst", "Orchestrator"])
+        self.assertEqual(
+            analytics["actions_performed"],
+            {"delegate_to_analyst": 2, "analysis_complete": 1}
+        )
+        self.assertEqual(
+            [step["action"] for step in analytics["timeline"]],
+            ["delegate_to_analyst", "analysis_complete", "delegate_to_analyst"]
+        )
+
+    def test_summary_includes_entries_logged_after_previous_call(self):
+        orchestrator = self._orchestrator()
+
+        orchestrator._log_conversation("Orchestrator", "delegate_to_analyst", {"document_length": 10})
+        first_summary = orchestrator.get_conversation_summary()
+        orchestrator._log_conversation("Planner", "wbs_complete", {"phases_count": 3})
+        second_summary = orchestrator.get_conversation_summary()
+
+        self.assertIn("Orchestrator: delegate_to_analyst", first_summary)
+        self.assertNotIn("wbs_complete", first_summary)
+        self.assertTrue(second_summary.startswith(first_summary))
+        self.assertIn("Planner: wbs_complete", second_summary)
+        self.assertIn("    phases_count: 3", second_summary)
+
+    def test_iter_summary_yields_summary_lines(self):
+        orchestrator = self._orchestrator()
+        self.assertEqual(list(orchestrator.iter_conversation_summary()), ["No conversation recorded."])
+
+        orchestrator._log_conversation("Planner", "wbs_complete", {"phases": list(range(50))})
+        lines = list(orchestrator.iter_conversation_summary())
+
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith("Planner: wbs_complete"))
+        self.assertTrue(lines[2].endswith("..."))
+        self.assertEqual("\n".join(lines), orchestrator.get_conversation_summary())
+
+    def test_conversation_wire_matches_log(self):
+        orchestrator = self._orchestrator()
+        orchestrator._log_conversation("Orchestrator", "delegate_to_analyst", {"document_length": 10})
+        orchestrator._log_conversation("Analyst", "analysis_complete", {"risks_count": 2})
+
+        self.assertEqual(json.loads(orchestrator.get_conversation_wire()), orchestrator.get_conversation_log())
+
+    def test_reset_clears_aggregates(self):
+        orchestrator = self._orchestrator()
+        orchestrator._log_conversation("Orchestrator", "delegate_to_analyst", {})
+        orchestrator.get_conversation_summary()
+
+        orchestrator._reset_conversation_log()
+
+        self.assertEqual(orchestrator.get_agent_analytics(), {})
+        self.assertEqual(orchestrator.get_conversation_summary(), "No conversation recorded.")
+
+    def test_log_and_summary_are_bounded_together(self):
+        with patch.object(Config, "CONVERSATION_LOG_MAX_ENTRIES", 2):
+            orchestrator = self._orchestrator()
+            orchestrator._log_conversation("Orchestrator", "delegate_to_analyst", {})
+            orchestrator.get_conversation_summary()
+            orchestrator._log_conversation("Analyst", "analysis_complete", {})
+            orchestrator._log_conversation("Planner", "wbs_complete", {})
+            orchestrator._log_conversation("Validator", "validation_complete", {})
+
+            summary = orchestrator.get_conversation_summary()
+
+        self.assertEqual(
+            [entry["action"] for entry in orchestrator.get_conversation_log()],
+            ["wbs_complete", "validation_complete"]
+        )
+        self.assertEqual(orchestrator.get_agent_analytics()["total_steps"], 4)
+        self.assertNotIn("delegate_to_analyst", summary)
+        self.assertNotIn("analysis_complete", summary)
+        self.assertIn("Planner: wbs_complete", summary)
+        self.assertIn("Validator: validation_complete", summary)
+        self.assertEqual(len(orchestrator._summary_lines), 2)
+
+
+class _StubPlanner:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def refine_wbs(self, wbs, feedback):
+        return self.responses[feedback]
+
+    def validate_wbs(self, wbs, fail_fast=False):
+        return {"valid": wbs.get("valid", False), "issues": []}
+
+
+class AgentOrchestratorSpeculativeRefinementTests(unittest.TestCase):
+    def _orchestrator(self, responses) -> AgentOrchestrator:
+        orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+        orchestrator.planner = _StubPlanner(responses)
+        return orchestrator
+
+    def test_prefers_variant_that_passes_validation(self):
+        suffix = AgentOrchestrator.SPECULATIVE_FEEDBACK_SUFFIX
+        orchestrator = self._orchestrator({
+            "fix": {"success": True, "wbs": {"valid": False, "variant": "a"}},
+            "fix" + suffix: {"success": True, "wbs": {"valid": True, "variant": "b"}},
+        })
+
+        result = orchestrator._speculative_refine_wbs({}, "fix")
+
+        self.assertEqual(result["wbs"]["variant"], "b")
+
+    def test_falls_back_to_successful_result_when_none_validates(self):
+        suffix = AgentOrchestrator.SPECULATIVE_FEEDBACK_SUFFIX
+        orchestrator = self._orchestrator({
+            "fix": {"success": False, "error": "timeout"},
+            "fix" + suffix: {"success": True, "wbs": {"valid": False, "variant": "b"}},
+        })
+
+        result = orchestrator._speculative_refine_wbs({}, "fix")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["wbs"]["variant"], "b")
+
+
+class AgentOrchestratorEnsembleTests(unittest.TestCase):
+    _WBS = {
+        "project_info": {"total_estimated_hours": 100},
+        "wbs": {"phases": [{"id": "1", "name": "Разработка", "work_packages": []}]},
+    }
+
+    def _orchestrator(self, iterations: int) -> AgentOrchestrator:
+        orchestrator = AgentOrchestrator.__new__(AgentOrchestrator)
+        orchestrator._progress = None
+        orchestrator._reset_conversation_log()
+        orchestrator.ensemble_iterations = iterations
+        orchestrator.estimation_rules = _get_estimation_rules(None)
+        orchestrator._stabilization_settings = {}
+        return orchestrator
+
+    def _run(self, orchestrator: AgentOrchestrator, early_stop_confidence: float) -> list:
+        calls = []
+
+        def iteration(document_content, max_iterations, iteration_num, analysis):
+            calls.append(iteration_num)
+            return {"success": True, "data": json.loads(json.dumps(self._WBS))}
+
+        settings = {"early_stop_confidence": early_stop_confidence, "min_ensemble_iterations": 2}
+        with patch.object(orchestrator, "_run_single_ensemble_iteration", side_effect=iteration), \
+                patch.object(Config, "get_stabilization_config", return_value=settings):
+            result = orchestrator._generate_with_ensemble(
+                "ТЗ", 0, StabilizationMode.ENSEMBLE, 0.0, analysis={"functional_requirements": []}
+            )
+
+        self.assertTrue(result["success"])
+        return calls
+
+    def test_agreeing_results_skip_remaining_iterations(self):
+        calls = self._run(self._orchestrator(5), early_stop_confidence=0.9)
+
+        self.assertEqual(sorted(calls), [1, 2])
+
+    def test_all_iterations_run_without_early_stop(self):
+        calls = self._run(self._orchestrator(4), early_stop_confidence=1.0)
+
+        self.assertEqual(sorted(calls), [1, 2, 3, 4])
+
+    def _run_through_client(self, iterations: int, completion, cache_size: int = 8) -> dict:
+        wbs_reply = json.dumps(self._WBS)
+
+        def create_wbs(planner, analysis):
+            reply = planner.send_message(
+                "Составь WBS для одинакового анализа", system_prompt="sys",
+                use_history=False, temperature=0.0
+            )
+            return {"success": reply["success"], "wbs": reply.get("data")}
+
+        settings = {"early_stop_confidence": 1.0, "min_ensemble_iterations": 2}
+        with patch("agents.base_agent.get_openai_client"), \
+                patch("agents.base_agent.get_response_cache", return_value=ContentCache(cache_size)), \
+                patch.object(BaseAgent, "_request_completion", side_effect=lambda *args: completion(wbs_reply)), \
+                patch.object(PlannerAgent, "create_wbs", autospec=True, side_effect=create_wbs), \
+                patch.object(PlannerAgent, "validate_wbs", return_value={"valid": True, "issues": []}), \
+                patch.object(Config, "get_stabilization_config", return_value=settings):
+            return self._orchestrator(iterations)._generate_with_ensemble(
+                "ТЗ", 0, StabilizationMode.ENSEMBLE, 0.0, analysis={"functional_requirements": []}
+            )
+
+    def test_every_iteration_reaches_the_llm_despite_response_cache(self):
+        calls = []
+
+        def completion(reply):
+            calls.append(1)
+            return reply, None
+
+        result = self._run_through_client(3, completion)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(len(calls), 3)
+
+    def test_concurrent_iterations_are_not_coalesced(self):
+        calls = []
+        release = threading.Event()
+
+        def completion(reply):
+            calls.append(1)
+            release.wait(1)
+            return reply, None
+
+        timer = threading.Timer(0.1, release.set)
+        timer.start()
+        with patch.object(Config, "LLM_RESPONSE_CACHE_SIZE", 0), \
+                patch.object(Config, "LLM_COALESCE_REQUESTS", True):
+            result = self._run_through_client(3, completion, cache_size=0)
+        timer.cancel()
+
+        self.assertTrue(result["success"])
+        self.assertEqual(len(calls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
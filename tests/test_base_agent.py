@@ -0,0 +1,158 @@
+import math
+import threading
+import logging
+import time
+import unittest
+from unittest.mock import patch
+
+from agents.base_agent import AgentEventLogger, BaseAgent, run_bounded
+from agents.content_cache import ContentCache
+
+
+class RunBoundedTests(unittest.TestCase):
+    def test_limits_in_flight_calls_and_reports_every_index(self):
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+
+        def call(value):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return value * 2
+
+        results = {
+            index: future.result()
+            for index, future in run_bounded(call, [(value,) for value in range(6)], limit=2)
+        }
+
+        self.assertEqual(results, {index: index * 2 for index in range(6)})
+        self.assertLessEqual(peak[0], 2)
+
+
+class AgentEventLoggerTests(unittest.TestCase):
+    def test_lazy_text_is_not_built_without_listeners(self):
+        calls = []
+
+        def summary():
+            calls.append(1)
+            return "done"
+
+        event_logger = AgentEventLogger()
+        with patch("agents.base_agent.logger.isEnabledFor", return_value=False):
+            event_logger.log_agent_completed("Planner", summary)
+        self.assertEqual(calls, [])
+
+        with self.assertLogs("agents.base_agent", level=logging.INFO) as captured:
+            event_logger.log_agent_completed("Planner", summary)
+        self.assertEqual(calls, [1])
+        self.assertTrue(any("done" in line for line in captured.output))
+
+
+def _agent() -> BaseAgent:
+    agent = BaseAgent.__new__(BaseAgent)
+    agent.name = "Planner"
+    agent.model = "test-model"
+    agent.json_mode = False
+    agent.conversation_history = []
+    agent.event_logger = AgentEventLogger()
+    agent._progress_tracker = None
+    return agent
+
+
+class BaseAgentResponseCacheTests(unittest.TestCase):
+    def test_deterministic_json_requests_reuse_cached_response(self):
+        agent = _agent()
+        with patch.object(BaseAgent, "_request_completion", return_value=('{"phases": []}', None)) as completion:
+            first = agent.send_message("cache me", system_prompt="sys", use_history=False, temperature=0.0)
+            second = agent.send_message("cache me", system_prompt="sys", use_history=False, temperature=0.0)
+            agent.send_message("cache me", system_prompt="sys", use_history=False, temperature=0.0,
+                               request_id="nocache:probe")
+            agent.send_message("cache me", system_prompt="sys", use_history=False, temperature=0.5)
+
+        self.assertEqual(completion.call_count, 3)
+        self.assertEqual(first["data"], second["data"])
+
+    def test_no_key_is_built_when_cache_and_coalescing_are_disabled(self):
+        agent = _agent()
+        with patch("config.Config.LLM_RESPONSE_CACHE_SIZE", 0), \
+                patch("config.Config.LLM_COALESCE_REQUESTS", False), \
+                patch.object(ContentCache, "key_for_payload") as key_for_payload, \
+                patch.object(BaseAgent, "_request_completion", return_value=('{"ok": true}', None)) as completion:
+            agent.send_message("no cache", system_prompt="sys", use_history=False, temperature=0.0)
+            agent.send_message("no cache", system_prompt="sys", use_history=False, temperature=0.0)
+
+        key_for_payload.assert_not_called()
+        self.assertEqual(completion.call_count, 2)
+
+    def test_identical_concurrent_requests_share_one_completion(self):
+        agent = _agent()
+        release = threading.Event()
+        calls = []
+
+        def completion(api_params, expect_json):
+            calls.append(1)
+            release.wait(1)
+            return '{"ok": true}', None
+
+        with patch.object(BaseAgent, "_request_completion", side_effect=completion):
+            results = []
+            workers = [
+                threading.Thread(target=lambda: results.append(agent.send_message(
+                    "coalesce me", system_prompt="sys", use_history=False, temperature=0.0
+                )))
+                for _ in range(3)
+            ]
+            for worker in workers:
+                worker.start()
+            time.sleep(0.05)
+            release.set()
+            for worker in workers:
+                worker.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result["data"] for result in results], [{"ok": True}] * 3)
+
+
+class BaseAgentJsonParsingTests(unittest.TestCase):
+    def test_reply_with_nan_literal_is_parsed(self):
+        agent = _agent()
+        with patch.object(BaseAgent, "_request_completion", return_value=('{"phases": [], "score": NaN}', None)):
+            result = agent.send_message("nan reply", system_prompt="sys", use_history=False, temperature=0.3)
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["data"]["phases"], [])
+        self.assertTrue(math.isnan(result["data"]["score"]))
+
+
+class BaseAgentHistoryTests(unittest.TestCase):
+    def test_history_is_trimmed_to_character_budget(self):
+        agent = _agent()
+        with patch("config.Config.MAX_HISTORY_CHARS", 26), \
+                patch.object(BaseAgent, "_request_completion", return_value=("ответ", None)):
+            for turn in range(4):
+                agent.send_message(f"вопрос {turn}", expect_json=False, system_prompt="sys")
+
+        self.assertEqual(
+            [entry["content"] for entry in agent.conversation_history],
+            ["вопрос 2", "ответ", "вопрос 3", "ответ"]
+        )
+
+    def test_history_is_trimmed_in_whole_turns_with_context(self):
+        agent = _agent()
+        with patch("config.Config.MAX_HISTORY_CHARS", 58), \
+                patch.object(BaseAgent, "_request_completion", return_value=("ответ", None)):
+            for turn in range(2):
+                agent.send_message(f"вопрос {turn}", expect_json=False, system_prompt="sys", context="к" * 20)
+
+        self.assertEqual(
+            [entry["content"] for entry in agent.conversation_history],
+            ["вопрос 1", "к" * 20, "ответ"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+
+from agents.content_cache import ContentCache
+
+
+class ContentCacheTests(unittest.TestCase):
+    def test_returns_copies_and_evicts_least_recently_used(self):
+        cache = ContentCache(maxsize=2)
+        cache.put("a", {"items": [1]})
+        cache.put("b", {"items": [2]})
+
+        first = cache.get("a")
+        first["items"].append(99)
+        cache.put("c", {"items": [3]})
+
+        self.assertEqual(cache.get("a"), {"items": [1]})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), {"items": [3]})
+
+    def test_payload_key_ignores_key_order(self):
+        self.assertEqual(
+            ContentCache.key_for_payload({"a": 1, "b": [1, 2]}),
+            ContentCache.key_for_payload({"b": [1, 2], "a": 1})
+        )
+        self.assertNotEqual(ContentCache.key_for_text("spec v1"), ContentCache.key_for_text("spec v2"))
+
+    def test_zero_size_disables_cache(self):
+        cache = ContentCache(maxsize=0)
+        cache.put("a", {"items": [1]})
+
+        self.assertIsNone(cache.get("a"))
+
+    def test_persisted_entries_survive_new_instance(self):
+        with tempfile.TemporaryDirectory() as storage_dir:
+            ContentCache(maxsize=2, storage_dir=storage_dir).put("a", {"items": [1]})
+
+            cache = ContentCache(maxsize=2, storage_dir=storage_dir)
+            self.assertEqual(cache.get("a"), {"items": [1]})
+            self.assertEqual(cache.hits, 1)
+
+            expired = ContentCache(maxsize=2, storage_dir=storage_dir, ttl_seconds=1e-9)
+            self.assertIsNone(expired.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
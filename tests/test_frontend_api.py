@@ -217,6 +217,7 @@ class FrontendApiTests(unittest.TestCase):
         self.assertIn("/uploads/", job["payload"]["upload_filepath"])
         self.assertEqual(Path(job["payload"]["upload_filepath"]).suffix, ".docx")
         self.assertTrue(os.path.exists(job["payload"]["filepath"]))
+        self.assertTrue(os.path.samefile(job["payload"]["filepath"], job["payload"]["upload_filepath"]))
         close_mock.assert_called()
 
     def test_api_upload_preserves_pdf_extension_for_unicode_filename(self):
@@ -240,6 +241,9 @@ class FrontendApiTests(unittest.TestCase):
         self.assertEqual(Path(job["payload"]["upload_filepath"]).suffix, ".pdf")
         self.assertEqual(Path(job["payload"]["filepath"]).suffix, ".pdf")
         self.assertTrue(job["payload"]["filepath"].endswith("/source/upload.pdf"))
+        upload_hex = job["payload"]["unique_id"].replace("-", "")
+        self.assertEqual(job["payload"]["request_id"], upload_hex[:8])
+        self.assertEqual(payload["task_id"], upload_hex[8:20])
 
     def test_api_progress_alias_streams_existing_events(self):
         tracker = self.progress_store.create("task-1")
@@ -253,6 +257,34 @@ class FrontendApiTests(unittest.TestCase):
         self.assertIn("event: complete", payload)
         self.assertIn('"result_id": "result-1"', payload)
 
+    def test_api_progress_stream_resumes_from_last_event_id(self):
+        tracker = self.progress_store.create("task-2")
+        tracker.info("first")
+        first_response = self.client.get("/api/tasks/task-2/events", buffered=False)
+        first_chunk = next(first_response.response).decode("utf-8")
+        first_response.close()
+        self.assertTrue(first_chunk.startswith("id: "))
+        last_event_id = first_chunk.split("\n", 1)[0].removeprefix("id: ")
+        tracker.complete("/results/result-2", "result-2")
+
+        response = self.client.get("/api/tasks/task-2/events", headers={"Last-Event-ID": last_event_id})
+
+        payload = response.get_data(as_text=True)
+        self.assertNotIn('"message": "first"', payload)
+        self.assertIn("event: complete", payload)
+
+    def test_api_progress_stream_announces_planned_close(self):
+        tracker = self.progress_store.create("task-3")
+        tracker.info("first")
+        self.app.config["SSE_MAX_STREAM_SECONDS"] = 0.01
+
+        response = self.client.get("/api/tasks/task-3/events")
+
+        payload = response.get_data(as_text=True)
+        last_event = payload.rstrip("\n").rsplit("\n\n", 1)[-1]
+        first_id = payload.split("\n", 1)[0]
+        self.assertEqual(last_event, f"{first_id}\nevent: reconnect\ndata: {{}}\nretry: 1000")
+
     def test_api_results_returns_headless_view_model(self):
         self.result_store.save(
             "result-1",
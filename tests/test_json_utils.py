@@ -0,0 +1,81 @@
+import json
+import math
+import unittest
+
+from json_utils import TopLevelKeyScanner, dumps_json_bytes, extract_json_from_response, loads_json
+
+
+class TopLevelKeyScannerTests(unittest.TestCase):
+    def test_reports_keys_as_their_values_complete(self):
+        scanner = TopLevelKeyScanner()
+        text = (
+            '```json\n{"project_info": {"name": "a,}\\"b"}, '
+            '"functional_requirements": [{"id": "FR-1"}, {"id": "FR-2"}], "risks": []}\n```'
+        )
+
+        reported = []
+        for start in range(0, len(text), 7):
+            reported.append((start, scanner.feed(text[start:start + 7])))
+        keys = [key for _, chunk_keys in reported for key in chunk_keys]
+
+        self.assertEqual(keys, ["project_info", "functional_requirements", "risks"])
+        first_report = next(start for start, chunk_keys in reported if chunk_keys)
+        self.assertLess(first_report, text.index("functional_requirements"))
+
+    def test_nested_keys_are_not_reported(self):
+        scanner = TopLevelKeyScanner()
+
+        self.assertEqual(scanner.feed('{"a": {"b": 1, "c": 2}'), [])
+        self.assertEqual(scanner.feed('}'), ["a"])
+
+
+class LoadsJsonTests(unittest.TestCase):
+    def test_parses_and_raises_stdlib_decode_error(self):
+        self.assertEqual(loads_json('{"name": "Фаза", "hours": [8, 16.5]}'), {"name": "Фаза", "hours": [8, 16.5]})
+
+        with self.assertRaises(json.JSONDecodeError):
+            loads_json('{"name": ')
+
+    def test_accepts_literals_the_stdlib_parser_allows(self):
+        parsed = loads_json('{"phases": [], "score": NaN, "max": Infinity, "big": 1e400}')
+
+        self.assertTrue(math.isnan(parsed["score"]))
+        self.assertEqual(parsed["max"], math.inf)
+        self.assertEqual(parsed["big"], math.inf)
+
+
+class DumpsJsonBytesTests(unittest.TestCase):
+    def test_round_trips_utf8_and_falls_back_for_non_string_keys(self):
+        payload = {"name": "Фаза", "hours": [8, 16.5]}
+
+        self.assertEqual(json.loads(dumps_json_bytes(payload)), payload)
+        self.assertIn("Фаза".encode("utf-8"), dumps_json_bytes(payload, indent=True))
+        self.assertIn(b'\n  "', dumps_json_bytes(payload, indent=True))
+        self.assertEqual(json.loads(dumps_json_bytes({1: "a"})), {"1": "a"})
+
+
+class ExtractJsonFromResponseTests(unittest.TestCase):
+    def test_returns_largest_valid_top_level_object(self):
+        text = 'Пример: {"a": 1} и результат: {"phases": [{"id": "1"}], "note": "}"} конец'
+
+        extracted = extract_json_from_response(text)
+
+        self.assertEqual(json.loads(extracted), {"phases": [{"id": "1"}], "note": "}"})
+
+    def test_repairs_invalid_top_level_object(self):
+        text = 'Ответ: {"phases": [{"id": "1"},], "total": 8,} Готово.'
+
+        extracted = extract_json_from_response(text)
+
+        self.assertEqual(json.loads(extracted), {"phases": [{"id": "1"}], "total": 8})
+
+    def test_prefers_larger_repairable_object_over_small_valid_one(self):
+        text = 'Example: {"a": 1}\nResult: {"phases": [{"id": "1", "name": "x",}], "total": 5,}'
+
+        extracted = extract_json_from_response(text)
+
+        self.assertEqual(json.loads(extracted), {"phases": [{"id": "1", "name": "x"}], "total": 5})
+
+
+if __name__ == "__main__":
+    unittest.main()
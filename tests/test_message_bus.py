@@ -0,0 +1,38 @@
+import unittest
+
+from agents.message_bus import MessageBus, MessageType
+
+
+class MessageBusTests(unittest.TestCase):
+    def test_request_routes_to_subscribed_handler_and_records_history(self):
+        bus = MessageBus()
+        bus.subscribe("Planner", lambda analysis: {"success": True, "wbs": analysis})
+
+        result = bus.request("Orchestrator", "Planner", {"project": "demo"})
+
+        self.assertEqual(result, {"success": True, "wbs": {"project": "demo"}})
+        history = bus.get_history()
+        self.assertEqual([m.type for m in history], [MessageType.REQUEST, MessageType.RESPONSE])
+        self.assertEqual((history[1].sender, history[1].receiver), ("Planner", "Orchestrator"))
+        self.assertEqual(bus.get_statistics()["by_type"], {"request": 1, "response": 1})
+
+    def test_handler_error_is_published_and_reraised(self):
+        bus = MessageBus()
+
+        def failing_handler(_content):
+            raise ValueError("boom")
+
+        bus.subscribe("Analyst", failing_handler)
+
+        with self.assertRaises(ValueError):
+            bus.request("Orchestrator", "Analyst", "spec")
+
+        self.assertEqual(bus.get_history()[-1].type, MessageType.ERROR)
+
+    def test_request_without_subscriber_raises(self):
+        with self.assertRaises(KeyError):
+            MessageBus().request("Orchestrator", "Validator", {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,326 @@
+import json
+import os
+import statistics
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from agents import result_stabilizer
+from agents.agent_orchestrator import _get_estimation_rules
+from agents.result_stabilizer import EnsembleGenerator, EstimationRules, ResultStabilizer
+from wbs_utils import float_mean, float_median, float_stdev, float_trimmed_mean
+
+
+def _wbs(total_hours, phases_count):
+    return {
+        "project_info": {"total_estimated_hours": total_hours},
+        "wbs": {"phases": [{"id": str(i)} for i in range(phases_count)]}
+    }
+
+
+class ResultStabilizerPartialConfidenceTests(unittest.TestCase):
+    def setUp(self):
+        rules = EstimationRules.__new__(EstimationRules)
+        rules.rules = {}
+        rules._index_rules()
+        self.stabilizer = ResultStabilizer(rules)
+
+    def test_agreeing_results_score_high(self):
+        score = self.stabilizer.partial_confidence([_wbs(400, 4), _wbs(410, 4)])
+
+        self.assertGreater(score, 0.95)
+
+    def test_divergent_results_score_low(self):
+        score = self.stabilizer.partial_confidence([_wbs(200, 3), _wbs(800, 6)])
+
+        self.assertLess(score, 0.5)
+
+    def test_single_result_is_undecidable(self):
+        self.assertEqual(self.stabilizer.partial_confidence([_wbs(400, 4)]), 0.0)
+
+
+class ReductionHelperTests(unittest.TestCase):
+    def test_helpers_agree_with_statistics_module(self):
+        for values in ([5], [3, 1], [40, 55, 60], [8, 16, 4, 32.5], [100, 100, 100, 1000]):
+            self.assertAlmostEqual(float_mean(values), statistics.mean(values))
+            self.assertAlmostEqual(float_median(values), statistics.median(values))
+            if len(values) > 1:
+                self.assertAlmostEqual(float_stdev(values), statistics.stdev(values))
+
+    def test_trimmed_mean_drops_a_quarter_from_each_end(self):
+        self.assertEqual(float_trimmed_mean([10, 20]), 15)
+        self.assertEqual(float_trimmed_mean([1000, 10, 20, 30]), 25)
+        self.assertEqual(float_trimmed_mean([5, 1, 9, 7, 3, 100, 0, 8]), 5.75)
+
+
+class EstimationRulesTests(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({
+                "limits": {"min_hours_per_task": 4, "max_hours_per_task": 60},
+                "task_templates": {
+                    "Безопасность": {"OAuth интеграция": {"min_hours": 8, "max_hours": 24}},
+                    "Интерфейс": {"Форма": {"min_hours": 2, "max_hours": 6}}
+                }
+            }, f, ensure_ascii=False)
+        self.addCleanup(os.remove, self.path)
+
+    def test_rules_file_is_parsed_once_per_path(self):
+        first = EstimationRules(self.path)
+        second = EstimationRules(self.path)
+
+        self.assertIs(first.rules, second.rules)
+
+    def test_rules_file_is_parsed_again_after_it_changes(self):
+        first = EstimationRules(self.path)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"limits": {"max_hours_per_task": 30}}, f)
+        os.utime(self.path, (0, os.stat(self.path).st_mtime + 10))
+
+        second = EstimationRules(self.path)
+
+        self.assertIsNot(first.rules, second.rules)
+        self.assertEqual(second.max_hours_per_task, 30)
+
+    def test_orchestrator_rules_follow_an_edited_file(self):
+        first = _get_estimation_rules(self.path)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"limits": {"max_hours_per_task": 40}}, f)
+        os.utime(self.path, (0, os.stat(self.path).st_mtime + 10))
+
+        second = _get_estimation_rules(self.path)
+
+        self.assertEqual(first.max_hours_per_task, 60)
+        self.assertEqual(second.max_hours_per_task, 40)
+
+    def test_task_patterns_match_case_insensitively_and_clamp_hours(self):
+        rules = EstimationRules(self.path)
+
+        self.assertEqual(rules.get_task_estimation("Настройка OAUTH ИНТЕГРАЦИЯ")["max_hours"], 24)
+        self.assertIsNone(rules.get_task_estimation("Деплой"))
+        self.assertEqual(rules.normalize_hours(100, "Форма входа"), 6)
+        self.assertEqual(rules.normalize_hours(1, "Деплой"), 4)
+
+    def test_task_limits_are_resolved_once_per_name(self):
+        rules = EstimationRules(self.path)
+
+        with patch.object(EstimationRules, "get_task_estimation",
+                          wraps=rules.get_task_estimation) as lookup:
+            hours = [rules.normalize_hours(h, "Форма входа") for h in (1, 5, 100)]
+
+        self.assertEqual(hours, [4, 5, 6])
+        self.assertEqual(lookup.call_count, 1)
+
+
+def _phase(phase_id, name, hours, tasks):
+    return {
+        "id": phase_id,
+        "name": name,
+        "estimated_hours": hours,
+        "work_packages": [{
+            "id": f"{phase_id}.1",
+            "name": "Пакет",
+            "estimated_hours": sum(tasks.values()),
+            "tasks": [
+                {"id": f"{phase_id}.1.{i}", "name": task, "estimated_hours": task_hours}
+                for i, (task, task_hours) in enumerate(tasks.items(), 1)
+            ]
+        }]
+    }
+
+
+class ResultStabilizerConsensusTests(unittest.TestCase):
+    def setUp(self):
+        rules = EstimationRules.__new__(EstimationRules)
+        rules.rules = {}
+        rules._index_rules()
+        self.stabilizer = ResultStabilizer(rules)
+
+    def test_phases_are_matched_by_id_and_name_regardless_of_order(self):
+        results = [
+            {"wbs": {"phases": [_phase("1", "Анализ", 10, {"Интервью": 10}),
+                                _phase("2", "Разработка", 40, {"API": 40})]}},
+            {"wbs": {"phases": [_phase("2", "Разработка", 60, {"API": 60}),
+                                _phase("1", "Анализ", 20, {"Интервью": 20})]}},
+            {"wbs": {"phases": [_phase("x", "разработка", 50, {"API": 50}),
+                                _phase("y", "Анализ требований", 30, {"Интервью": 30})]}},
+        ]
+
+        phases = self.stabilizer._calculate_consensus(results, "median")["wbs"]["phases"]
+
+        self.assertEqual([p["estimated_hours"] for p in phases], [20, 50])
+        self.assertEqual(phases[1]["work_packages"][0]["tasks"][0]["estimated_hours"], 50)
+
+    def test_each_sibling_list_is_indexed_once(self):
+        results = [
+            {"wbs": {"phases": [_phase("1", "Анализ", 10, {"Интервью": 10}),
+                                _phase("2", "Разработка", 40, {"API": 40})]}}
+            for _ in range(3)
+        ]
+        results[2]["wbs"]["phases"].reverse()
+
+        with patch.object(result_stabilizer, "_index_nodes", wraps=result_stabilizer._index_nodes) as index:
+            self.stabilizer._calculate_consensus(results, "median")
+
+        # 3 phase lists + 6 work package lists + 6 task lists
+        self.assertEqual(index.call_count, 15)
+
+    def test_identical_structures_are_matched_by_position(self):
+        results = [
+            {"wbs": {"phases": [_phase("1", "Анализ", hours, {"Интервью": hours, "Обзор": 8}),
+                                _phase("2", "Разработка", 4 * hours, {"API": 4 * hours})]}}
+            for hours in (10, 30, 20)
+        ]
+
+        with patch.object(result_stabilizer, "_index_nodes") as index:
+            phases = self.stabilizer._calculate_consensus(results, "median")["wbs"]["phases"]
+
+        index.assert_not_called()
+        self.assertEqual([p["estimated_hours"] for p in phases], [20, 80])
+        self.assertEqual([t["estimated_hours"] for t in phases[0]["work_packages"][0]["tasks"]], [20, 8])
+
+    def test_mean_ignores_unmatched_and_zero_hours(self):
+        results = [
+            {"wbs": {"phases": [_phase("1", "Анализ", 10, {"Интервью": 10})]}},
+            {"wbs": {"phases": [_phase("1", "Анализ", 0, {"Интервью": 0})]}},
+            {"wbs": {"phases": [_phase("9", "Другое", 90, {"Другое": 90})]}},
+            {"wbs": {"phases": [_phase("1", "Анализ", 20, {"Интервью": 20})]}},
+        ]
+
+        phases = self.stabilizer._calculate_consensus(results, "mean")["wbs"]["phases"]
+
+        self.assertEqual(phases[0]["estimated_hours"], 15)
+        self.assertEqual(phases[0]["work_packages"][0]["tasks"][0]["estimated_hours"], 15)
+        self.assertEqual(results[0]["wbs"]["phases"][0]["estimated_hours"], 10)
+
+
+class ResultStabilizerStabilizeTests(unittest.TestCase):
+    def setUp(self):
+        rules = EstimationRules.__new__(EstimationRules)
+        rules.rules = {}
+        rules._index_rules()
+        self.stabilizer = ResultStabilizer(rules)
+
+    def test_totals_are_summarized_for_metadata_and_consensus(self):
+        results = [
+            {"project_info": {"total_estimated_hours": hours},
+             "wbs": {"phases": [_phase("1", "Анализ", hours, {"Интервью": hours})]}}
+            for hours in (40, 50, 60)
+        ]
+
+        stabilized = self.stabilizer.stabilize(results, "median")
+
+        self.assertTrue(stabilized["success"])
+        self.assertEqual(stabilized["metadata"]["statistics"]["median"], 50)
+        self.assertEqual(stabilized["metadata"]["statistics"]["std"], 10.0)
+        self.assertAlmostEqual(stabilized["metadata"]["confidence"], 0.9)
+        self.assertEqual(stabilized["data"]["project_info"]["total_estimated_hours"], 50)
+        self.assertEqual(stabilized["data"]["wbs"]["phases"][0]["duration"], "7 дней")
+
+    def test_statistics_can_be_skipped(self):
+        results = [{"project_info": {"total_estimated_hours": hours}} for hours in (40, 50)]
+
+        with patch.object(ResultStabilizer, "_calculate_statistics") as calculate:
+            stabilized = self.stabilizer.stabilize(results, include_stats=False)
+
+        calculate.assert_not_called()
+        self.assertNotIn("statistics", stabilized["metadata"])
+        self.assertEqual(stabilized["metadata"]["used_iterations"], 2)
+
+    def test_normalized_totals_equal_the_sum_of_task_hours(self):
+        big_phase = _phase("1", "Разработка", 0, {f"Модуль {i}": 70.4 for i in range(10)})
+        leaf_phase = {"id": "2", "name": "Запуск", "estimated_hours": 900}
+        wbs = {"project_info": {"total_estimated_hours": 0}, "wbs": {"phases": [big_phase, leaf_phase]}}
+
+        normalized = self.stabilizer._normalize_wbs(wbs)
+
+        phases = normalized["wbs"]["phases"]
+        task_hours = [t["estimated_hours"] for t in phases[0]["work_packages"][0]["tasks"]]
+        self.assertEqual(task_hours, [70] * 10)
+        self.assertEqual(phases[0]["work_packages"][0]["estimated_hours"], 700)
+        self.assertEqual(phases[0]["estimated_hours"], 700)
+        self.assertEqual(phases[1]["estimated_hours"], 500)
+        self.assertEqual(normalized["project_info"]["total_estimated_hours"], 1200)
+
+    def test_outliers_are_matched_to_their_own_results(self):
+        results = [{"id": "empty", "project_info": {"total_estimated_hours": 0}}]
+        results += [{"id": f"r{i}", "project_info": {"total_estimated_hours": 100}} for i in range(6)]
+        results.append({"id": "outlier", "project_info": {"total_estimated_hours": 1000}})
+
+        filtered = self.stabilizer._remove_outliers(results)
+
+        self.assertEqual([r["id"] for r in filtered], [r["id"] for r in results[:-1]])
+
+
+class EnsembleGeneratorTests(unittest.TestCase):
+    def setUp(self):
+        rules = EstimationRules.__new__(EstimationRules)
+        rules.rules = {}
+        rules._index_rules()
+        self.stabilizer = ResultStabilizer(rules)
+
+    def test_coroutine_generator_runs_concurrently_and_skips_failures(self):
+        calls = []
+
+        async def generate(document):
+            calls.append(document)
+            if len(calls) == 2:
+                raise RuntimeError("timeout")
+            hours = 40 * len(calls)
+            return {"success": True, "data": {"project_info": {"total_estimated_hours": hours}}}
+
+        result = EnsembleGenerator(generate, self.stabilizer).generate_with_ensemble(
+            "spec", iterations=3, parallel=True
+        )
+
+        self.assertTrue(result["success"])
+        self.assertEqual(calls, ["spec"] * 3)
+        self.assertEqual(result["metadata"]["total_iterations"], 2)
+
+    def test_parallel_runs_share_one_worker_pool(self):
+        threads = set()
+
+        def generate(document):
+            threads.add(threading.current_thread().name)
+            return {"success": True, "data": {"project_info": {"total_estimated_hours": 80}}}
+
+        generator = EnsembleGenerator(generate, self.stabilizer)
+        for _ in range(3):
+            result = generator.generate_with_ensemble("spec", iterations=3, parallel=True)
+            self.assertEqual(result["metadata"]["used_iterations"], 3)
+
+        self.assertTrue(all(name.startswith("wbs-ens") for name in threads))
+        self.assertLessEqual(len(threads), 5)
+
+    def test_parallel_failures_are_skipped(self):
+        calls = []
+        lock = threading.Lock()
+
+        def generate(document):
+            with lock:
+                calls.append(document)
+                attempt = len(calls)
+            if attempt == 1:
+                raise RuntimeError("timeout")
+            return {"success": True, "data": {"project_info": {"total_estimated_hours": 80}}}
+
+        result = EnsembleGenerator(generate, self.stabilizer).generate_with_ensemble(
+            "spec", iterations=3, parallel=True
+        )
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(result["metadata"]["total_iterations"], 2)
+
+    def test_coroutine_generator_runs_sequentially(self):
+        async def generate(document):
+            return {"success": True, "data": {"project_info": {"total_estimated_hours": 80}}}
+
+        result = EnsembleGenerator(generate, self.stabilizer).generate_with_ensemble("spec", iterations=2)
+
+        self.assertEqual(result["metadata"]["used_iterations"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from result_store import ResultStore
+
+
+class ResultStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_save_evicts_oldest_results_beyond_max_entries(self):
+        store = ResultStore(storage_dir=self.temp_dir.name, ttl_seconds=60, max_entries=2)
+        for index, result_id in enumerate(["a", "b"]):
+            store.save(result_id, {"result": {"id": result_id}})
+            os.utime(store._get_filepath(result_id), (1000 + index, 1000 + index))
+
+        store.save("c", {"result": {"id": "c"}})
+
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(store.get("b"), {"result": {"id": "b"}})
+        self.assertEqual(store.get("c"), {"result": {"id": "c"}})
+        self.assertEqual(store.count(), 2)
+
+    def test_directory_is_scanned_only_when_the_limit_is_exceeded(self):
+        store = ResultStore(storage_dir=self.temp_dir.name, ttl_seconds=60, max_entries=10)
+        with patch.object(ResultStore, "_evict_oldest_locked", autospec=True,
+                          side_effect=ResultStore._evict_oldest_locked) as evict:
+            for index in range(11):
+                store.save(f"r{index}", {"result": {}})
+            store.save("r10", {"result": {"updated": True}})
+            store.save("r11", {"result": {}})
+
+        self.assertEqual(evict.call_count, 1)
+        self.assertEqual(store.count(), 10)
+        self.assertEqual(store.get("r10"), {"result": {"updated": True}})
+
+    def test_zero_max_entries_keeps_everything(self):
+        store = ResultStore(storage_dir=self.temp_dir.name, ttl_seconds=60)
+        for result_id in ["a", "b", "c"]:
+            store.save(result_id, {"result": {}})
+
+        self.assertEqual(store.count(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
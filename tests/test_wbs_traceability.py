@@ -1,8 +1,14 @@
+import copy
+import json
+import statistics
+import threading
 import unittest
+from unittest.mock import patch
 
 from agents.agent_orchestrator import AgentOrchestrator
 from agents.planner_agent import PlannerAgent
-from agents.validator_agent import ESTIMATION_RULES, ValidatorAgent
+from agents.result_stabilizer import EstimationRules, ResultStabilizer
+from agents.validator_agent import ESTIMATION_RULES, ValidationResult, ValidatorAgent, estimation_rules_to_dict
 
 
 class WBSTraceabilityTests(unittest.TestCase):
@@ -103,6 +109,63 @@ class WBSTraceabilityTests(unittest.TestCase):
             any("references requirements outside work package" in issue for issue in validation["issues"])
         )
 
+    def test_planner_validate_and_refine_returns_revalidated_refinement(self):
+        planner = self._planner()
+        invalid_wbs = {
+            "wbs": {
+                "phases": [
+                    {
+                        "id": "1",
+                        "work_packages": [
+                            {
+                                "id": "1.1",
+                                "requirement_ids": ["FR-1"],
+                                "tasks": [{"id": "1.1.1", "requirement_ids": ["FR-2"]}],
+                            }
+                        ],
+                    }
+                ]
+            }
+        }
+        fixed_wbs = {
+            "wbs": {
+                "phases": [
+                    {
+                        "id": "1",
+                        "work_packages": [
+                            {
+                                "id": "1.1",
+                                "requirement_ids": ["FR-1"],
+                                "tasks": [{"id": "1.1.1", "requirement_ids": ["FR-1"]}],
+                            }
+                        ],
+                    }
+                ]
+            }
+        }
+        feedback_seen = []
+
+        def refine(wbs, feedback):
+            feedback_seen.append(feedback)
+            return {"success": True, "wbs": fixed_wbs}
+
+        outcome = planner.validate_and_refine(invalid_wbs, feedback_template="Fix: {issues}", refine_func=refine)
+
+        self.assertTrue(outcome["refined"])
+        self.assertTrue(outcome["valid"])
+        self.assertIs(outcome["wbs"], fixed_wbs)
+        self.assertTrue(feedback_seen[0].startswith("Fix: Task 1.1.1"))
+
+        final_outcome = planner.validate_and_refine(
+            invalid_wbs,
+            refine_func=lambda wbs, feedback: {"success": True, "wbs": fixed_wbs},
+            revalidate=False
+        )
+
+        self.assertTrue(final_outcome["refined"])
+        self.assertIsNone(final_outcome["valid"])
+        self.assertIs(final_outcome["wbs"], fixed_wbs)
+
     def test_validator_normalize_enforces_parent_subset_and_inherits_missing_ids(self):
         validator = self._validator()
         wbs = {
@@ -145,6 +208,40 @@ class WBSTraceabilityTests(unittest.TestCase):
         self.assertEqual(tasks[1]["requirement_ids"], ["FR-1"])
         self.assertEqual(normalized["wbs"]["phases"][0]["work_packages"][0]["estimated_hours"], 16)
 
+    def test_validator_normalize_and_consensus_leave_input_untouched(self):
+        validator = self._validator()
+        deliverables = ["API"]
+        wbs = {
+            "project_info": {"total_estimated_hours": 0},
+            "wbs": {
+                "phases": [
+                    {
+                        "id": "1",
+                        "estimated_hours": 0,
+                        "deliverables": deliverables,
+                        "work_packages": [
+                            {
+                                "id": "1.1",
+                                "estimated_hours": 0,
+                                "tasks": [{"id": "1.1.1", "name": "Реализация", "estimated_hours": "12"}],
+                            }
+                        ],
+                    }
+                ]
+            },
+        }
+        other = {"project_info": {"total_estimated_hours": 40}, "wbs": {"phases": [{"estimated_hours": 40}]}}
+
+        normalized = validator.normalize_wbs(wbs)
+        consensus = validator.get_consensus([wbs, other, other])
+
+        self.assertEqual(normalized["wbs"]["phases"][0]["work_packages"][0]["tasks"][0]["estimated_hours"], 12)
+        self.assertEqual(consensus["wbs"]["phases"][0]["estimated_hours"], 40)
+        self.assertEqual(wbs["wbs"]["phases"][0]["work_packages"][0]["tasks"][0]["estimated_hours"], "12")
+        self.assertEqual(wbs["wbs"]["phases"][0]["estimated_hours"], 0)
+        self.assertEqual(wbs["project_info"]["total_estimated_hours"], 0)
+        self.assertIs(normalized["wbs"]["phases"][0]["deliverables"], deliverables)
+
     def test_orchestrator_coverage_uses_requirement_ids_before_name_fallback(self):
         orchestrator = self._orchestrator()
         analysis = {
@@ -263,6 +360,238 @@ class WBSTraceabilityTests(unittest.TestCase):
         )
         self.assertLess(result.confidence_score, 0.9)
 
+    def test_validator_matches_task_templates_case_insensitively(self):
+        validator = self._validator()
+        validator.estimation_rules = {
+            **ESTIMATION_RULES,
+            "task_templates": {"Code Review": {"min_hours": 2, "max_hours": 4}, "code": {"min_hours": 1, "max_hours": 100}},
+        }
+        result = ValidationResult()
+
+        validator._validate_task(
+            {"id": "1", "name": "Final CODE REVIEW", "estimated_hours": 10, "requirement_ids": ["FR-1"]},
+            "wbs", ["FR-1"], result
+        )
+
+        self.assertEqual(len(result.warnings), 1)
+        self.assertIn("(2-4)", result.warnings[0]["message"])
+
+    def test_validator_consistency_matches_statistics_module(self):
+        validator = self._validator()
+        totals = [400, 460, 515, 390]
+        wbs_list = [{"project_info": {"total_estimated_hours": total}} for total in totals]
+
+        report = validator.check_consistency(wbs_list)
+
+        self.assertEqual(report["mean_hours"], round(statistics.mean(totals), 1))
+        self.assertEqual(report["std_hours"], round(statistics.stdev(totals), 1))
+        self.assertEqual(report["coefficient_of_variation"], round(statistics.stdev(totals) / statistics.mean(totals), 3))
+        self.assertEqual(report["range_hours"], 125)
+
+    def test_validator_collects_totals_while_validating_phases(self):
+        validator = self._validator()
+        wbs = {
+            "project_info": {"project_name": "Demo", "project_type": "", "total_estimated_hours": 24},
+            "wbs": {
+                "phases": [
+                    {
+                        "id": str(index),
+                        "name": f"Фаза {index}",
+                        "duration": "1 дней",
+                        "estimated_hours": 8,
+                        "work_packages": [
+                            {
+                                "id": f"{index}.1",
+                                "estimated_hours": 8,
+                                "requirement_ids": ["FR-1"],
+                                "tasks": [{"id": f"{index}.1.1", "estimated_hours": 8, "requirement_ids": ["FR-1"]}],
+                            }
+                        ],
+                    }
+                    for index in range(1, 4)
+                ]
+            },
+        }
+
+        with patch.object(validator, "_calculate_actual_total_hours", side_effect=AssertionError):
+            result = validator.validate_wbs(wbs)
+
+        self.assertEqual(result.confidence_score, validator._calculate_confidence(result, wbs))
+
+    def test_validator_resolves_each_task_name_once(self):
+        validator = self._validator()
+        task = {"id": "1", "name": "REST endpoint заказов", "estimated_hours": 8, "requirement_ids": ["FR-1"]}
+
+        with patch.object(validator, "_find_task_template", wraps=validator._find_task_template) as find:
+            validator.estimation_rules = ESTIMATION_RULES
+            for _ in range(3):
+                validator._validate_task(dict(task), "wbs", ["FR-1"], ValidationResult())
+
+        self.assertEqual(find.call_count, 1)
+
+    def test_validator_warns_when_work_package_differs_from_tasks_by_over_30_percent(self):
+        validator = self._validator()
+
+        def warnings_for(wp_hours):
+            result = ValidationResult()
+            validator._validate_work_package(
+                {
+                    "id": "1.1",
+                    "estimated_hours": wp_hours,
+                    "requirement_ids": ["FR-1"],
+                    "tasks": [{"id": "1.1.1", "estimated_hours": 13, "requirement_ids": ["FR-1"]}],
+                },
+                "phase[1]", result
+            )
+            return [warning["message"] for warning in result.warnings if "differ from sum" in warning["message"]]
+
+        self.assertEqual(warnings_for(10), [])
+        self.assertEqual(len(warnings_for(9)), 1)
+
+    def test_validator_flags_task_requirements_outside_work_package(self):
+        validator = self._validator()
+        result = ValidationResult()
+
+        task_count = validator._validate_work_package(
+            {
+                "id": "1.1",
+                "estimated_hours": 16,
+                "requirement_ids": ["FR-1", "FR-2"],
+                "tasks": [
+                    {"id": "1.1.1", "estimated_hours": 8, "requirement_ids": ["FR-2", "FR-1"]},
+                    {"id": "1.1.2", "estimated_hours": 8, "requirement_ids": ["FR-3"]},
+                ],
+            },
+            "phase[1]", result
+        )
+
+        self.assertEqual(task_count, 2)
+        self.assertEqual(
+            [issue["location"] for issue in result.issues if issue["category"] == "traceability"],
+            ["phase[1].wp[1.1].task[1.1.2]"]
+        )
+
+    def test_validator_limits_follow_replaced_rules(self):
+        validator = self._validator()
+        validator.estimation_rules = {**ESTIMATION_RULES, "min_hours_per_task": 1, "max_hours_per_task": 3}
+        result = ValidationResult()
+
+        validator._validate_task(
+            {"id": "1", "name": "", "estimated_hours": 5, "requirement_ids": ["FR-1"]},
+            "wbs", ["FR-1"], result
+        )
+
+        self.assertEqual(result.corrections[0]["new_value"], 3)
+        with self.assertRaises(TypeError):
+            ESTIMATION_RULES["min_hours_per_task"] = 0
+
+    def test_estimation_rules_are_deeply_read_only_and_exportable(self):
+        with self.assertRaises(TypeError):
+            ESTIMATION_RULES["complexity_multipliers"]["Высокий"] = 10
+
+        exported = estimation_rules_to_dict(ESTIMATION_RULES)
+        exported["complexity_multipliers"]["Высокий"] = 10
+
+        self.assertEqual(json.loads(json.dumps(exported))["complexity_multipliers"]["Высокий"], 10)
+        self.assertNotEqual(ESTIMATION_RULES["complexity_multipliers"]["Высокий"], 10)
+
+    def test_validator_and_stabilizer_normalize_to_the_same_totals(self):
+        def task(index, hours):
+            return {"id": f"t{index}", "name": f"Шаг {index}", "estimated_hours": hours, "requirement_ids": ["FR-1"]}
+
+        wbs = {
+            "project_info": {"project_name": "Demo", "total_estimated_hours": 0},
+            "wbs": {"phases": [
+                {"id": "1", "name": "Большая фаза", "work_packages": [
+                    {"id": f"1.{index}", "requirement_ids": ["FR-1"], "tasks": [task(index, 79.6), task(index + 100, 10.4)]}
+                    for index in range(8)
+                ]},
+                {"id": "2", "name": "Фаза без пакетов", "estimated_hours": 900, "work_packages": []},
+                {"id": "3", "name": "Мелкая фаза", "work_packages": [
+                    {"id": "3.1", "requirement_ids": ["FR-1"], "tasks": [task(200, 1.4), task(201, "3.5 ч")]}
+                ]},
+            ]},
+        }
+
+        by_validator = self._validator().normalize_wbs(copy.deepcopy(wbs))
+        by_stabilizer = ResultStabilizer(EstimationRules())._normalize_wbs(copy.deepcopy(wbs))
+
+        for normalized in (by_validator, by_stabilizer):
+            self.assertEqual(
+                [phase["estimated_hours"] for phase in normalized["wbs"]["phases"]],
+                [8 * (80 + 10), 500, 2 + 4]
+            )
+            self.assertEqual(normalized["project_info"]["total_estimated_hours"], 8 * 90 + 500 + 6)
+
+    def test_validator_consensus_takes_phase_medians_over_ragged_variants(self):
+        validator = self._validator()
+
+        def variant(*hours):
+            return {
+                "project_info": {"total_estimated_hours": sum(hours)},
+                "wbs": {"phases": [{"id": str(index), "estimated_hours": value} for index, value in enumerate(hours)]},
+            }
+
+        consensus = validator.get_consensus([variant(10, 20, 30), variant(30, 40), variant(20, 60, 10, 5)])
+
+        self.assertEqual([phase["estimated_hours"] for phase in consensus["wbs"]["phases"]], [20, 40, 20])
+        self.assertEqual(consensus["project_info"]["total_estimated_hours"], 70)
+
+    def test_create_wbs_batch_keeps_input_order_and_isolates_failures(self):
+        planner = self._planner()
+        planner.name = "Планировщик"
+
+        def create_wbs(analysis):
+            if analysis["name"] == "broken":
+                raise RuntimeError("boom")
+            return {"success": True, "wbs": {"project": analysis["name"]}}
+
+        with patch("config.Config.WBS_SKELETON_BATCH_SIZE", 1), \
+                patch.object(planner, "create_wbs", side_effect=create_wbs):
+            results = planner.create_wbs_batch([{"name": "a"}, {"name": "broken"}, {"name": "c"}])
+
+        self.assertEqual(results[0]["wbs"], {"project": "a"})
+        self.assertEqual(results[1], {"success": False, "error": "boom"})
+        self.assertEqual(results[2]["wbs"], {"project": "c"})
+
+    def test_create_wbs_batch_keeps_llm_pool_for_leaf_calls(self):
+        planner = self._planner()
+        planner.name = "Планировщик"
+        thread_names = []
+
+        def create_wbs(analysis):
+            thread_names.append(threading.current_thread().name)
+            return {"success": True, "wbs": {}}
+
+        with patch("config.Config.WBS_SKELETON_BATCH_SIZE", 1), \
+                patch.object(planner, "create_wbs", side_effect=create_wbs):
+            planner.create_wbs_batch([{"name": "a"}, {"name": "b"}])
+
+        self.assertEqual(len(thread_names), 2)
+        self.assertTrue(all(name.startswith("wbs-orch") for name in thread_names), thread_names)
+
+    def test_create_wbs_batch_splits_batched_skeletons_per_project(self):
+        planner = self._planner()
+        planner.name = "Планировщик"
+        received = []
+
+        def create_wbs(analysis, skeleton_result=None):
+            received.append((analysis["name"], skeleton_result))
+            return {"success": True, "wbs": {}}
+
+        batched_reply = {"success": True, "data": {"1": {"phase_plan": ["a"]}, "2": "broken"}}
+        with patch("config.Config.ENABLE_WBS_SKELETON_LLM", True), \
+                patch("config.Config.WBS_SKELETON_BATCH_SIZE", 2), \
+                patch.object(planner, "send_message", return_value=batched_reply) as send_message, \
+                patch.object(planner, "create_wbs", side_effect=create_wbs):
+            planner.create_wbs_batch([{"name": "a"}, {"name": "b"}, {"name": "c"}])
+
+        self.assertEqual(send_message.call_count, 1)
+        self.assertEqual(
+            sorted(received, key=lambda item: item[0]),
+            [("a", {"success": True, "data": {"phase_plan": ["a"]}}), ("b", None), ("c", None)]
+        )
+
 
 if __name__ == "__main__":
     unittest.main()